@@ -91,7 +91,7 @@ def create_app(config_name=None):
     
     # Register error handlers
     from app.utils.error_handlers import register_error_handlers
-    register_error_handlers(app)
+    register_error_handlers(app, db)
     
     # Setup audit logging
     if not app.config.get('TESTING'):
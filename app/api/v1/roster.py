@@ -11,6 +11,7 @@ from app.models.audit import AuditLog
 from app.security.audit import audit_log
 from app.security.rbac import require_permission, require_resource_access
 from app.api.auth import token_required
+from app.utils.validators import parse_date
 
 logger = logging.getLogger(__name__)
 
@@ -122,8 +123,8 @@ def create_roster():
                 return jsonify({'success': False, 'error': f'Missing required field: {field}'}), 400
         
         # Parse dates
-        start_date = datetime.strptime(data['start_date'], '%Y-%m-%d').date()
-        end_date = datetime.strptime(data['end_date'], '%Y-%m-%d').date()
+        start_date = parse_date(data['start_date'])
+        end_date = parse_date(data['end_date'])
         
         # Generate roster using provided data
         from app.roster.utils import generate_roster_advanced
@@ -215,7 +216,7 @@ def emergency_update_api(id):
                 return jsonify({'success': False, 'error': f'Missing required field: {field}'}), 400
         
         # Create emergency update
-        leave_date = datetime.strptime(data['leave_date'], '%Y-%m-%d').date()
+        leave_date = parse_date(data['leave_date'])
         
         update = EmergencyUpdate(
             roster_id=roster.id,
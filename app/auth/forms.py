@@ -1,7 +1,7 @@
 """Authentication forms with enhanced security"""
 from flask_wtf import FlaskForm, RecaptchaField
 from wtforms import StringField, PasswordField, BooleanField, IntegerField
-from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError, Regexp
+from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationError, Regexp, Optional
 from app.models.user import User
 import re
 
@@ -16,6 +16,7 @@ class LoginForm(FlaskForm):
         DataRequired(message='Password is required')
     ])
     mfa_token = StringField('MFA Code', validators=[
+        Optional(),
         Length(min=6, max=6, message='MFA code must be 6 digits')
     ])
     remember_me = BooleanField('Remember Me')
@@ -38,8 +39,7 @@ class RegistrationForm(FlaskForm):
     
     def validate_email(self, email):
         """Check if email already exists"""
-        user = User.query.filter_by(email=email.data.lower()).first()
-        if user:
+        if User.email_registered(email.data):
             raise ValidationError('Email already registered. Please login or use a different email.')
     
     def validate_password(self, password):
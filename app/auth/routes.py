@@ -1,12 +1,13 @@
 from flask import render_template, redirect, url_for, flash, request, session
 from flask_login import login_user, logout_user, current_user, login_required
-from werkzeug.urls import url_parse
+from urllib.parse import urlparse
 from datetime import datetime
 import logging
 
 from . import auth_bp
-from models import db, User
-from forms import LoginForm, RegistrationForm, PasswordResetRequestForm, PasswordResetForm
+from app import db
+from app.models.user import User
+from .forms import LoginForm, RegistrationForm, PasswordResetRequestForm, PasswordResetForm
 
 logger = logging.getLogger(__name__)
 
@@ -14,7 +15,7 @@ logger = logging.getLogger(__name__)
 def login():
     """User login"""
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('roster.index'))
     
     form = LoginForm()
     if form.validate_on_submit():
@@ -30,8 +31,8 @@ def login():
             
             # Redirect to next page or home
             next_page = request.args.get('next')
-            if not next_page or url_parse(next_page).netloc != '':
-                next_page = url_for('index')
+            if not next_page or urlparse(next_page).netloc != '':
+                next_page = url_for('roster.index')
             
             flash('Welcome back!', 'success')
             return redirect(next_page)
@@ -45,7 +46,7 @@ def login():
 def register():
     """User registration"""
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('roster.index'))
     
     form = RegistrationForm()
     if form.validate_on_submit():
@@ -62,7 +63,7 @@ def register():
             # Auto-login after registration
             login_user(user)
             flash('Registration successful! Welcome to Clinical Roster Builder.', 'success')
-            return redirect(url_for('index'))
+            return redirect(url_for('roster.index'))
             
         except Exception as e:
             db.session.rollback()
@@ -78,13 +79,13 @@ def logout():
     logger.info(f'User {current_user.email} logged out')
     logout_user()
     flash('You have been logged out.', 'info')
-    return redirect(url_for('index'))
+    return redirect(url_for('roster.index'))
 
 @auth_bp.route('/password-reset-request', methods=['GET', 'POST'])
 def password_reset_request():
     """Request password reset"""
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('roster.index'))
     
     form = PasswordResetRequestForm()
     if form.validate_on_submit():
@@ -105,7 +106,7 @@ def password_reset_request():
 def password_reset(token):
     """Reset password with token"""
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('roster.index'))
     
     # TODO: Implement token verification
     user = None  # Get user from token
@@ -1,13 +1,14 @@
 """Enhanced authentication routes with MFA and security features"""
 from flask import render_template, redirect, url_for, flash, request, session, jsonify
 from flask_login import login_user, logout_user, current_user, login_required
-from werkzeug.urls import url_parse
+from urllib.parse import urlparse
 from datetime import datetime, timedelta
 import logging
 import io
 import qrcode
 import base64
 import secrets
+import time
 
 from . import auth_bp
 from app import db
@@ -28,7 +29,7 @@ logger = logging.getLogger(__name__)
 def login():
     """Enhanced login with MFA support"""
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('roster.index'))
     
     form = LoginForm()
     if form.validate_on_submit():
@@ -65,8 +66,8 @@ def login():
             
             # Redirect to next page or home
             next_page = request.args.get('next')
-            if not next_page or url_parse(next_page).netloc != '':
-                next_page = url_for('index')
+            if not next_page or urlparse(next_page).netloc != '':
+                next_page = url_for('roster.index')
             
             return redirect(next_page)
         else:
@@ -145,7 +146,7 @@ def mfa_verify():
                 request=request
             )
             
-            next_page = request.args.get('next', url_for('index'))
+            next_page = request.args.get('next', url_for('roster.index'))
             return redirect(next_page)
         else:
             flash('Invalid MFA code or backup code', 'error')
@@ -160,7 +161,7 @@ def mfa_setup():
     """Setup MFA for user account"""
     if current_user.mfa_enabled:
         flash('MFA is already enabled for your account.', 'info')
-        return redirect(url_for('index'))
+        return redirect(url_for('roster.index'))
     
     form = MFASetupForm()
     
@@ -215,7 +216,7 @@ def mfa_disable():
     
     if not password or not current_user.check_password(password):
         flash('Invalid password', 'error')
-        return redirect(url_for('index'))
+        return redirect(url_for('roster.index'))
     
     current_user.mfa_enabled = False
     current_user.mfa_secret = None
@@ -223,14 +224,14 @@ def mfa_disable():
     db.session.commit()
     
     flash('MFA has been disabled', 'success')
-    return redirect(url_for('index'))
+    return redirect(url_for('roster.index'))
 
 
 @auth_bp.route('/register', methods=['GET', 'POST'])
 def register():
     """Enhanced user registration"""
     if current_user.is_authenticated:
-        return redirect(url_for('index'))
+        return redirect(url_for('roster.index'))
     
     form = RegistrationForm()
     if form.validate_on_submit():
@@ -262,7 +263,7 @@ def register():
             session['session_token'] = user.session_token
             
             flash('Registration successful! Welcome to Clinical Roster Builder. Consider enabling MFA for enhanced security.', 'success')
-            return redirect(url_for('index'))
+            return redirect(url_for('roster.index'))
             
         except Exception as e:
             db.session.rollback()
@@ -288,7 +289,7 @@ def logout():
     
     logout_user()
     flash('You have been logged out.', 'info')
-    return redirect(url_for('index'))
+    return redirect(url_for('roster.index'))
 
 
 @auth_bp.route('/password/change', methods=['GET', 'POST'])
@@ -306,7 +307,7 @@ def change_password():
             db.session.commit()
             
             flash('Your password has been changed successfully', 'success')
-            return redirect(url_for('index'))
+            return redirect(url_for('roster.index'))
     
     return render_template('auth/change_password.html', form=form)
 
@@ -326,7 +327,7 @@ def _complete_login(user, remember_me):
     
     # Store session token
     session['session_token'] = user.session_token
-    session['last_active'] = datetime.utcnow().isoformat()
+    session['last_active'] = int(time.time())
     
     # Log successful login
     AuditLog.log(
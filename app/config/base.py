@@ -22,7 +22,7 @@ class Config:
     # File uploads
     UPLOAD_FOLDER = os.environ.get('UPLOAD_FOLDER') or 'uploads'
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB max file size
-    ALLOWED_EXTENSIONS = {'xlsx', 'xls', 'csv', 'pdf', 'png', 'jpg', 'jpeg'}
+    ALLOWED_EXTENSIONS = frozenset({'xlsx', 'xls', 'csv', 'pdf', 'png', 'jpg', 'jpeg'})
     
     # Session
     PERMANENT_SESSION_LIFETIME = timedelta(hours=24)
@@ -59,6 +59,7 @@ class Config:
     
     # Redis configuration
     REDIS_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/0'
+    REDIS_POOL_SIZE = int(os.environ.get('REDIS_POOL_SIZE') or 32)
     
     # Rate limiting
     RATELIMIT_STORAGE_URL = os.environ.get('REDIS_URL') or 'redis://localhost:6379/1'
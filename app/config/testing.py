@@ -1,4 +1,5 @@
 """Testing configuration"""
+from sqlalchemy.pool import StaticPool
 from .base import Config
 
 
@@ -8,8 +9,13 @@ class TestingConfig(Config):
     DEBUG = True
     ENV = 'testing'
     
-    # Use in-memory SQLite for tests
-    SQLALCHEMY_DATABASE_URI = 'sqlite:///:memory:'
+    # Use in-memory SQLite for tests. A named shared-cache database on one
+    # static connection stays alive for the whole run and never touches disk
+    SQLALCHEMY_DATABASE_URI = 'sqlite:///file:clinical_roster_test?mode=memory&cache=shared&uri=true'
+    SQLALCHEMY_ENGINE_OPTIONS = {
+        'poolclass': StaticPool,
+        'connect_args': {'check_same_thread': False},
+    }
     
     # Disable CSRF for testing
     WTF_CSRF_ENABLED = False
@@ -1,9 +1,61 @@
 """Roster-related models"""
 from datetime import datetime, timedelta
-import secrets
+import base64
+import os
+import threading
+import weakref
 import json
+import marshal
 from app import db
 
+# Share tokens are cut from a buffer of OS randomness refilled TOKEN_POOL_SIZE
+# bytes at a time, instead of one urandom call per token
+TOKEN_BYTES = 32
+TOKEN_POOL_SIZE = 4096
+_token_pool = bytearray()
+_token_lock = threading.Lock()
+
+
+def _clear_token_pool():
+    """Drop buffered randomness so forked workers never hand out the parent's tokens"""
+    del _token_pool[:]
+
+
+os.register_at_fork(after_in_child=_clear_token_pool)
+
+
+def _new_token():
+    """URL-safe share token with the same 32 bytes of entropy as secrets.token_urlsafe(32)"""
+    with _token_lock:
+        if len(_token_pool) < TOKEN_BYTES:
+            _token_pool.extend(os.urandom(TOKEN_POOL_SIZE))
+        chunk = bytes(_token_pool[:TOKEN_BYTES])
+        # Consumed bytes are removed so no token is ever issued twice
+        del _token_pool[:TOKEN_BYTES]
+    return base64.urlsafe_b64encode(chunk).rstrip(b'=').decode('ascii')
+
+
+# Parsed JSON columns per model instance, {column: (raw, marshalled)}; kept
+# out of the instances' own __dict__ and dropped when an instance is collected
+_json_cache = weakref.WeakKeyDictionary()
+
+
+def _load_json_column(instance, column):
+    """
+    Parse a JSON text column, reusing the parsed value until the column changes
+    Views read the same profile or roster several times per request
+    
+    Each call returns a fresh copy, so changing it in place never alters what
+    later reads see; unmarshalling the cached value is about twice as fast as
+    parsing the JSON again
+    """
+    raw = getattr(instance, column)
+    columns = _json_cache.setdefault(instance, {})
+    cached = columns.get(column)
+    if cached is None or cached[0] != raw:
+        cached = columns[column] = (raw, marshal.dumps(json.loads(raw) if raw else {}))
+    return marshal.loads(cached[1])
+
 
 class RosterProfile(db.Model):
     """Saved roster configuration profiles"""
@@ -22,10 +74,22 @@ class RosterProfile(db.Model):
     shared_profiles = db.relationship('SharedProfile', backref='profile', lazy='dynamic', cascade='all, delete-orphan')
     generated_rosters = db.relationship('GeneratedRoster', backref='profile', lazy='dynamic')
     
+    @classmethod
+    def user_can_access(cls, user_id, email, profile_id):
+        """Whether the user owns the profile or holds an active share, in one EXISTS query"""
+        shared = db.exists().where(
+            SharedProfile.profile_id == cls.id,
+            SharedProfile.shared_with_email == email,
+            SharedProfile.is_active.is_(True)
+        )
+        return db.session.query(
+            db.exists().where(cls.id == profile_id, db.or_(cls.user_id == user_id, shared))
+        ).scalar()
+    
     @property
     def rules(self):
         """Get rules as dictionary"""
-        return json.loads(self.rules_json) if self.rules_json else {}
+        return _load_json_column(self, 'rules_json')
     
     @rules.setter
     def rules(self, value):
@@ -52,7 +116,7 @@ class SharedProfile(db.Model):
     def __init__(self, **kwargs):
         super(SharedProfile, self).__init__(**kwargs)
         if not self.token:
-            self.token = secrets.token_urlsafe(32)
+            self.token = _new_token()
         if not self.expires_at:
             self.expires_at = datetime.utcnow() + timedelta(days=7)
     
@@ -86,10 +150,17 @@ class GeneratedRoster(db.Model):
     # Relationships
     emergency_updates = db.relationship('EmergencyUpdate', backref='roster', lazy='dynamic', cascade='all, delete-orphan')
     
+    @classmethod
+    def user_can_access(cls, user_id, roster_id):
+        """Whether the user owns the roster, in one EXISTS query"""
+        return db.session.query(
+            db.exists().where(cls.id == roster_id, cls.user_id == user_id)
+        ).scalar()
+    
     @property
     def roster_data(self):
         """Get roster data as dictionary"""
-        return json.loads(self.roster_data_json) if self.roster_data_json else {}
+        return _load_json_column(self, 'roster_data_json')
     
     @roster_data.setter
     def roster_data(self, value):
@@ -99,7 +170,7 @@ class GeneratedRoster(db.Model):
     @property
     def stats(self):
         """Get statistics as dictionary"""
-        return json.loads(self.stats_json) if self.stats_json else {}
+        return _load_json_column(self, 'stats_json')
     
     @stats.setter
     def stats(self, value):
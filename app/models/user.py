@@ -2,6 +2,7 @@
 from datetime import datetime, timedelta
 from flask_login import UserMixin
 from werkzeug.security import generate_password_hash, check_password_hash
+from sqlalchemy.orm import validates
 import secrets
 import json
 import pyotp
@@ -38,9 +39,22 @@ class User(UserMixin, db.Model):
     # Relationships
     roster_profiles = db.relationship('RosterProfile', backref='owner', lazy='dynamic', cascade='all, delete-orphan')
     generated_rosters = db.relationship('GeneratedRoster', backref='creator', lazy='dynamic', cascade='all, delete-orphan')
-    roles = db.relationship('Role', secondary='user_roles', backref='users')
+    # user_roles also references users through assigned_by_id, so the join is spelled out
+    roles = db.relationship('Role', secondary='user_roles', backref='users',
+                            primaryjoin='User.id == UserRole.user_id',
+                            secondaryjoin='Role.id == UserRole.role_id')
     audit_logs = db.relationship('AuditLog', backref='user', lazy='dynamic')
     
+    @classmethod
+    def email_registered(cls, email):
+        """Whether an account uses this email, as one EXISTS probe on the unique index"""
+        return db.session.query(db.exists().where(cls.email == email.lower())).scalar()
+    
+    @validates('email')
+    def normalize_email(self, key, value):
+        """Store emails lowercased so lookups by lowercased email hit the unique index"""
+        return value.lower() if value else value
+    
     def set_password(self, password):
         """Set password hash"""
         self.password_hash = generate_password_hash(password)
@@ -121,10 +135,8 @@ class User(UserMixin, db.Model):
     
     def has_permission(self, permission):
         """Check if user has a specific permission"""
-        for role in self.roles:
-            if permission in role.permissions:
-                return True
-        return False
+        from app.security.rbac import PermissionManager
+        return permission in PermissionManager.get_user_permissions(self)
     
     def has_role(self, role_name):
         """Check if user has a specific role"""
@@ -188,12 +200,15 @@ class Role(db.Model):
             }
         ]
         
-        for role_data in default_roles:
-            role = Role.query.filter_by(name=role_data['name']).first()
-            if not role:
-                role = Role(**role_data)
-                db.session.add(role)
+        # One query for the roles already present; nothing is written when
+        # all of them exist, so repeated calls (every app start) are cheap
+        existing = {name for (name,) in db.session.query(Role.name)}
+        missing = [Role(**role_data) for role_data in default_roles
+                   if role_data['name'] not in existing]
+        if not missing:
+            return
         
+        db.session.add_all(missing)
         db.session.commit()
     
     def __repr__(self):
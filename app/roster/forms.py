@@ -5,7 +5,7 @@ from wtforms import (
     StringField, IntegerField, DateField, SelectField, 
     TextAreaField, BooleanField, HiddenField
 )
-from wtforms.validators import DataRequired, Length, Optional, ValidationError
+from wtforms.validators import DataRequired, Email, Length, Optional, ValidationError
 from datetime import datetime
 
 
@@ -13,6 +13,7 @@ from app.models.roster import GeneratedRoster, RosterProfile, EmergencyUpdate
 from app.models.audit import AuditLog
 from app.security.audit import audit_log
 from app.security.rbac import require_permission, require_resource_access
+from app.utils.validators import parse_date
 from .utils import generate_roster_logic, generate_roster_advanced
 from .forms import RosterRulesForm, EmergencyLeaveForm, ProfileForm
 
@@ -84,8 +85,8 @@ def generate_roster():
         generated_roster = GeneratedRoster(
             user_id=current_user.id,
             name=f"Roster {datetime.now().strftime('%Y-%m-%d %H:%M')}",
-            start_date=datetime.strptime(rules['roster_start'], '%Y-%m-%d').date(),
-            end_date=datetime.strptime(rules['roster_end'], '%Y-%m-%d').date(),
+            start_date=parse_date(rules['roster_start']),
+            end_date=parse_date(rules['roster_end']),
             algorithm_used='csp' if rules['use_advanced_algorithm'] else 'greedy',
             constraints_applied=rules
         )
@@ -1,5 +1,5 @@
 """Advanced rostering algorithm module"""
-from .csp import RosterCSP, Constraint, ConstraintType
+from .csp import RosterCSP, Constraint, ConstraintType, Snapshot
 from .constraints import (
     MinimumStaffConstraint, MaxConsecutiveDaysConstraint,
     MinRestPeriodConstraint, SpecialtyCoverageConstraint,
@@ -9,7 +9,7 @@ from .constraints import (
 from .solver import RosterSolver
 
 __all__ = [
-    'RosterCSP', 'Constraint', 'ConstraintType',
+    'RosterCSP', 'Constraint', 'ConstraintType', 'Snapshot',
     'MinimumStaffConstraint', 'MaxConsecutiveDaysConstraint',
     'MinRestPeriodConstraint', 'SpecialtyCoverageConstraint',
     'FairWorkloadConstraint', 'WeekendPreferenceConstraint',
@@ -1,8 +1,9 @@
 """Constraint implementations for rostering"""
-from typing import Dict, List, Set, Tuple
-from datetime import datetime, timedelta
+from typing import Dict, List, Set, Optional
 from .csp import Constraint, ConstraintType
+from .kernels import min_staff_satisfied, first_consecutive_violation, consecutive_violations
 import logging
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
@@ -10,101 +11,81 @@ logger = logging.getLogger(__name__)
 class MinimumStaffConstraint(Constraint):
     """Ensure minimum staff coverage per day"""
     
+    __slots__ = ('min_staff', 'dates', 'staff')
+    
+    uses_assigned_mask = True
+    
     def __init__(self, min_staff: int, dates: List[str], staff: List[str]):
         super().__init__("minimum_staff", ConstraintType.HARD)
         self.min_staff = min_staff
         self.dates = dates
         self.staff = staff
     
-    def check(self, assignment: Dict[Tuple[str, str], int]) -> bool:
+    def check(self, A: np.ndarray, assigned: Optional[np.ndarray] = None) -> bool:
         """Check if each day has minimum staff"""
-        for date in self.dates:
-            staff_count = sum(
-                assignment.get((staff, date), 0) 
-                for staff in self.staff
-            )
-            if staff_count < self.min_staff:
-                logger.debug(f"Date {date} has only {staff_count} staff (min: {self.min_staff})")
-                return False
-        return True
+        # Undecided slots may still be filled, so during search a day is
+        # only short once its shifts plus undecided slots fall below min_staff
+        if assigned is not None:
+            A = A + ~assigned
+        return bool(min_staff_satisfied(A, self.min_staff))
     
-    def get_violated_assignments(self, assignment: Dict[Tuple[str, str], int]) -> List[str]:
+    def get_violated_assignments(self, A: np.ndarray) -> List[str]:
         """Get dates that don't meet minimum staff requirement"""
-        violated_dates = []
-        for date in self.dates:
-            staff_count = sum(
-                assignment.get((staff, date), 0) 
-                for staff in self.staff
-            )
-            if staff_count < self.min_staff:
-                violated_dates.append(date)
-        return violated_dates
+        violated = np.flatnonzero(A.sum(axis=0) < self.min_staff)
+        return [self.date_names[d] for d in violated]
 
 
 class MaxConsecutiveDaysConstraint(Constraint):
     """Limit consecutive working days"""
     
+    __slots__ = ('max_days', 'dates', 'staff')
+    
     def __init__(self, max_days: int, dates: List[str], staff: List[str]):
         super().__init__("max_consecutive_days", ConstraintType.HARD)
         self.max_days = max_days
         self.dates = dates
         self.staff = staff
     
-    def check(self, assignment: Dict[Tuple[str, str], int]) -> bool:
+    def check(self, A: np.ndarray, assigned: Optional[np.ndarray] = None) -> bool:
         """Check if any staff exceeds max consecutive days"""
-        for staff in self.staff:
-            consecutive = 0
-            for date in self.dates:
-                if assignment.get((staff, date), 0) == 1:
-                    consecutive += 1
-                    if consecutive > self.max_days:
-                        logger.debug(f"{staff} works {consecutive} consecutive days (max: {self.max_days})")
-                        return False
-                else:
-                    consecutive = 0
+        s = first_consecutive_violation(A, self.max_days)
+        if s >= 0:
+            logger.debug(f"{self.staff_names[s]} exceeds {self.max_days} consecutive days")
+            return False
         return True
     
-    def get_violated_staff(self, assignment: Dict[Tuple[str, str], int]) -> List[str]:
+    def get_violated_staff(self, A: np.ndarray) -> List[str]:
         """Get staff who violate consecutive days constraint"""
-        violated_staff = []
-        for staff in self.staff:
-            consecutive = 0
-            max_consecutive = 0
-            for date in self.dates:
-                if assignment.get((staff, date), 0) == 1:
-                    consecutive += 1
-                    max_consecutive = max(max_consecutive, consecutive)
-                else:
-                    consecutive = 0
-            
-            if max_consecutive > self.max_days:
-                violated_staff.append(staff)
-        
-        return violated_staff
+        violated = np.flatnonzero(consecutive_violations(A, self.max_days))
+        return [self.staff_names[s] for s in violated]
 
 
 class MinRestPeriodConstraint(Constraint):
     """Ensure minimum rest between shifts"""
     
+    __slots__ = ('min_rest_days', 'dates', 'staff')
+    
     def __init__(self, min_rest_days: int, dates: List[str], staff: List[str]):
         super().__init__("min_rest_period", ConstraintType.HARD)
         self.min_rest_days = min_rest_days
         self.dates = dates
         self.staff = staff
     
-    def check(self, assignment: Dict[Tuple[str, str], int]) -> bool:
+    def check(self, A: np.ndarray, assigned: Optional[np.ndarray] = None) -> bool:
         """Check minimum rest period between shifts"""
-        for staff in self.staff:
-            last_work_idx = None
+        # Work days of all staff in row-major order: (staff rows, date columns)
+        rows, cols = np.nonzero(A == 1)
             
-            for i, date in enumerate(self.dates):
-                if assignment.get((staff, date), 0) == 1:
-                    if last_work_idx is not None:
-                        days_between = i - last_work_idx - 1
-                        if days_between < self.min_rest_days:
-                            logger.debug(f"{staff} has only {days_between} rest days (min: {self.min_rest_days})")
-                            return False
-                    last_work_idx = i
+        # Rest days between consecutive shifts of the same staff member
+        same_staff = rows[1:] == rows[:-1]
+        days_between = np.diff(cols) - 1
+        short_rest = same_staff & (days_between < self.min_rest_days)
+        
+        if short_rest.any():
+            s = rows[np.argmax(short_rest)]
+            own_gaps = days_between[same_staff & (rows[1:] == s)]
+            logger.debug(f"{self.staff_names[s]} has only {own_gaps.min()} rest days (min: {self.min_rest_days})")
+            return False
         
         return True
 
@@ -112,6 +93,11 @@ class MinRestPeriodConstraint(Constraint):
 class SpecialtyCoverageConstraint(Constraint):
     """Ensure each specialty is represented daily"""
     
+    __slots__ = ('specialties', 'dates', 'unique_specialties', 'min_specialties_per_day',
+                 'staff_by_specialty', 'spec_idx', 'spec_mat', 'spec_staff', 'date_cols')
+    
+    uses_assigned_mask = True
+    
     def __init__(self, specialties: Dict[str, str], dates: List[str], 
                  min_specialties_per_day: Optional[int] = None):
         super().__init__("specialty_coverage", ConstraintType.HARD)
@@ -130,29 +116,38 @@ class SpecialtyCoverageConstraint(Constraint):
             grouped[specialty].append(staff)
         return grouped
     
-    def check(self, assignment: Dict[Tuple[str, str], int]) -> bool:
+    def bind(self, csp):
+        """Build the specialty x staff indicator matrix over the CSP rows"""
+        super().bind(csp)
+        self.spec_idx = {sp: k for k, sp in enumerate(sorted(self.unique_specialties))}
+        self.spec_mat = np.zeros((len(self.spec_idx), len(csp.staff)), dtype=np.int32)
+        for staff, specialty in self.specialties.items():
+            if staff in csp.staff_idx:
+                self.spec_mat[self.spec_idx[specialty], csp.staff_idx[staff]] = 1
+        self.spec_staff = self.spec_mat.sum(axis=0)
+        self.date_cols = np.array([csp.date_idx[date] for date in self.dates], dtype=np.int32)
+    
+    def check(self, A: np.ndarray, assigned: Optional[np.ndarray] = None) -> bool:
         """Check if specialties are adequately covered"""
-        for date in self.dates:
-            covered_specialties = set()
-            available_staff = 0
-            
-            for staff, specialty in self.specialties.items():
-                # Check if staff is available (not necessarily assigned)
-                if (staff, date) in assignment:
-                    if assignment.get((staff, date), 0) == 1:
-                        covered_specialties.add(specialty)
-                    available_staff += 1
-            
-            # Adjust requirement based on available staff
-            required_specialties = min(
-                self.min_specialties_per_day,
-                len(self.unique_specialties),
-                available_staff
-            )
-            
-            if len(covered_specialties) < required_specialties:
-                logger.debug(f"Date {date}: {len(covered_specialties)} specialties covered (need {required_specialties})")
-                return False
+        A = A[:, self.date_cols]
+        covered = (self.spec_mat @ A) > 0
+        
+        # During search a specialty still counts while one of its staff is
+        # undecided, so only days that can no longer be covered fail
+        if assigned is not None:
+            covered |= (self.spec_mat @ ~assigned[:, self.date_cols]) > 0
+        covered_specialties = covered.sum(axis=0)
+        
+        # Adjust requirement based on available staff
+        required_specialties = np.full(A.shape[1], min(
+            self.min_specialties_per_day, len(self.unique_specialties), self.spec_staff.sum()
+        ))
+        
+        uncovered = np.flatnonzero(covered_specialties < required_specialties)
+        if uncovered.size:
+            d = uncovered[0]
+            logger.debug(f"Date {self.dates[d]}: {covered_specialties[d]} specialties covered (need {required_specialties[d]})")
+            return False
         
         return True
 
@@ -160,33 +155,27 @@ class SpecialtyCoverageConstraint(Constraint):
 class FairWorkloadConstraint(Constraint):
     """Distribute workload fairly among staff"""
     
+    __slots__ = ('staff', 'max_variance')
+    
     def __init__(self, staff: List[str], weight: float = 10.0, max_variance: float = 2.0):
         super().__init__("fair_workload", ConstraintType.SOFT, weight)
         self.staff = staff
         self.max_variance = max_variance
     
-    def check(self, assignment: Dict[Tuple[str, str], int]) -> bool:
+    def check(self, A: np.ndarray, assigned: Optional[np.ndarray] = None) -> bool:
         """Always returns True for soft constraints"""
         return True
     
-    def penalty(self, assignment: Dict[Tuple[str, str], int]) -> float:
+    def penalty(self, A: np.ndarray) -> float:
         """Calculate penalty based on workload variance"""
-        workloads = {}
-        for (staff, date), assigned in assignment.items():
-            if assigned == 1:
-                workloads[staff] = workloads.get(staff, 0) + 1
+        # Workload per staff member (row sums)
+        workloads = A.sum(axis=1, dtype=np.int32)
         
-        # Ensure all staff are included
-        for staff in self.staff:
-            if staff not in workloads:
-                workloads[staff] = 0
-        
-        if not workloads:
+        if not workloads.size:
             return 0.0
         
-        # Calculate mean and variance
-        mean_workload = sum(workloads.values()) / len(self.staff)
-        variance = sum((w - mean_workload) ** 2 for w in workloads.values()) / len(self.staff)
+        # Population variance of workloads
+        variance = float(workloads.var())
         
         # Penalty increases with variance
         if variance <= self.max_variance:
@@ -198,36 +187,37 @@ class FairWorkloadConstraint(Constraint):
 class WeekendPreferenceConstraint(Constraint):
     """Minimize weekend assignments based on preferences"""
     
+    __slots__ = ('preferences', 'dates', 'weekend_weights', 'weekend_dates', 'pref_vec')
+    
     def __init__(self, preferences: Dict[str, float], dates: List[str], weight: float = 5.0):
         super().__init__("weekend_preference", ConstraintType.SOFT, weight)
         self.preferences = preferences  # staff -> penalty for weekend work
         self.dates = dates
-        self.weekend_dates = self._identify_weekend_dates()
-    
-    def _identify_weekend_dates(self) -> Set[str]:
-        """Identify weekend dates"""
-        weekend_dates = set()
-        for date_str in self.dates:
-            date = datetime.strptime(date_str, '%Y-%m-%d')
-            if date.weekday() >= 5:  # Saturday or Sunday
-                weekend_dates.add(date_str)
-        return weekend_dates
-    
-    def penalty(self, assignment: Dict[Tuple[str, str], int]) -> float:
+    
+    def bind(self, csp):
+        """Take weekend columns from the CSP's parsed weekdays and lay preferences over matrix rows"""
+        super().bind(csp)
+        # 1.0 on the constraint's weekend columns (Saturday or Sunday), 0.0 elsewhere
+        cols = [csp.date_idx[date] for date in self.dates if date in csp.date_idx]
+        self.weekend_weights = np.zeros(len(csp.dates), dtype=np.float32)
+        self.weekend_weights[cols] = csp.weekday[cols] >= 5
+        self.weekend_dates = {csp.dates[d] for d in np.flatnonzero(self.weekend_weights)}
+        self.pref_vec = np.array(
+            [self.preferences.get(staff, 5.0) for staff in csp.staff],  # Default penalty
+            dtype=np.float64
+        )
+    
+    def penalty(self, A: np.ndarray) -> float:
         """Calculate penalty for weekend assignments"""
-        total_penalty = 0.0
-        
-        for (staff, date), assigned in assignment.items():
-            if assigned == 1 and date in self.weekend_dates:
-                staff_penalty = self.preferences.get(staff, 5.0)  # Default penalty
-                total_penalty += staff_penalty
-        
-        return self.weight * total_penalty
+        weekend_shifts = A.astype(np.float32) @ self.weekend_weights
+        return float(self.weight * np.dot(weekend_shifts, self.pref_vec))
 
 
 class HolidayDistributionConstraint(Constraint):
     """Fairly distribute holiday assignments"""
     
+    __slots__ = ('holidays', 'historical_counts', 'staff', 'holiday_mask', 'staff_rows', 'hist_vec')
+    
     def __init__(self, holidays: Set[str], historical_counts: Dict[str, int], 
                  staff: List[str], weight: float = 8.0):
         super().__init__("holiday_distribution", ConstraintType.SOFT, weight)
@@ -235,61 +225,71 @@ class HolidayDistributionConstraint(Constraint):
         self.historical_counts = historical_counts  # staff -> past holiday count
         self.staff = staff
     
-    def penalty(self, assignment: Dict[Tuple[str, str], int]) -> float:
+    def bind(self, csp):
+        """Lay holidays over matrix columns and history over self.staff as arrays"""
+        super().bind(csp)
+        self.holiday_mask = np.zeros(len(csp.dates), dtype=bool)
+        self.holiday_mask[[csp.date_idx[date] for date in self.holidays if date in csp.date_idx]] = True
+        # Staff outside the CSP map to a trailing zero row
+        self.staff_rows = np.array(
+            [csp.staff_idx.get(staff, len(csp.staff)) for staff in self.staff],
+            dtype=np.int32
+        )
+        self.hist_vec = np.array(
+            [self.historical_counts.get(staff, 0) for staff in self.staff],
+            dtype=np.int32
+        )
+    
+    def penalty(self, A: np.ndarray) -> float:
         """Penalize uneven holiday distribution"""
-        # Count holidays in current assignment
-        holiday_assignments = {}
-        for staff in self.staff:
-            holiday_assignments[staff] = 0
-        
-        for (staff, date), assigned in assignment.items():
-            if assigned == 1 and date in self.holidays:
-                holiday_assignments[staff] = holiday_assignments.get(staff, 0) + 1
-        
-        # Calculate total holidays (historical + current)
-        total_holidays = {}
-        for staff in self.staff:
-            historical = self.historical_counts.get(staff, 0)
-            current = holiday_assignments.get(staff, 0)
-            total_holidays[staff] = historical + current
-        
-        # Penalty based on variance in total holiday counts
-        if not total_holidays:
+        if not self.staff_rows.size:
             return 0.0
         
-        mean_holidays = sum(total_holidays.values()) / len(self.staff)
-        variance = sum((count - mean_holidays) ** 2 for count in total_holidays.values())
+        # Holidays in current assignment plus historical counts
+        current = np.zeros(A.shape[0] + 1, dtype=np.int32)
+        current[:-1] = A.sum(axis=1, dtype=np.int32, where=self.holiday_mask)
+        total_holidays = current[self.staff_rows] + self.hist_vec
         
-        return self.weight * variance
+        # Penalty based on spread of total holiday counts
+        deviations = total_holidays - total_holidays.mean()
+        return float(self.weight * np.dot(deviations, deviations))
 
 
 class TeamPreferenceConstraint(Constraint):
     """Prefer certain staff combinations"""
     
+    __slots__ = ('team_preferences', 'dates', 'P', 'pref_counts', 'date_cols')
+    
     def __init__(self, team_preferences: Dict[str, List[str]], 
                  dates: List[str], weight: float = 3.0):
         super().__init__("team_preference", ConstraintType.SOFT, weight)
         self.team_preferences = team_preferences  # staff -> [preferred teammates]
         self.dates = dates
     
-    def penalty(self, assignment: Dict[Tuple[str, str], int]) -> float:
+    def bind(self, csp):
+        """Build the staff x staff preference matrix over the CSP rows"""
+        super().bind(csp)
+        n_staff = len(csp.staff)
+        # P[s1, s2] counts how often s1 lists s2 as a preferred teammate
+        self.P = np.zeros((n_staff, n_staff), dtype=np.float32)
+        self.pref_counts = np.zeros(n_staff, dtype=np.float32)
+        for staff, preferred in self.team_preferences.items():
+            s = csp.staff_idx.get(staff)
+            if s is None:
+                continue
+            self.pref_counts[s] = len(preferred)
+            for teammate in preferred:
+                if teammate in csp.staff_idx:
+                    self.P[s, csp.staff_idx[teammate]] += 1
+        self.date_cols = np.array([csp.date_idx[date] for date in self.dates], dtype=np.int32)
+    
+    def penalty(self, A: np.ndarray) -> float:
         """Reward when preferred teammates work together"""
-        total_penalty = 0.0
+        working = A[:, self.date_cols].astype(np.float32)
         
-        for date in self.dates:
-            # Get staff working on this date
-            working_staff = [
-                staff for staff, d in assignment 
-                if d == date and assignment.get((staff, date), 0) == 1
-            ]
+        # Preferred teammates working alongside each staff member, per date
+        preferred_working = self.P @ working
             
-            # Check preferences
-            for staff in working_staff:
-                if staff in self.team_preferences:
-                    preferred = self.team_preferences[staff]
-                    # Count how many preferred teammates are working
-                    working_preferred = sum(1 for p in preferred if p in working_staff)
-                    # Penalty for each missing preferred teammate
-                    total_penalty += (len(preferred) - working_preferred)
-        
-        return self.weight * total_penalty
\ No newline at end of file
+        # Penalty for each missing preferred teammate on days worked
+        missing = working * (self.pref_counts[:, None] - preferred_working)
+        return float(self.weight * missing.sum())
\ No newline at end of file
@@ -1,11 +1,58 @@
 """Constraint Satisfaction Problem framework for rostering"""
 from typing import List, Dict, Set, Tuple, Optional
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from enum import Enum
+from concurrent.futures import ThreadPoolExecutor
+import hashlib
 import logging
+import os
+import threading
+import numpy as np
 
 logger = logging.getLogger(__name__)
 
+# Domain bitmasks: bit v is set while value v is still allowed
+DOMAIN_ZERO = 0b01  # not assigned
+DOMAIN_ONE = 0b10  # assigned
+DOMAIN_FULL = DOMAIN_ZERO | DOMAIN_ONE
+
+# Values allowed by each domain bitmask, ascending; len() is the popcount
+DOMAIN_VALUES = ((), (0,), (1,), (0, 1))
+
+# Maximum memoized check results kept per constraint; keys are fixed-size
+# digests, so this bounds the cache at a few tens of KB whatever the board size
+EVAL_CACHE_SIZE = 256
+
+# Bytes of blake2b digest identifying an assignment in the memo
+EVAL_KEY_DIGEST_SIZE = 16
+
+# Assignments at least this large check hard constraints in parallel
+PARALLEL_CHECK_MIN_CELLS = 50_000
+
+# Threads for parallel constraint checks, shared by every CSP in the process
+# and created on first use
+_check_pool: Optional[ThreadPoolExecutor] = None
+_check_pool_lock = threading.Lock()
+
+
+def _check_executor() -> ThreadPoolExecutor:
+    """The process-wide constraint check pool"""
+    global _check_pool
+    with _check_pool_lock:
+        if _check_pool is None:
+            _check_pool = ThreadPoolExecutor(max_workers=os.cpu_count() or 1, thread_name_prefix="roster-check")
+        return _check_pool
+
+
+def _reset_check_pool():
+    """Forked children have none of the parent's threads, so start a fresh pool"""
+    global _check_pool, _check_pool_lock
+    _check_pool = None
+    _check_pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_check_pool)
+
 
 class ConstraintType(Enum):
     """Types of constraints"""
@@ -13,26 +60,104 @@ class ConstraintType(Enum):
     SOFT = "soft"  # Should be satisfied if possible
 
 
-@dataclass
+@dataclass(slots=True)
 class Constraint:
-    """Base constraint class"""
+    """
+    Base constraint class
+    
+    Assignments are dense int8 matrices of shape (len(staff), len(dates)),
+    indexed by the owning CSP's staff_idx / date_idx maps. During search an
+    optional boolean `assigned` mask marks decided cells; undecided cells
+    hold 0. A mask of None means the assignment is complete.
+    
+    Dict-shaped inputs (preferences, histories, specialties) are converted
+    in bind() into arrays aligned with those indices, so check/penalty only
+    touch NumPy arrays.
+    
+    Instances use __slots__; subclasses declare their own attributes in
+    __slots__ as well.
+    """
     name: str
     type: ConstraintType
     weight: float = 1.0  # For soft constraints
+    _eval_cache: Dict[Tuple[Tuple[int, ...], bytes], bool] = field(default_factory=dict, init=False, repr=False, compare=False)
+    staff_idx: Dict[str, int] = field(init=False, repr=False, compare=False)  # Set by bind()
+    date_idx: Dict[str, int] = field(init=False, repr=False, compare=False)  # Set by bind()
+    staff_names: List[str] = field(init=False, repr=False, compare=False)  # Matrix row -> staff, set by bind()
+    date_names: List[str] = field(init=False, repr=False, compare=False)  # Matrix column -> date, set by bind()
+    
+    # Whether check() reads the `assigned` mask (otherwise it is left out of the cache key)
+    uses_assigned_mask = False
+    
+    def bind(self, csp: 'RosterCSP'):
+        """Resolve staff/date names to matrix indices of the owning CSP"""
+        self.staff_idx = csp.staff_idx
+        self.date_idx = csp.date_idx
+        self.staff_names = csp.staff
+        self.date_names = csp.dates
     
-    def check(self, assignment: Dict[Tuple[str, str], int]) -> bool:
+    def check(self, A: np.ndarray, assigned: Optional[np.ndarray] = None) -> bool:
         """Check if constraint is satisfied"""
         raise NotImplementedError
     
-    def penalty(self, assignment: Dict[Tuple[str, str], int]) -> float:
+    def evaluate(self, A: np.ndarray, assigned: Optional[np.ndarray] = None) -> bool:
+        """Memoized check() keyed on a digest of the assignment"""
+        # Hashing the buffer in place keeps keys small without copying the board
+        digest = hashlib.blake2b(_buffer(A), digest_size=EVAL_KEY_DIGEST_SIZE)
+        if self.uses_assigned_mask and assigned is not None:
+            digest.update(_buffer(assigned))
+        key = (A.shape, digest.digest())
+        
+        result = self._eval_cache.get(key)
+        if result is None:
+            if len(self._eval_cache) >= EVAL_CACHE_SIZE:
+                self._eval_cache.clear()
+            result = self.check(A, assigned)
+            self._eval_cache[key] = result
+        return result
+    
+    def penalty(self, A: np.ndarray) -> float:
         """Calculate penalty for soft constraints"""
-        return 0.0 if self.check(assignment) else self.weight
+        return 0.0 if self.check(A) else self.weight
     
-    def get_violated_assignments(self, assignment: Dict[Tuple[str, str], int]) -> List[Tuple[str, str]]:
+    def get_violated_assignments(self, A: np.ndarray) -> List[Tuple[str, str]]:
         """Get list of assignments that violate this constraint"""
         return []
 
 
+def _buffer(array: np.ndarray):
+    """The array's bytes for hashing, without a copy when it is contiguous"""
+    return array.data if array.flags.c_contiguous else array.tobytes()
+
+
+class Snapshot:
+    """
+    Context manager for trial edits to a CSP's working assignment
+    Each set() records the cell's prior value and assigned flag; everything
+    is restored in reverse order on exit. Only A and the assigned mask are
+    touched, so the unassigned-variable set can be iterated meanwhile.
+    """
+    
+    def __init__(self, csp: 'RosterCSP'):
+        self.csp = csp
+        self.trail: List[Tuple[Tuple[int, int], int, bool]] = []
+    
+    def __enter__(self) -> 'Snapshot':
+        return self
+    
+    def set(self, var: Tuple[int, int], value: int):
+        """Tentatively assign value to var"""
+        self.trail.append((var, self.csp.A[var], self.csp.assigned[var]))
+        self.csp.A[var] = value
+        self.csp.assigned[var] = True
+    
+    def __exit__(self, *exc_info):
+        for var, value, assigned in reversed(self.trail):
+            self.csp.A[var] = value
+            self.csp.assigned[var] = assigned
+        self.trail.clear()
+
+
 class RosterCSP:
     """Constraint Satisfaction Problem for roster generation"""
     
@@ -41,156 +166,246 @@ class RosterCSP:
         self.dates = dates
         self.specialties = specialties
         self.constraints: List[Constraint] = []
-        self.domains: Dict[Tuple[str, str], Set[int]] = {}  # (staff, date) -> {0, 1}
+        self._hard: List[Constraint] = []
+        self._soft: List[Constraint] = []
+        
+        # Matrix indices for staff (rows) and dates (columns)
+        self.staff_idx: Dict[str, int] = {s: i for i, s in enumerate(staff)}
+        self.date_idx: Dict[str, int] = {d: i for i, d in enumerate(dates)}
+        
+        # Dates parsed once for all date-based constraints (Monday=0 ... Sunday=6;
+        # the datetime64 epoch 1970-01-01 was a Thursday)
+        self.dates_np = np.array(dates, dtype='datetime64[D]')
+        self.weekday = ((self.dates_np.view('int64') + 3) % 7).astype(np.int8)
+        
+        # Working assignment used during search; unassigned cells hold 0
+        self.A = np.zeros((len(staff), len(dates)), dtype=np.int8)
+        self.assigned = np.zeros((len(staff), len(dates)), dtype=bool)
+        self._unassigned: Set[Tuple[int, int]] = self._all_variables()
         
         # Initialize all domains to {0, 1} (not assigned, assigned)
-        for s in staff:
-            for d in dates:
-                self.domains[(s, d)] = {0, 1}
+        self.dom = np.full((len(staff), len(dates)), DOMAIN_FULL, dtype=np.uint8)
+        
+        # Trail of (var, prior bits) domain changes, undone by restore_domains
+        self._trail: List[Tuple[Tuple[int, int], int]] = []
         
         logger.info(f"Initialized CSP with {len(staff)} staff and {len(dates)} dates")
     
     def add_constraint(self, constraint: Constraint):
         """Add a constraint to the problem"""
+        constraint.bind(self)
         self.constraints.append(constraint)
+        (self._hard if constraint.type == ConstraintType.HARD else self._soft).append(constraint)
         logger.info(f"Added constraint: {constraint.name} ({constraint.type.value})")
     
     def initialize_domains(self, leave_schedule: Dict[str, List[str]]):
         """Initialize domains based on availability"""
         # leave_schedule: date -> [staff on leave]
         for date, staff_on_leave in leave_schedule.items():
+            d = self.date_idx.get(date)
+            if d is None:
+                continue
             for staff in staff_on_leave:
-                if (staff, date) in self.domains:
+                s = self.staff_idx.get(staff)
+                if s is not None:
                     # Staff on leave - domain is {0} only
-                    self.domains[(staff, date)] = {0}
+                    self.dom[s, d] &= DOMAIN_ZERO
                     logger.debug(f"{staff} marked unavailable on {date}")
         
         # Count available slots
-        available_count = sum(1 for domain in self.domains.values() if 1 in domain)
+        available_count = int(self.available_mask().sum())
         total_slots = len(self.staff) * len(self.dates)
         logger.info(f"Available slots: {available_count}/{total_slots} ({available_count/total_slots*100:.1f}%)")
     
+    def available_mask(self) -> np.ndarray:
+        """Boolean matrix of slots whose domain still allows assignment"""
+        return (self.dom & DOMAIN_ONE) != 0
+    
+    def domain_values(self, var: Tuple[int, int]) -> List[int]:
+        """Values still allowed for var, in ascending order"""
+        return list(DOMAIN_VALUES[self.dom[var]])
+    
+    def assignment_dict_to_array(self, assignment: Dict[Tuple[str, str], int]) -> np.ndarray:
+        """Convert a (staff, date) -> value mapping into an assignment matrix"""
+        A = np.zeros((len(self.staff), len(self.dates)), dtype=np.int8)
+        for (staff, date), value in assignment.items():
+            if value and staff in self.staff_idx and date in self.date_idx:
+                A[self.staff_idx[staff], self.date_idx[date]] = value
+        return A
+    
+    def array_to_assignment_dict(self, A: np.ndarray) -> Dict[Tuple[str, str], int]:
+        """Convert an assignment matrix back into a (staff, date) -> value mapping"""
+        rows = A.tolist()
+        return {
+            (staff, date): rows[s][d]
+            for s, staff in enumerate(self.staff)
+            for d, date in enumerate(self.dates)
+        }
+    
+    def _all_variables(self) -> Set[Tuple[int, int]]:
+        """Every (staff index, date index) variable of the problem"""
+        return {(s, d) for s in range(len(self.staff)) for d in range(len(self.dates))}
+    
+    def sync_unassigned(self):
+        """Rebuild the unassigned-variable set after A / assigned were edited in bulk"""
+        self._unassigned = {tuple(var) for var in np.argwhere(~self.assigned).tolist()}
+    
+    def clear_assignment(self):
+        """Reset the working assignment to empty"""
+        self.A.fill(0)
+        self.assigned.fill(False)
+        self._unassigned = self._all_variables()
+    
+    def assign(self, var: Tuple[int, int], value: int):
+        """Assign value to var (staff index, date index) in the working assignment"""
+        self.A[var] = value
+        self.assigned[var] = True
+        self._unassigned.discard(var)
+    
+    def unassign(self, var: Tuple[int, int]):
+        """Remove var from the working assignment"""
+        self.A[var] = 0
+        self.assigned[var] = False
+        self._unassigned.add(var)
+    
     def get_hard_constraints(self) -> List[Constraint]:
-        """Get all hard constraints"""
-        return [c for c in self.constraints if c.type == ConstraintType.HARD]
+        """Get all hard constraints (partitioned in add_constraint)"""
+        return self._hard
     
     def get_soft_constraints(self) -> List[Constraint]:
-        """Get all soft constraints"""
-        return [c for c in self.constraints if c.type == ConstraintType.SOFT]
+        """Get all soft constraints (partitioned in add_constraint)"""
+        return self._soft
     
-    def is_consistent(self, assignment: Dict[Tuple[str, str], int]) -> bool:
+    def is_consistent(self, A: np.ndarray, assigned: Optional[np.ndarray] = None) -> bool:
         """Check if assignment satisfies all hard constraints"""
-        for constraint in self.get_hard_constraints():
-            if not constraint.check(assignment):
+        hard_constraints = self.get_hard_constraints()
+        workers = min(len(hard_constraints), os.cpu_count() or 1)
+        
+        if workers > 1 and A.size >= PARALLEL_CHECK_MIN_CELLS:
+            # Constraints share no state and NumPy/Numba kernels release the GIL;
+            # wait for every result so none still reads A when the caller mutates it
+            results = list(_check_executor().map(lambda c: c.evaluate(A, assigned), hard_constraints))
+        else:
+            results = (c.evaluate(A, assigned) for c in hard_constraints)
+        
+        for constraint, satisfied in zip(hard_constraints, results):
+            if not satisfied:
                 logger.debug(f"Hard constraint violated: {constraint.name}")
                 return False
         return True
     
-    def calculate_penalty(self, assignment: Dict[Tuple[str, str], int]) -> float:
+    def calculate_penalty(self, A: np.ndarray) -> float:
         """Calculate total penalty for soft constraints"""
         total_penalty = 0.0
         for constraint in self.get_soft_constraints():
-            penalty = constraint.penalty(assignment)
+            penalty = constraint.penalty(A)
             if penalty > 0:
                 logger.debug(f"Soft constraint {constraint.name} penalty: {penalty}")
             total_penalty += penalty
         return total_penalty
     
-    def get_unassigned_variables(self, assignment: Dict[Tuple[str, str], int]) -> List[Tuple[str, str]]:
-        """Get variables that haven't been assigned yet"""
-        unassigned = []
-        for staff in self.staff:
-            for date in self.dates:
-                if (staff, date) not in assignment:
-                    unassigned.append((staff, date))
-        return unassigned
-    
-    def is_complete(self, assignment: Dict[Tuple[str, str], int]) -> bool:
-        """Check if assignment is complete"""
-        return len(assignment) == len(self.staff) * len(self.dates)
-    
-    def get_consistent_values(self, var: Tuple[str, str], 
-                            assignment: Dict[Tuple[str, str], int]) -> List[int]:
+    def get_unassigned_variables(self) -> Set[Tuple[int, int]]:
+        """Get variables that haven't been assigned yet (maintained by assign/unassign)"""
+        return self._unassigned
+    
+    def is_complete(self) -> bool:
+        """Check if the working assignment is complete"""
+        return not self._unassigned
+    
+    def get_consistent_values(self, var: Tuple[int, int]) -> List[int]:
         """Get values that maintain consistency when assigned to var"""
-        staff, date = var
         consistent_values = []
         
-        for value in self.domains[var]:
-            # Try assigning this value
-            test_assignment = assignment.copy()
-            test_assignment[var] = value
-            
-            # Check if it maintains consistency
-            if self.is_consistent(test_assignment):
-                consistent_values.append(value)
+        # Try each value in place on the working assignment; reverted on exit
+        with Snapshot(self) as snapshot:
+            for value in DOMAIN_VALUES[self.dom[var]]:
+                snapshot.set(var, value)
+                if self.is_consistent(self.A, self.assigned):
+                    consistent_values.append(value)
         
         return consistent_values
     
-    def inference(self, var: Tuple[str, str], value: int, 
-                  assignment: Dict[Tuple[str, str], int]) -> Optional[Dict[Tuple[str, str], Set[int]]]:
+    def inference(self, var: Tuple[int, int], value: int) -> Optional[np.ndarray]:
         """
         Perform constraint propagation inference
         Returns updated domains or None if inconsistency detected
         """
-        # Simple forward checking
-        new_domains = {k: v.copy() for k, v in self.domains.items()}
+        # Domain changes go on the trail instead of snapshotting self.dom;
+        # take trail_mark() beforehand and restore_domains(mark) on backtrack
+        self.reduce_domain(var, 1 << value)
         
-        # For now, just return the domains without modification
+        # For now, only var's own domain is narrowed
         # More sophisticated inference can be added later
-        return new_domains
+        if not self.dom[var]:
+            return None
+        return self.dom
     
-    def select_unassigned_variable(self, assignment: Dict[Tuple[str, str], int]) -> Optional[Tuple[str, str]]:
+    def trail_mark(self) -> int:
+        """Current trail position, to pass to restore_domains"""
+        return len(self._trail)
+    
+    def reduce_domain(self, var: Tuple[int, int], bits: int):
+        """Restrict var's domain to the given bits, recording the prior domain on the trail"""
+        prior = int(self.dom[var])
+        if prior & bits != prior:
+            self._trail.append((var, prior))
+            self.dom[var] = prior & bits
+    
+    def restore_domains(self, mark: int):
+        """Undo domain changes recorded since trail_mark() returned mark"""
+        while len(self._trail) > mark:
+            var, prior = self._trail.pop()
+            self.dom[var] = prior
+    
+    def select_unassigned_variable(self) -> Optional[Tuple[int, int]]:
         """
         Select next variable to assign using MRV heuristic
         (Minimum Remaining Values - choose variable with fewest legal values)
         """
-        unassigned = self.get_unassigned_variables(assignment)
+        unassigned = self.get_unassigned_variables()
         if not unassigned:
             return None
         
         # Calculate legal values for each unassigned variable
-        min_values = float('inf')
-        best_var = None
+        # (ties go to the lowest (staff, date) index for a deterministic search;
+        # scanning in index order makes that the first dead end found too)
+        best = None
         
-        for var in unassigned:
-            legal_values = self.get_consistent_values(var, assignment)
-            if len(legal_values) < min_values:
-                min_values = len(legal_values)
-                best_var = var
+        for var in sorted(unassigned):
+            key = (len(self.get_consistent_values(var)), var)
+            if best is None or key < best:
+                best = key
+                if key[0] == 0:
+                    # Dead end: the search fails at this node whichever
+                    # variable without legal values is returned
+                    break
         
-        return best_var
+        return best[1]
     
-    def order_domain_values(self, var: Tuple[str, str], 
-                           assignment: Dict[Tuple[str, str], int]) -> List[int]:
+    def order_domain_values(self, var: Tuple[int, int]) -> List[int]:
         """
         Order domain values using least constraining value heuristic
         Choose value that rules out the fewest choices for other variables
         """
-        values = list(self.domains[var])
+        values = DOMAIN_VALUES[self.dom[var]]
         
         # For now, prefer assigning (1) over not assigning (0)
         # More sophisticated ordering can be added
-        return sorted(values, reverse=True)
+        return list(values[::-1])
     
-    def get_statistics(self, assignment: Dict[Tuple[str, str], int]) -> Dict:
-        """Get statistics about the current assignment"""
+    def get_statistics(self, A: np.ndarray) -> Dict:
+        """Get statistics about the given assignment matrix"""
+        # Coverage per date (column sums) and workload per staff (row sums)
+        coverage = A.sum(axis=0, dtype=np.int32)
+        workload = A.sum(axis=1, dtype=np.int32)
+        
         stats = {
             'total_slots': len(self.staff) * len(self.dates),
-            'assigned_slots': sum(1 for v in assignment.values() if v == 1),
-            'coverage_by_date': {},
-            'workload_by_staff': {},
-            'hard_constraints_satisfied': self.is_consistent(assignment),
-            'soft_constraint_penalty': self.calculate_penalty(assignment)
+            'assigned_slots': int(coverage.sum()),
+            'coverage_by_date': dict(zip(self.dates, coverage.tolist())),
+            'workload_by_staff': dict(zip(self.staff, workload.tolist())),
+            'hard_constraints_satisfied': self.is_consistent(A),
+            'soft_constraint_penalty': self.calculate_penalty(A)
         }
         
-        # Calculate coverage by date
-        for date in self.dates:
-            assigned = sum(1 for s in self.staff if assignment.get((s, date), 0) == 1)
-            stats['coverage_by_date'][date] = assigned
-        
-        # Calculate workload by staff
-        for staff in self.staff:
-            workdays = sum(1 for d in self.dates if assignment.get((staff, d), 0) == 1)
-            stats['workload_by_staff'][staff] = workdays
-        
         return stats
\ No newline at end of file
@@ -0,0 +1,250 @@
+"""Compiled kernels for hot constraint checks"""
+import logging
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+# Try importing numba
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+    logger.info("Numba is available for compiled constraint kernels")
+except ImportError:
+    NUMBA_AVAILABLE = False
+    logger.info("Numba not available, using NumPy constraint kernels. Install with: pip install numba")
+
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, boundscheck=False, nogil=True)
+    def min_staff_satisfied(A, min_staff):
+        """Whether every date column has at least min_staff assigned, stopping at the first short date"""
+        n_staff, n_dates = A.shape
+        for d in range(n_dates):
+            count = 0
+            for s in range(n_staff):
+                count += A[s, d]
+            if count < min_staff:
+                return False
+        return True
+    
+    @njit(cache=True, boundscheck=False, nogil=True)
+    def first_consecutive_violation(A, max_days):
+        """Return the first staff row working more than max_days in a row, or -1"""
+        n_staff, n_dates = A.shape
+        for s in range(n_staff):
+            consecutive = 0
+            for d in range(n_dates):
+                if A[s, d] == 1:
+                    consecutive += 1
+                    if consecutive > max_days:
+                        return s
+                else:
+                    consecutive = 0
+        return -1
+    
+    @njit(cache=True, boundscheck=False, nogil=True)
+    def consecutive_violations(A, max_days):
+        """Per-staff flag: works more than max_days in a row"""
+        n_staff, n_dates = A.shape
+        violated = np.zeros(n_staff, dtype=np.bool_)
+        for s in range(n_staff):
+            consecutive = 0
+            for d in range(n_dates):
+                if A[s, d] == 1:
+                    consecutive += 1
+                    if consecutive > max_days:
+                        violated[s] = True
+                        break
+                else:
+                    consecutive = 0
+        return violated
+
+    @njit(cache=True, boundscheck=False, nogil=True)
+    def _search_consistent(A, assigned, min_staff, max_days, min_rest, spec_mat, spec_cols, spec_cap):
+        """Hard-constraint check used by backtrack_search; a negative limit disables that constraint"""
+        n_staff, n_dates = A.shape
+        
+        if min_staff >= 0:
+            # Undecided slots count as filled until they are decided
+            for d in range(n_dates):
+                count = 0
+                for s in range(n_staff):
+                    count += A[s, d] if assigned[s, d] else 1
+                if count < min_staff:
+                    return False
+        
+        if max_days >= 0 or min_rest >= 0:
+            for s in range(n_staff):
+                consecutive = 0
+                last = -1
+                for d in range(n_dates):
+                    if A[s, d] == 1:
+                        consecutive += 1
+                        if max_days >= 0 and consecutive > max_days:
+                            return False
+                        if min_rest >= 0 and last >= 0 and d - last - 1 < min_rest:
+                            return False
+                        last = d
+                    else:
+                        consecutive = 0
+        
+        if spec_cap >= 0:
+            n_spec = spec_mat.shape[0]
+            for d in range(n_dates):
+                if not spec_cols[d]:
+                    continue
+                covered = 0
+                available = 0
+                for k in range(n_spec):
+                    hit = False
+                    for s in range(n_staff):
+                        if spec_mat[k, s]:
+                            # Undecided staff can still cover the specialty
+                            if A[s, d] != 0 or not assigned[s, d]:
+                                hit = True
+                            available += 1
+                    if hit:
+                        covered += 1
+                if covered < min(spec_cap, available):
+                    return False
+        
+        return True
+    
+    @njit(cache=True, boundscheck=False, nogil=True)
+    def backtrack_search(A, assigned, dom, min_staff, max_days, min_rest, spec_mat, spec_cols, spec_cap):
+        """
+        Iterative MRV search with conflict-directed backjumping over
+        A/assigned, mirroring RosterSolver._backtrack
+        dom holds the domain bitmasks (bit v set while value v is allowed).
+        Returns (solved, iterations); on success A holds the solution
+        """
+        n_staff, n_dates = A.shape
+        n_vars = n_staff * n_dates
+        stack_var = np.empty(n_vars + 1, dtype=np.int64)
+        stack_next = np.empty(n_vars + 1, dtype=np.int64)
+        
+        # Conflict set of each depth as the staff rows and date columns of the
+        # failed assignments: every hard constraint reads one row or column,
+        # so the culprits are the earlier decisions in those rows and columns
+        conflict_rows = np.zeros((n_vars + 1, n_staff), dtype=np.bool_)
+        conflict_cols = np.zeros((n_vars + 1, n_dates), dtype=np.bool_)
+        
+        n_unassigned = 0
+        for s in range(n_staff):
+            for d in range(n_dates):
+                if not assigned[s, d]:
+                    n_unassigned += 1
+        
+        iterations = 0
+        depth = 0
+        entering = True
+        while True:
+            failed = False
+            if entering:
+                iterations += 1
+                conflict_rows[depth] = False
+                conflict_cols[depth] = False
+                entering = False
+                if n_unassigned == 0:
+                    if _search_consistent(A, assigned, min_staff, max_days, min_rest, spec_mat, spec_cols, spec_cap):
+                        return True, iterations
+                    # Complete but inconsistent: every earlier decision is suspect
+                    conflict_rows[depth] = True
+                    failed = True
+                else:
+                    # MRV: fewest consistent values, ties to the lowest (staff, date);
+                    # stops at the first dead end, which fails the node either way
+                    best_var = -1
+                    best_count = 3
+                    for s in range(n_staff):
+                        if best_count == 0:
+                            break
+                        for d in range(n_dates):
+                            if assigned[s, d]:
+                                continue
+                            count = 0
+                            assigned[s, d] = True
+                            for value in range(2):
+                                if dom[s, d] & (1 << value):
+                                    A[s, d] = value
+                                    if _search_consistent(A, assigned, min_staff, max_days, min_rest,
+                                                          spec_mat, spec_cols, spec_cap):
+                                        count += 1
+                            A[s, d] = 0
+                            assigned[s, d] = False
+                            if count < best_count:
+                                best_count = count
+                                best_var = s * n_dates + d
+                                if count == 0:
+                                    break
+                    
+                    stack_var[depth] = best_var
+                    stack_next[depth] = 0
+            
+            if not failed:
+                # Try the next value of the variable at this depth, 1 before 0
+                var = stack_var[depth]
+                s = var // n_dates
+                d = var % n_dates
+                descended = False
+                while stack_next[depth] < 2:
+                    value = 1 - stack_next[depth]
+                    stack_next[depth] += 1
+                    if not dom[s, d] & (1 << value):
+                        continue
+                    A[s, d] = value
+                    assigned[s, d] = True
+                    n_unassigned -= 1
+                    if _search_consistent(A, assigned, min_staff, max_days, min_rest, spec_mat, spec_cols, spec_cap):
+                        depth += 1
+                        entering = True
+                        descended = True
+                        break
+                    A[s, d] = 0
+                    assigned[s, d] = False
+                    n_unassigned += 1
+                    conflict_rows[depth, s] = True
+                    conflict_cols[depth, d] = True
+                
+                if descended:
+                    continue
+                
+            # Values exhausted: undo decisions up to the deepest one in the
+            # conflict set, hand it the set and resume it
+            failed_depth = depth
+            while True:
+                depth -= 1
+                if depth < 0:
+                    return False, iterations
+                var = stack_var[depth]
+                s = var // n_dates
+                d = var % n_dates
+                A[s, d] = 0
+                assigned[s, d] = False
+                n_unassigned += 1
+                if conflict_rows[failed_depth, s] or conflict_cols[failed_depth, d]:
+                    break
+            conflict_rows[depth] |= conflict_rows[failed_depth]
+            conflict_cols[depth] |= conflict_cols[failed_depth]
+
+else:
+    def min_staff_satisfied(A, min_staff):
+        """Whether every date column has at least min_staff assigned"""
+        return bool((A.sum(axis=0) >= min_staff).all())
+    
+    def consecutive_violations(A, max_days):
+        """Per-staff flag: works more than max_days in a row"""
+        window = max_days + 1
+        if A.shape[1] < window:
+            return np.zeros(A.shape[0], dtype=bool)
+        
+        # Sliding window sums from a zero-padded cumulative sum
+        csum = np.zeros((A.shape[0], A.shape[1] + 1), dtype=np.int32)
+        np.cumsum(A, axis=1, out=csum[:, 1:])
+        window_sums = csum[:, window:] - csum[:, :-window]
+        return (window_sums >= window).any(axis=1)
+    
+    def first_consecutive_violation(A, max_days):
+        """Return the first staff row working more than max_days in a row, or -1"""
+        violated = np.flatnonzero(consecutive_violations(A, max_days))
+        return int(violated[0]) if violated.size else -1
\ No newline at end of file
@@ -1,9 +1,16 @@
 """Solver implementation for roster CSP"""
-from typing import Dict, Optional, List, Tuple
+from typing import Dict, Optional, List, Set, Tuple
 import pulp
 import logging
+import multiprocessing
+import os
+import numpy as np
 from datetime import datetime
-from .csp import RosterCSP, ConstraintType
+from .csp import RosterCSP, ConstraintType, DOMAIN_ZERO, DOMAIN_ONE
+from .kernels import NUMBA_AVAILABLE, first_consecutive_violation
+
+if NUMBA_AVAILABLE:
+    from .kernels import backtrack_search
 from .constraints import (
     MinimumStaffConstraint, MaxConsecutiveDaysConstraint,
     MinRestPeriodConstraint, SpecialtyCoverageConstraint
@@ -11,37 +18,79 @@ from .constraints import (
 
 logger = logging.getLogger(__name__)
 
+# Hard constraints that only read one staff row or one date column at a time,
+# so a failed assignment is caused by decisions in that cell's row or column
+ROW_COLUMN_CONSTRAINTS = (
+    MinimumStaffConstraint, MaxConsecutiveDaysConstraint,
+    MinRestPeriodConstraint, SpecialtyCoverageConstraint
+)
+
+# In-process HiGHS backend for PuLP (optional)
+try:
+    import highspy  # noqa: F401
+    HIGHS_AVAILABLE = hasattr(pulp, 'HiGHS')
+except ImportError:
+    HIGHS_AVAILABLE = False
+
+if not HIGHS_AVAILABLE:
+    logger.info("highspy not available, integer programs use the CBC subprocess. Install with: pip install highspy")
+
 
 class RosterSolver:
     """Solver for roster generation using various algorithms"""
     
-    def __init__(self, csp: RosterCSP):
+    def __init__(self, csp: RosterCSP, threads: Optional[int] = None,
+                 time_limit: Optional[float] = None, gap_rel: Optional[float] = None):
         self.csp = csp
         self.solution = None
         self.solve_time = None
         self.iterations = 0
+        
+        # Integer program settings: solver threads, time limit (seconds) and
+        # relative optimality gap at which branch-and-bound may stop
+        self.threads = threads or os.cpu_count() or 1
+        self.time_limit = time_limit
+        self.gap_rel = gap_rel
+        
+        # Constraints bucketed by class, in the order they were added
+        self._constraints_by_type: Dict[type, List] = {}
+        for constraint in csp.constraints:
+            self._constraints_by_type.setdefault(type(constraint), []).append(constraint)
     
-    def solve_with_pulp(self) -> Optional[Dict[Tuple[str, str], int]]:
-        """Solve using integer programming with PuLP"""
+    def solve_with_pulp(self, solver: str = 'cbc') -> Optional[Dict[Tuple[str, str], int]]:
+        """
+        Solve using integer programming with PuLP
+        solver: 'cbc' writes the model out for a CBC subprocess, 'highs'
+        solves in-process through highspy (falls back to CBC if unavailable)
+        """
         logger.info("Starting PuLP solver")
         start_time = datetime.now()
         
+        if not self._enforce_arc_consistency():
+            logger.warning("Arc consistency emptied a domain; no roster exists")
+            return None
+        
         try:
             # Create problem
             prob = pulp.LpProblem("Healthcare_Roster", pulp.LpMinimize)
             
-            # Decision variables
+            # Greedy roster as a MIP start, giving the solver an incumbent up front
+            start = self._greedy_matrix()
+            start_workloads = start.sum(axis=1)
+            start_mean = float(start_workloads.mean()) if start_workloads.size else 0.0
+            
+            # Decision variables, only for slots where staff are available,
+            # with each staff member's (variable, coefficient) terms
             x = {}
-            for staff in self.csp.staff:
-                for date in self.csp.dates:
-                    if 1 in self.csp.domains.get((staff, date), {0}):
-                        x[(staff, date)] = pulp.LpVariable(
-                            f"assign_{staff}_{date}", 
-                            cat='Binary'
-                        )
-                    else:
-                        # Staff not available
-                        x[(staff, date)] = 0
+            staff_terms = {staff: [] for staff in self.csp.staff}
+            for s, d in np.argwhere(self.csp.available_mask()).tolist():
+                staff, date = self.csp.staff[s], self.csp.dates[d]
+                x[(staff, date)] = pulp.LpVariable(
+                    f"assign_{staff}_{date}", 
+                    cat='Binary'
+                )
+                x[(staff, date)].setInitialValue(int(start[s, d]))
+                staff_terms[staff].append((x[(staff, date)], 1))
             
             # Objective function (minimize soft constraint penalties)
             # For now, simple objective to minimize total assignments (will enhance later)
@@ -55,21 +104,27 @@ class RosterSolver:
                     lowBound=0, 
                     cat='Integer'
                 )
+                workload_vars[staff].setInitialValue(int(start_workloads[self.csp.staff_idx[staff]]))
                 # Workload equals sum of assignments
-                prob += workload_vars[staff] == pulp.lpSum(
-                    x[(staff, date)] for date in self.csp.dates 
-                    if (staff, date) in x and isinstance(x[(staff, date)], pulp.LpVariable)
-                )
+                prob += workload_vars[staff] == pulp.LpAffineExpression(staff_terms[staff])
             
             # Add variance penalty (simplified)
             mean_workload = pulp.LpVariable("mean_workload", lowBound=0)
-            prob += mean_workload * len(self.csp.staff) == pulp.lpSum(workload_vars.values())
+            mean_workload.setInitialValue(start_mean)
+            prob += mean_workload * len(self.csp.staff) == pulp.LpAffineExpression(
+                [(var, 1) for var in workload_vars.values()]
+            )
             
             # Minimize variance (simplified - just minimize max difference from mean)
             max_deviation = pulp.LpVariable("max_deviation", lowBound=0)
+            max_deviation.setInitialValue(float(np.abs(start_workloads - start_mean).max()) if start_workloads.size else 0.0)
             for staff in self.csp.staff:
-                prob += workload_vars[staff] - mean_workload <= max_deviation
-                prob += mean_workload - workload_vars[staff] <= max_deviation
+                prob += pulp.LpAffineExpression(
+                    [(workload_vars[staff], 1), (mean_workload, -1), (max_deviation, -1)]
+                ) <= 0
+                prob += pulp.LpAffineExpression(
+                    [(mean_workload, 1), (workload_vars[staff], -1), (max_deviation, -1)]
+                ) <= 0
             
             # Objective: minimize maximum deviation
             prob += max_deviation
@@ -80,20 +135,19 @@ class RosterSolver:
             
             # Solve
             logger.info("Solving integer program...")
-            prob.solve(pulp.PULP_CBC_CMD(msg=0))  # Suppress solver output
+            prob.solve(self._pulp_solver(solver))
             
             self.solve_time = (datetime.now() - start_time).total_seconds()
             
             if prob.status == pulp.LpStatusOptimal:
                 logger.info(f"Optimal solution found in {self.solve_time:.2f} seconds")
                 
-                # Extract solution
+                # Extract solution (unavailable slots are 0)
                 solution = {}
-                for (staff, date), var in x.items():
-                    if isinstance(var, pulp.LpVariable):
-                        solution[(staff, date)] = int(var.varValue or 0)
-                    else:
-                        solution[(staff, date)] = int(var)
+                for staff in self.csp.staff:
+                    for date in self.csp.dates:
+                        var = x.get((staff, date))
+                        solution[(staff, date)] = round(var.varValue or 0) if var is not None else 0
                 
                 self.solution = solution
                 return solution
@@ -105,20 +159,43 @@ class RosterSolver:
             logger.error(f"PuLP solver error: {str(e)}")
             return None
     
+    def _pulp_solver(self, solver: str):
+        """PuLP solver backend for solve_with_pulp (output suppressed)"""
+        if solver == 'highs':
+            if HIGHS_AVAILABLE:
+                # No model file or subprocess round-trip
+                return pulp.HiGHS(msg=False, threads=self.threads,
+                                  timeLimit=self.time_limit, gapRel=self.gap_rel)
+            logger.warning("highspy not available, falling back to CBC")
+        elif solver != 'cbc':
+            raise ValueError(f"Unknown PuLP solver: {solver}")
+        
+        # CBC builds without parallel support ignore -threads and run single-threaded
+        return pulp.PULP_CBC_CMD(msg=0, warmStart=True, threads=self.threads,
+                                 timeLimit=self.time_limit, gapRel=self.gap_rel)
+    
     def solve_with_backtracking(self) -> Optional[Dict[Tuple[str, str], int]]:
         """Solve using backtracking search"""
         logger.info("Starting backtracking solver")
         start_time = datetime.now()
         
         self.iterations = 0
-        assignment = {}
+        if not self._enforce_arc_consistency():
+            logger.warning("Arc consistency emptied a domain; no roster exists")
+            return None
+        self._start_assignment()
         
-        # Initialize with unavailable assignments
-        for var, domain in self.csp.domains.items():
-            if domain == {0}:
-                assignment[var] = 0
+        result = None
+        params = self._compiled_search_params() if NUMBA_AVAILABLE else None
+        if params is not None:
+            # Same search as _backtrack, compiled
+            solved, self.iterations = backtrack_search(self.csp.A, self.csp.assigned, self.csp.dom, *params)
+            self.csp.sync_unassigned()
+        else:
+            solved = self._backtrack()
         
-        result = self._backtrack(assignment)
+        if solved:
+            result = self.csp.array_to_assignment_dict(self.csp.A)
         
         self.solve_time = (datetime.now() - start_time).total_seconds()
         logger.info(f"Backtracking completed in {self.solve_time:.2f} seconds ({self.iterations} iterations)")
@@ -128,120 +205,271 @@ class RosterSolver:
         
         return result
     
-    def _backtrack(self, assignment: Dict[Tuple[str, str], int]) -> Optional[Dict[Tuple[str, str], int]]:
-        """Recursive backtracking search"""
+    def solve_parallel(self, workers: Optional[int] = None) -> Optional[Dict[Tuple[str, str], int]]:
+        """
+        Solve using backtracking split across worker processes
+        The top of the search tree is expanded here in MRV order; each
+        consistent partial assignment is searched in its own process and the
+        first solution found wins
+        """
+        workers = workers or os.cpu_count() or 1
+        if workers <= 1:
+            return self.solve_with_backtracking()
+        
+        logger.info(f"Starting parallel backtracking solver ({workers} workers)")
+        start_time = datetime.now()
+        
+        self.iterations = 0
+        self._start_assignment()
+        
+        # Expand the search tree breadth-first until there are enough subtrees
+        frontier: List[List[Tuple[Tuple[int, int], int]]] = [[]]
+        while len(frontier) < 2 * workers:
+            expanded = []
+            split = False
+            for prefix in frontier:
+                for var, value in prefix:
+                    self.csp.assign(var, value)
+                
+                var = self.csp.select_unassigned_variable()
+                if var is None:
+                    # Complete assignment: nothing left to split
+                    if self.csp.is_consistent(self.csp.A):
+                        expanded.append(prefix)
+                else:
+                    split = True
+                    for value in self.csp.order_domain_values(var):
+                        self.csp.assign(var, value)
+                        if self.csp.is_consistent(self.csp.A, self.csp.assigned):
+                            expanded.append(prefix + [(var, value)])
+                        self.csp.unassign(var)
+                
+                for var, _ in prefix:
+                    self.csp.unassign(var)
+            
+            frontier = expanded
+            if not split or not frontier:
+                break
+        
+        result = None
+        if frontier:
+            with multiprocessing.Pool(processes=min(workers, len(frontier))) as pool:
+                tasks = [(self.csp, prefix) for prefix in frontier]
+                for solution, iterations in pool.imap_unordered(_solve_subtree, tasks):
+                    self.iterations += iterations
+                    if solution is not None:
+                        result = solution
+                        break  # Leaving the pool terminates the remaining workers
+        
+        self.solve_time = (datetime.now() - start_time).total_seconds()
+        logger.info(f"Parallel backtracking completed in {self.solve_time:.2f} seconds "
+                    f"({len(frontier)} subtrees, {self.iterations} iterations)")
+        
+        if result:
+            self.solution = result
+        
+        return result
+    
+    def _enforce_arc_consistency(self) -> bool:
+        """
+        Prune domains to arc consistency (AC-3 fixpoint) over the pairwise
+        projections of the rest-period and consecutive-day constraints.
+        Two shifts of one staff member closer than `rest` days apart are
+        incompatible; max_days == 0 forbids every shift (node consistency).
+        Returns False if a domain is emptied
+        """
+        dom = self.csp.dom
+        rest = 0
+        for constraint in self.csp.get_hard_constraints():
+            if isinstance(constraint, MinRestPeriodConstraint):
+                rest = max(rest, constraint.min_rest_days)
+            elif isinstance(constraint, MaxConsecutiveDaysConstraint):
+                if constraint.max_days <= 0:
+                    dom &= DOMAIN_ZERO
+                elif constraint.max_days == 1:
+                    rest = max(rest, 1)
+        
+        # Revise every arc at once per round: value 1 loses its support when a
+        # neighbour within `rest` days can only be 1; repeat until no domain changes
+        while rest and not (dom == 0).any():
+            must_work = dom == DOMAIN_ONE
+            no_shift = np.zeros_like(must_work)
+            for k in range(1, min(rest, dom.shape[1] - 1) + 1):
+                no_shift[:, k:] |= must_work[:, :-k]
+                no_shift[:, :-k] |= must_work[:, k:]
+            
+            revised = no_shift & ((dom & DOMAIN_ONE) != 0)
+            if not revised.any():
+                break
+            dom[revised] &= DOMAIN_ZERO
+        
+        return not (dom == 0).any()
+    
+    def _compiled_search_params(self) -> Optional[tuple]:
+        """
+        Hard constraints flattened for backtrack_search, or None when a hard
+        constraint has no compiled equivalent
+        """
+        min_staff, max_days, min_rest = -1, -1, -1
+        spec_mat = np.zeros((0, len(self.csp.staff)), dtype=np.int32)
+        spec_cols = np.zeros(len(self.csp.dates), dtype=np.bool_)
+        spec_cap = -1
+        
+        for constraint in self.csp.get_hard_constraints():
+            if type(constraint) is MinimumStaffConstraint:
+                min_staff = max(min_staff, constraint.min_staff)
+            elif type(constraint) is MaxConsecutiveDaysConstraint:
+                max_days = constraint.max_days if max_days < 0 else min(max_days, constraint.max_days)
+            elif type(constraint) is MinRestPeriodConstraint:
+                min_rest = max(min_rest, constraint.min_rest_days)
+            elif type(constraint) is SpecialtyCoverageConstraint and spec_cap < 0:
+                spec_mat = constraint.spec_mat
+                spec_cols[constraint.date_cols] = True
+                spec_cap = min(constraint.min_specialties_per_day, len(constraint.unique_specialties))
+            else:
+                return None
+        
+        return min_staff, max_days, min_rest, spec_mat, spec_cols, spec_cap
+    
+    def _start_assignment(self):
+        """Reset the CSP's working assignment, fixing unavailable slots to 0"""
+        self.csp.clear_assignment()
+        for s, d in np.argwhere(self.csp.dom == DOMAIN_ZERO).tolist():
+            self.csp.assign((s, d), 0)
+    
+    def _backtrack(self) -> bool:
+        """
+        Backtracking search over the CSP's working assignment with
+        conflict-directed backjumping: a node whose values all fail returns
+        straight to the deepest decision that caused the failure
+        """
+        # Search depth at which each cell was decided; -1 while undecided or fixed beforehand
+        self._level = np.full(self.csp.A.shape, -1, dtype=np.int64)
+        self._row_column_conflicts = all(
+            type(constraint) in ROW_COLUMN_CONSTRAINTS for constraint in self.csp.get_hard_constraints()
+        )
+        return self._backjump(0) is None
+    
+    def _backjump(self, depth: int) -> Optional[Set[int]]:
+        """
+        Search below the decisions made so far
+        Returns None once the assignment is complete and consistent, otherwise
+        the conflict set: depths of the earlier decisions that caused the failure
+        """
         self.iterations += 1
         
         # Check if assignment is complete
-        if self.csp.is_complete(assignment):
-            if self.csp.is_consistent(assignment):
-                return assignment
-            return None
+        if self.csp.is_complete():
+            return None if self.csp.is_consistent(self.csp.A) else set(range(depth))
         
         # Select unassigned variable
-        var = self.csp.select_unassigned_variable(assignment)
-        if not var:
-            return None
+        var = self.csp.select_unassigned_variable()
+        if var is None:
+            return set(range(depth))
+        
+        conflicts = set()
         
         # Try each value in domain
-        for value in self.csp.order_domain_values(var, assignment):
-            if value in self.csp.domains[var]:
-                # Make assignment
-                assignment[var] = value
+        for value in self.csp.order_domain_values(var):
+            # Make assignment
+            self.csp.assign(var, value)
+            self._level[var] = depth
                 
-                # Check consistency
-                if self.csp.is_consistent(assignment):
-                    # Recursive call
-                    result = self._backtrack(assignment)
-                    if result:
-                        return result
+            # Check consistency
+            if self.csp.is_consistent(self.csp.A, self.csp.assigned):
+                # Recursive call
+                result = self._backjump(depth + 1)
+                if result is None:
+                    return None
+                if depth not in result:
+                    # No value here can fix the failure below: jump straight past
+                    self.csp.unassign(var)
+                    self._level[var] = -1
+                    return result
+                conflicts |= result
+            else:
+                conflicts |= self._culprits(var, depth)
                 
-                # Backtrack
-                del assignment[var]
+            # Backtrack
+            self.csp.unassign(var)
+            self._level[var] = -1
         
-        return None
+        conflicts.discard(depth)
+        return conflicts
+    
+    def _culprits(self, var: Tuple[int, int], depth: int) -> Set[int]:
+        """Depths of the decisions that may have made var's assignment inconsistent"""
+        if not self._row_column_conflicts:
+            return set(range(depth))
+        s, d = var
+        levels = np.concatenate((self._level[s], self._level[:, d]))
+        return set(levels[(levels >= 0) & (levels < depth)].tolist())
     
     def solve_greedy(self) -> Dict[Tuple[str, str], int]:
         """Greedy algorithm for quick solutions"""
         logger.info("Starting greedy solver")
         start_time = datetime.now()
         
-        assignment = {}
+        assignment = self.csp.array_to_assignment_dict(self._greedy_matrix())
         
-        # Initialize with unavailable assignments
-        for var, domain in self.csp.domains.items():
-            if domain == {0}:
-                assignment[var] = 0
-            else:
-                assignment[var] = 0  # Default to not assigned
+        self.solve_time = (datetime.now() - start_time).total_seconds()
+        logger.info(f"Greedy solution found in {self.solve_time:.2f} seconds")
+        
+        self.solution = assignment
+        return assignment
+    
+    def _greedy_matrix(self) -> np.ndarray:
+        """Greedy roster as an assignment matrix (no solver state is touched)"""
+        # Work on an assignment matrix; every slot starts unassigned
+        A = np.zeros((len(self.csp.staff), len(self.csp.dates)), dtype=np.int8)
+        available = self.csp.available_mask()
+        
+        # Get minimum required and consecutive-day limit (assuming we have the constraints)
+        min_staff_constraints = self._constraints_by_type.get(MinimumStaffConstraint)
+        min_required = min_staff_constraints[0].min_staff if min_staff_constraints else 2  # Default
+        max_consec_constraints = self._constraints_by_type.get(MaxConsecutiveDaysConstraint)
+        max_consecutive = max_consec_constraints[0].max_days if max_consec_constraints else 5  # Default
+        
+        # Ties in workload go to the alphabetically first staff member
+        name_rank = np.argsort(np.argsort(np.array(self.csp.staff, dtype=object), kind='stable'), kind='stable')
+        
+        # Shifts per staff member so far, kept up to date as slots are filled
+        workloads = np.zeros(len(self.csp.staff), dtype=np.int32)
         
         # Sort dates to process in order
         for date in self.csp.dates:
-            # Count current assignments for this date
-            current_count = sum(
-                1 for staff in self.csp.staff 
-                if assignment.get((staff, date), 0) == 1
-            )
-            
-            # Get minimum required (assuming we have MinimumStaffConstraint)
-            min_required = 2  # Default
-            for constraint in self.csp.constraints:
-                if isinstance(constraint, MinimumStaffConstraint):
-                    min_required = constraint.min_staff
-                    break
+            d = self.csp.date_idx[date]
             
-            # Get available staff sorted by current workload
-            staff_workloads = []
-            for staff in self.csp.staff:
-                if 1 in self.csp.domains.get((staff, date), {0}):
-                    workload = sum(
-                        1 for d in self.csp.dates 
-                        if assignment.get((staff, d), 0) == 1
-                    )
-                    staff_workloads.append((workload, staff))
+            # Count current assignments for this date
+            current_count = int(A[:, d].sum())
             
-            # Sort by workload (ascending)
-            staff_workloads.sort()
+            # Get available staff sorted by current workload (ascending)
+            candidates = np.flatnonzero(available[:, d])
+            order = candidates[np.lexsort((name_rank[candidates], workloads[candidates]))]
             
             # Assign staff up to minimum required
             assigned = 0
-            for _, staff in staff_workloads:
+            for s in order.tolist():
                 if current_count + assigned >= min_required:
                     break
                 
                 # Check if assignment would violate constraints
-                assignment[(staff, date)] = 1
-                if self._check_staff_constraints(assignment, staff):
+                A[s, d] = 1
+                if self._check_staff_constraints(A, s, d, max_consecutive):
                     assigned += 1
+                    workloads[s] += 1
                 else:
-                    assignment[(staff, date)] = 0
+                    A[s, d] = 0
         
-        self.solve_time = (datetime.now() - start_time).total_seconds()
-        logger.info(f"Greedy solution found in {self.solve_time:.2f} seconds")
-        
-        self.solution = assignment
-        return assignment
+        return A
     
-    def _check_staff_constraints(self, assignment: Dict[Tuple[str, str], int], staff: str) -> bool:
-        """Check if staff assignment violates personal constraints"""
-        # Check consecutive days
-        consecutive = 0
-        max_consecutive = 5  # Default
-        
-        for constraint in self.csp.constraints:
-            if isinstance(constraint, MaxConsecutiveDaysConstraint):
-                max_consecutive = constraint.max_days
-                break
-        
-        for date in self.csp.dates:
-            if assignment.get((staff, date), 0) == 1:
-                consecutive += 1
-                if consecutive > max_consecutive:
-                    return False
-            else:
-                consecutive = 0
-        
-        return True
+    def _check_staff_constraints(self, A: np.ndarray, s: int, d: int, max_consecutive: int) -> bool:
+        """Check if the new assignment A[s, d] violates staff s's personal constraints"""
+        # Check consecutive days; the row was valid before, so only a run
+        # through d can be too long, and it lies within max_consecutive of d
+        reach = max(max_consecutive, 0)
+        window = A[s:s + 1, max(0, d - reach):d + reach + 1]
+        return first_consecutive_violation(window, max_consecutive) < 0
     
     def _add_hard_constraint_to_model(self, prob, x, constraint):
         """Add hard constraint to PuLP model"""
@@ -250,20 +478,18 @@ class RosterSolver:
             for date in self.csp.dates:
                 staff_vars = [
                     x[(staff, date)] for staff in self.csp.staff
-                    if (staff, date) in x and isinstance(x[(staff, date)], pulp.LpVariable)
+                    if (staff, date) in x
                 ]
                 if staff_vars:
                     prob += pulp.lpSum(staff_vars) >= constraint.min_staff, f"MinStaff_{date}"
         
         elif isinstance(constraint, MaxConsecutiveDaysConstraint):
-            # Maximum consecutive days
+            # Maximum consecutive days, over each staff member's variables laid out by date index
+            window = constraint.max_days + 1
             for staff in self.csp.staff:
-                for start_idx in range(len(self.csp.dates) - constraint.max_days):
-                    consecutive_vars = []
-                    for i in range(constraint.max_days + 1):
-                        date = self.csp.dates[start_idx + i]
-                        if (staff, date) in x and isinstance(x[(staff, date)], pulp.LpVariable):
-                            consecutive_vars.append(x[(staff, date)])
+                row = [x.get((staff, date)) for date in self.csp.dates]
+                for start_idx in range(len(row) - constraint.max_days):
+                    consecutive_vars = [var for var in row[start_idx:start_idx + window] if var is not None]
                     
                     if consecutive_vars:
                         prob += pulp.lpSum(consecutive_vars) <= constraint.max_days, \
@@ -275,7 +501,7 @@ class RosterSolver:
                 for specialty, staff_list in constraint.staff_by_specialty.items():
                     specialty_vars = [
                         x[(staff, date)] for staff in staff_list
-                        if (staff, date) in x and isinstance(x[(staff, date)], pulp.LpVariable)
+                        if (staff, date) in x
                     ]
                     if specialty_vars:
                         # At least one from each specialty (soft constraint for now)
@@ -286,7 +512,7 @@ class RosterSolver:
         if not self.solution:
             return {}
         
-        stats = self.csp.get_statistics(self.solution)
+        stats = self.csp.get_statistics(self.csp.assignment_dict_to_array(self.solution))
         stats['solve_time'] = self.solve_time
         stats['iterations'] = self.iterations
         stats['algorithm'] = 'pulp' if 'Lp' in str(type(self.solution)) else 'backtracking'
@@ -299,18 +525,44 @@ class RosterSolver:
             return False, ["No solution found"]
         
         violations = []
+        is_valid = True
+        A = self.csp.assignment_dict_to_array(self.solution)
         
         # Check hard constraints
         for constraint in self.csp.get_hard_constraints():
-            if not constraint.check(self.solution):
+            if not constraint.check(A):
+                is_valid = False
                 violations.append(f"Hard constraint violated: {constraint.name}")
         
         # Report soft constraint penalties
         for constraint in self.csp.get_soft_constraints():
-            penalty = constraint.penalty(self.solution)
+            penalty = constraint.penalty(A)
             if penalty > 0:
                 violations.append(f"Soft constraint penalty: {constraint.name} = {penalty:.2f}")
         
-        is_valid = all(not v.startswith("Hard constraint") for v in violations)
+        return is_valid, violations
         
-        return is_valid, violations
\ No newline at end of file
+    def is_valid(self) -> bool:
+        """Check the solution against the hard constraints, stopping at the first violation"""
+        if not self.solution:
+            return False
+        
+        A = self.csp.assignment_dict_to_array(self.solution)
+        return all(constraint.check(A) for constraint in self.csp.get_hard_constraints())
+    
+    def get_violations(self) -> List[str]:
+        """Full list of hard violations and soft penalties for the solution"""
+        return self.validate_solution()[1]
+
+
+def _solve_subtree(task) -> Tuple[Optional[Dict[Tuple[str, str], int]], int]:
+    """Worker for RosterSolver.solve_parallel: backtrack below a fixed partial assignment"""
+    csp, prefix = task
+    solver = RosterSolver(csp)
+    solver._start_assignment()
+    for var, value in prefix:
+        csp.assign(var, value)
+    
+    if solver._backtrack():
+        return csp.array_to_assignment_dict(csp.A), solver.iterations
+    return None, solver.iterations
\ No newline at end of file
@@ -7,6 +7,9 @@ from flask_login import current_user
 from app import db
 from app.models.audit import AuditLog, SecurityEvent
 
+# View kwargs safe to copy into audit details
+AUDIT_SAFE_KWARGS = frozenset(['filename', 'profile_id', 'date', 'staff_name'])
+
 
 def audit_log(action, resource_type=None, get_resource_id=None):
     """
@@ -18,15 +21,17 @@ def audit_log(action, resource_type=None, get_resource_id=None):
         get_resource_id: Function to extract resource ID from kwargs
     """
     def decorator(f):
+        function_name = f.__name__
+        
         @wraps(f)
         def decorated_function(*args, **kwargs):
             # Record start time
             start_time = datetime.utcnow()
             
-            # Initialize audit details
+            # Audit details with the relevant kwargs (excluding sensitive data)
             details = {
-                'function': f.__name__,
-                'args': {}
+                'function': function_name,
+                'args': {key: kwargs[key] for key in kwargs.keys() & AUDIT_SAFE_KWARGS}
             }
             
             # Extract resource ID if function provided
@@ -38,12 +43,6 @@ def audit_log(action, resource_type=None, get_resource_id=None):
             elif 'roster_id' in kwargs:
                 resource_id = kwargs['roster_id']
             
-            # Add relevant kwargs to details (excluding sensitive data)
-            safe_kwargs = ['filename', 'profile_id', 'date', 'staff_name']
-            for key in safe_kwargs:
-                if key in kwargs:
-                    details['args'][key] = kwargs[key]
-            
             # Execute the function
             error_occurred = False
             error_message = None
@@ -58,30 +57,27 @@ def audit_log(action, resource_type=None, get_resource_id=None):
                 # Calculate duration
                 duration_ms = int((datetime.utcnow() - start_time).total_seconds() * 1000)
                 
-                # Create audit log entry
+                # Queue audit log entry; written in one batch when the request ends
                 try:
-                    entry = AuditLog(
-                        action=action,
-                        user_id=current_user.id if current_user.is_authenticated else None,
-                        resource_type=resource_type,
-                        resource_id=resource_id,
-                        ip_address=request.remote_addr,
-                        user_agent=request.headers.get('User-Agent', '')[:255],
-                        request_method=request.method,
-                        request_path=request.path,
-                        timestamp=start_time,
-                        duration_ms=duration_ms,
-                        details=details
-                    )
-                    
-                    if error_occurred:
-                        entry.error_message = error_message
-                        entry.response_status = 500
-                    elif hasattr(g, 'audit_response_status'):
-                        entry.response_status = g.audit_response_status
+                    g.setdefault('_audit_queue', []).append({
+                        'action': action,
+                        'user_id': current_user.id if current_user.is_authenticated else None,
+                        'resource_type': resource_type,
+                        'resource_id': resource_id,
+                        'ip_address': request.remote_addr,
+                        'user_agent': request.headers.get('User-Agent', '')[:255],
+                        'request_method': request.method,
+                        'request_path': request.path,
+                        'timestamp': start_time,
+                        'duration_ms': duration_ms,
+                        'details': details,
+                        'error_message': error_message,
+                        'response_status': 500 if error_occurred else None
+                    })
                     
-                    db.session.add(entry)
-                    db.session.commit()
+                    # Without the request hooks nothing would drain the queue
+                    if 'audit_logging' not in current_app.extensions:
+                        flush_audit_queue()
                 except Exception as audit_error:
                     # Log audit failure but don't break the application
                     current_app.logger.error(f"Audit logging failed: {audit_error}")
@@ -90,6 +86,25 @@ def audit_log(action, resource_type=None, get_resource_id=None):
     return decorator
 
 
+def flush_audit_queue(response_status=None):
+    """Write the request's queued audit entries with a single commit"""
+    queue = g.pop('_audit_queue', None)
+    if not queue:
+        return
+    
+    try:
+        if response_status is not None:
+            for entry in queue:
+                if entry['response_status'] is None:
+                    entry['response_status'] = response_status
+        
+        db.session.bulk_insert_mappings(AuditLog, queue)
+        db.session.commit()
+    except Exception as e:
+        db.session.rollback()
+        current_app.logger.error(f"Audit logging failed: {e}")
+
+
 def log_security_event(event_type, severity='warning', description=None, details=None):
     """Log a security-related event"""
     try:
@@ -121,6 +136,7 @@ def alert_security_team(event):
 
 def setup_audit_logging(app):
     """Setup application-wide audit logging"""
+    app.extensions['audit_logging'] = True
     
     @app.before_request
     def before_request_audit():
@@ -142,8 +158,10 @@ def setup_audit_logging(app):
         # Store response status for audit decorator
         g.audit_response_status = response.status_code
         
+        from app.security.middleware import request_kind
+        
         # Log static file access for PHI-containing files
-        if request.path.startswith('/static/') and any(
+        if request_kind() == 'static' and any(
             ext in request.path for ext in ['.pdf', '.xlsx', '.csv']
         ):
             AuditLog.log(
@@ -154,8 +172,20 @@ def setup_audit_logging(app):
                 response=response
             )
         
+        # Write entries queued by the audit decorator
+        flush_audit_queue(response.status_code)
+        
         return response
     
+    @app.teardown_request
+    def teardown_request_audit(exc):
+        """Write audit entries left queued when the request failed before after_request"""
+        if g.get('_audit_queue'):
+            if exc is not None:
+                # Don't commit the failed request's own changes with the audit entries
+                db.session.rollback()
+            flush_audit_queue(500 if exc is not None else None)
+    
     @app.errorhandler(403)
     def forbidden_audit(error):
         """Log forbidden access attempts"""
@@ -173,16 +203,32 @@ def setup_audit_logging(app):
 
 
 class AuditReportGenerator:
-    """Generate audit reports for compliance"""
+    """
+    Generate audit reports for compliance
+    
+    Counts are computed in SQL. A report's 'logs' is a list, as before,
+    unless stream=True is passed: then it is a one-shot iterator over the
+    matching rows, fetched in batches, so the report never holds every row
+    in memory. Consume a streamed report once, inside the app context,
+    e.g. through iter_json
+    """
+    
+    # Columns a report includes for each log, loaded without building ORM objects
+    _LOG_COLUMNS = (
+        AuditLog.id, AuditLog.timestamp, AuditLog.action, AuditLog.user_id,
+        AuditLog.resource_type, AuditLog.resource_id, AuditLog.ip_address,
+        AuditLog.duration_ms, AuditLog.details
+    )
     
     @staticmethod
-    def generate_user_activity_report(user_id, start_date, end_date):
+    def generate_user_activity_report(user_id, start_date, end_date, stream=False):
         """Generate activity report for a specific user"""
-        logs = AuditLog.query.filter(
+        criteria = (
             AuditLog.user_id == user_id,
             AuditLog.timestamp >= start_date,
             AuditLog.timestamp <= end_date
-        ).order_by(AuditLog.timestamp.desc()).all()
+        )
+        actions_by_type = AuditReportGenerator._count_by(AuditLog.action, criteria)
         
         return {
             'user_id': user_id,
@@ -190,13 +236,13 @@ class AuditReportGenerator:
                 'start': start_date.isoformat(),
                 'end': end_date.isoformat()
             },
-            'total_actions': len(logs),
-            'actions_by_type': AuditReportGenerator._group_by_action(logs),
-            'logs': [AuditReportGenerator._serialize_log(log) for log in logs]
+            'total_actions': sum(actions_by_type.values()),
+            'actions_by_type': actions_by_type,
+            'logs': AuditReportGenerator._logs(criteria, stream)
         }
     
     @staticmethod
-    def generate_phi_access_report(start_date, end_date):
+    def generate_phi_access_report(start_date, end_date, stream=False):
         """Generate report of all PHI access"""
         phi_actions = [
             AuditLog.ACTION_ROSTER_VIEW,
@@ -205,55 +251,60 @@ class AuditReportGenerator:
             'static_file_access'
         ]
         
-        logs = AuditLog.query.filter(
+        criteria = (
             AuditLog.action.in_(phi_actions),
             AuditLog.timestamp >= start_date,
             AuditLog.timestamp <= end_date
-        ).order_by(AuditLog.timestamp.desc()).all()
+        )
+        by_user = AuditReportGenerator._count_by(AuditLog.user_id, criteria)
         
         return {
             'period': {
                 'start': start_date.isoformat(),
                 'end': end_date.isoformat()
             },
-            'total_accesses': len(logs),
-            'unique_users': len(set(log.user_id for log in logs if log.user_id)),
-            'accesses_by_user': AuditReportGenerator._group_by_user(logs),
-            'logs': [AuditReportGenerator._serialize_log(log) for log in logs]
+            'total_accesses': sum(by_user.values()),
+            'unique_users': sum(1 for user_id in by_user if user_id),
+            'accesses_by_user': {user_id or 'anonymous': count for user_id, count in by_user.items()},
+            'logs': AuditReportGenerator._logs(criteria, stream)
         }
     
     @staticmethod
-    def _group_by_action(logs):
-        """Group logs by action type"""
-        grouped = {}
-        for log in logs:
-            if log.action not in grouped:
-                grouped[log.action] = 0
-            grouped[log.action] += 1
-        return grouped
+    def iter_json(report):
+        """
+        Encode a report as chunks of JSON text, streaming its logs
+        
+        Suitable for Response(stream_with_context(...), mimetype='application/json')
+        """
+        summary = {key: value for key, value in report.items() if key != 'logs'}
+        yield json.dumps(summary)[:-1] + ', "logs": ['
+        separator = ''
+        for log in report['logs']:
+            yield separator + json.dumps(log)
+            separator = ', '
+        yield ']}'
     
     @staticmethod
-    def _group_by_user(logs):
-        """Group logs by user"""
-        grouped = {}
-        for log in logs:
-            user_id = log.user_id or 'anonymous'
-            if user_id not in grouped:
-                grouped[user_id] = 0
-            grouped[user_id] += 1
-        return grouped
+    def _count_by(column, criteria):
+        """Count matching logs per value of column, in SQL"""
+        return dict(
+            db.session.query(column, db.func.count()).filter(*criteria).group_by(column)
+        )
     
     @staticmethod
-    def _serialize_log(log):
-        """Serialize audit log for report"""
-        return {
-            'id': log.id,
-            'timestamp': log.timestamp.isoformat(),
-            'action': log.action,
-            'user_id': log.user_id,
-            'resource_type': log.resource_type,
-            'resource_id': log.resource_id,
-            'ip_address': log.ip_address,
-            'duration_ms': log.duration_ms,
-            'details': log.details
-        }
\ No newline at end of file
+    def _logs(criteria, stream):
+        """Matching logs for a report, as an iterator if streaming or else a list"""
+        logs = AuditReportGenerator._iter_logs(criteria)
+        return logs if stream else list(logs)
+    
+    @staticmethod
+    def _iter_logs(criteria):
+        """Yield matching logs serialized for a report, newest first"""
+        rows = db.session.query(*AuditReportGenerator._LOG_COLUMNS).filter(
+            *criteria
+        ).order_by(AuditLog.timestamp.desc()).execution_options(yield_per=1000)
+        
+        for row in rows:
+            log = row._asdict()
+            log['timestamp'] = log['timestamp'].isoformat()
+            yield log
\ No newline at end of file
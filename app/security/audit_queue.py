@@ -0,0 +1,154 @@
+"""Background writer for security events raised on request paths"""
+import atexit
+import os
+import queue
+import threading
+import time
+from datetime import datetime
+from flask import request, current_app, has_request_context
+from flask_login import current_user
+from app import db
+from app.models.audit import SecurityEvent
+
+# Events are written in batches of up to BATCH_SIZE, at most FLUSH_INTERVAL seconds after queuing
+BATCH_SIZE = 100
+FLUSH_INTERVAL = 0.5
+
+# Longest the interpreter waits at exit for queued events to be written
+EXIT_FLUSH_TIMEOUT = 10.0
+
+# Queued by flush_at_exit: the writer drains what is left and stops
+_STOP = object()
+
+_queue = queue.SimpleQueue()
+_worker = None
+_worker_lock = threading.Lock()
+
+
+def _reset_after_fork():
+    """Give a forked child its own empty queue and no writer thread"""
+    # The parent's queued events are the parent's to write, and its thread
+    # (and possibly a held lock) didn't survive the fork
+    global _queue, _worker, _worker_lock
+    _queue = queue.SimpleQueue()
+    _worker = None
+    _worker_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_after_fork)
+
+
+def queue_security_event(event_type, severity='warning', description=None, details=None):
+    """
+    Record a security event without waiting on the database
+    
+    Request details are captured now; the row is written by a background
+    thread. Under TESTING the event is written synchronously instead.
+    """
+    app = current_app._get_current_object()
+    if app.testing:
+        from app.security.audit import log_security_event
+        log_security_event(event_type, severity=severity, description=description, details=details)
+        return
+    
+    in_request = has_request_context()
+    row = {
+        'event_type': event_type,
+        'severity': severity,
+        'user_id': current_user.id if in_request and current_user.is_authenticated else None,
+        'ip_address': request.remote_addr if in_request else None,
+        'user_agent': request.headers.get('User-Agent', '')[:255] if in_request else None,
+        'timestamp': datetime.utcnow(),
+        'description': description,
+        'details': details
+    }
+    
+    # Alert right away rather than when the row is written
+    if severity == 'critical':
+        app.logger.critical(f"SECURITY ALERT: {event_type} - {description}")
+    
+    _ensure_worker()
+    _queue.put((app, row))
+
+
+def _ensure_worker():
+    """Start the writer thread on first use in this process"""
+    global _worker
+    if _worker is not None and _worker.is_alive():
+        return
+    
+    with _worker_lock:
+        if _worker is None or not _worker.is_alive():
+            _worker = threading.Thread(
+                target=_write_events, args=(_queue,), name='security-event-writer', daemon=True
+            )
+            _worker.start()
+
+
+@atexit.register
+def flush_at_exit():
+    """Write every queued event before the process exits"""
+    worker = _worker
+    if worker is not None and worker.is_alive():
+        _queue.put(_STOP)
+        worker.join(EXIT_FLUSH_TIMEOUT)
+    else:
+        _write_batch(_drain(_queue))
+
+
+def _drain(events):
+    """Everything currently in the events queue, without waiting"""
+    batch = []
+    while True:
+        try:
+            item = events.get_nowait()
+        except queue.Empty:
+            return batch
+        if item is not _STOP:
+            batch.append(item)
+
+
+def _write_events(events):
+    """Drain the events queue until told to stop, writing each batch with one bulk insert per app"""
+    # The queue is passed in rather than read from the global, which a fork replaces
+    while True:
+        batch = []
+        stopping = False
+        item = events.get()
+        deadline = time.monotonic() + FLUSH_INTERVAL
+        while True:
+            if item is _STOP:
+                stopping = True
+                break
+            batch.append(item)
+            timeout = deadline - time.monotonic()
+            if len(batch) >= BATCH_SIZE or timeout <= 0:
+                break
+            try:
+                item = events.get(timeout=timeout)
+            except queue.Empty:
+                break
+        
+        if stopping:
+            batch.extend(_drain(events))
+        _write_batch(batch)
+        if stopping:
+            return
+
+
+def _write_batch(batch):
+    """Write (app, row) pairs with one bulk insert per app"""
+    rows_by_app = {}
+    for app, row in batch:
+        rows_by_app.setdefault(app, []).append(row)
+    
+    for app, rows in rows_by_app.items():
+        with app.app_context():
+            try:
+                db.session.bulk_insert_mappings(SecurityEvent, rows)
+                db.session.commit()
+            except Exception as e:
+                db.session.rollback()
+                app.logger.error(f"Security event logging failed: {e}")
+            finally:
+                db.session.remove()
\ No newline at end of file
@@ -1,20 +1,28 @@
 """Field-level encryption for PHI data"""
 import os
 import base64
+import re
+import functools
+from cryptography.exceptions import InvalidTag
 from cryptography.fernet import Fernet
 from cryptography.hazmat.primitives import hashes
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 from sqlalchemy.types import TypeDecorator, String
 from flask import current_app
 
+# Characters stripped from uploaded filenames, and runs of dots ('..' and longer)
+_FILENAME_TRANS = str.maketrans('', '', '/\\\x00')
+_DOT_RUNS = re.compile(r'\.{2,}')
+
 
 class FieldEncryption:
     """Handles field-level encryption for sensitive data"""
     
+    NONCE_SIZE = 12
+    
     def __init__(self, key=None):
-        if key:
-            self.cipher = Fernet(key)
-        else:
+        if not key:
             # Get key from environment or generate
             key = os.environ.get('FIELD_ENCRYPTION_KEY')
             if not key:
@@ -29,7 +37,11 @@ class FieldEncryption:
                 else:
                     raise ValueError("FIELD_ENCRYPTION_KEY environment variable not set")
             
-            self.cipher = Fernet(key.encode() if isinstance(key, str) else key)
+        key = key.encode() if isinstance(key, str) else key
+        # AES-256-GCM over the 32 raw bytes of the Fernet-format key
+        self.aead = AESGCM(base64.urlsafe_b64decode(key)[:32])
+        # Values written before the switch to AES-GCM are Fernet tokens
+        self.cipher = Fernet(key)
     
     def encrypt(self, data):
         """Encrypt data"""
@@ -39,8 +51,10 @@ class FieldEncryption:
         if isinstance(data, str):
             data = data.encode()
         
-        encrypted = self.cipher.encrypt(data)
-        return base64.urlsafe_b64encode(encrypted).decode()
+        # Stored as base64(nonce + ciphertext + tag)
+        nonce = os.urandom(self.NONCE_SIZE)
+        encrypted = self.aead.encrypt(nonce, data, None)
+        return base64.urlsafe_b64encode(nonce + encrypted).decode()
     
     def decrypt(self, encrypted_data):
         """Decrypt data"""
@@ -49,7 +63,10 @@ class FieldEncryption:
         
         try:
             decoded = base64.urlsafe_b64decode(encrypted_data.encode())
-            decrypted = self.cipher.decrypt(decoded)
+            try:
+                decrypted = self.aead.decrypt(decoded[:self.NONCE_SIZE], decoded[self.NONCE_SIZE:], None)
+            except InvalidTag:
+                decrypted = self.cipher.decrypt(decoded)
             return decrypted.decode()
         except Exception as e:
             current_app.logger.error(f"Decryption failed: {e}")
@@ -74,26 +91,33 @@ class FieldEncryption:
         return key
 
 
+@functools.lru_cache(maxsize=1)
+def _get_field_encryption():
+    """Shared FieldEncryption built once per process from FIELD_ENCRYPTION_KEY"""
+    return FieldEncryption()
+
+
 class EncryptedField(TypeDecorator):
     """SQLAlchemy type for encrypted fields"""
     impl = String
     cache_ok = True
     
-    def __init__(self, *args, **kwargs):
-        self.encryption = FieldEncryption()
-        super().__init__(*args, **kwargs)
+    @property
+    def encryption(self):
+        """Cipher shared by all encrypted columns, built on first use"""
+        return _get_field_encryption()
     
     def process_bind_param(self, value, dialect):
         """Encrypt value before storing"""
         if value is None:
             return None
-        return self.encryption.encrypt(value)
+        return _get_field_encryption().encrypt(value)
     
     def process_result_value(self, value, dialect):
         """Decrypt value after retrieving"""
         if value is None:
             return None
-        return self.encryption.decrypt(value)
+        return _get_field_encryption().decrypt(value)
 
 
 class SecureDataHandler:
@@ -127,10 +151,10 @@ class SecureDataHandler:
         # Remove any directory components
         filename = os.path.basename(filename)
         
-        # Remove potentially dangerous characters
-        dangerous_chars = ['..', '/', '\\', '\x00']
-        for char in dangerous_chars:
-            filename = filename.replace(char, '')
+        # Remove path separators and NUL, then collapse dot runs
+        filename = _DOT_RUNS.sub('.', filename.translate(_FILENAME_TRANS))
+        if not filename.strip('.'):
+            return ''
         
         # Limit length
         name, ext = os.path.splitext(filename)
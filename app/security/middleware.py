@@ -1,58 +1,141 @@
 """Security middleware for Flask application"""
-from flask import request, session, redirect, url_for, flash
+import hashlib
+import logging
+import re
+import threading
+import time
+from cachetools import TTLCache
+from flask import request, session, redirect, url_for, flash, g
 from flask_login import current_user, logout_user
 from flask_limiter import Limiter
 from flask_limiter.util import get_remote_address
-from datetime import datetime, timedelta
-import redis
+from werkzeug.datastructures import Headers
+from datetime import datetime, timedelta, timezone
 from app.models.audit import SecurityEvent
 from app.security.audit import log_security_event
+from app.utils.decorators import redis_client
+
+logger = logging.getLogger(__name__)
+
+# Try importing pyahocorasick
+try:
+    import ahocorasick
+    AHOCORASICK_AVAILABLE = True
+    logger.info("pyahocorasick is available for request pattern scanning")
+except ImportError:
+    AHOCORASICK_AVAILABLE = False
+    logger.info("pyahocorasick not available, using regex request pattern scanning. Install with: pip install pyahocorasick")
+
+# How stale session['last_active'] (epoch seconds) may get before it is rewritten
+LAST_ACTIVE_RESOLUTION = 60
+
+# Suspicious request patterns, matched case-insensitively
+SUSPICIOUS_PATTERNS = [
+    '../',  # Directory traversal
+    '..\\',  # Windows directory traversal
+    '<script',  # XSS attempt
+    'javascript:',  # XSS attempt
+    'SELECT * FROM',  # SQL injection
+    'DROP TABLE',  # SQL injection
+    'UNION SELECT',  # SQL injection
+    '; --',  # SQL injection
+]
+
+# Path prefixes the request hooks branch on: /api/, /static/ and /auth/,
+# with exactly /favicon.ico and /robots.txt counted as static
+_PATH_KIND = re.compile(r'/(?:(api|static|auth)/|(?:favicon\.ico|robots\.txt)\Z)')
+
+
+def request_kind():
+    """Classify the request path as 'api', 'static', 'auth' or 'other', once per request"""
+    kind = g.get('request_kind')
+    if kind is None:
+        match = _PATH_KIND.match(request.path)
+        kind = (match.group(1) or 'static') if match else 'other'
+        g.request_kind = kind
+    return kind
+
+
+def build_pattern_matcher(patterns):
+    """
+    Compile patterns into a single-pass case-insensitive matcher
+    Returns a function giving the first pattern found in a string, or None
+    """
+    if AHOCORASICK_AVAILABLE:
+        automaton = ahocorasick.Automaton()
+        for pattern in patterns:
+            automaton.add_word(pattern.lower(), pattern)
+        automaton.make_automaton()
+        
+        def find(text):
+            for _, pattern in automaton.iter(text.lower()):
+                return pattern
+            return None
+    else:
+        by_lower = {pattern.lower(): pattern for pattern in patterns}
+        regex = re.compile('|'.join(re.escape(pattern) for pattern in by_lower))
+        
+        def find(text):
+            match = regex.search(text.lower())
+            return by_lower[match.group()] if match else None
+    
+    return find
 
 
 def setup_security_headers(app):
     """Setup security headers for production"""
+    # Content Security Policy
+    csp = {
+        'default-src': "'self'",
+        'script-src': "'self' 'unsafe-inline' 'unsafe-eval'",  # Adjust as needed
+        'style-src': "'self' 'unsafe-inline'",
+        'img-src': "'self' data: https:",
+        'font-src': "'self'",
+        'connect-src': "'self'",
+        'frame-ancestors': "'none'",
+        'form-action': "'self'",
+        'base-uri': "'self'"
+    }
     
-    @app.after_request
-    def set_security_headers(response):
-        """Set security headers on all responses"""
+    # Header values are fixed for the app, so build them once here
+    security_headers = [
         # Prevent clickjacking
-        response.headers['X-Frame-Options'] = 'DENY'
+        ('X-Frame-Options', 'DENY'),
         
         # Prevent content type sniffing
-        response.headers['X-Content-Type-Options'] = 'nosniff'
+        ('X-Content-Type-Options', 'nosniff'),
         
         # Enable XSS protection
-        response.headers['X-XSS-Protection'] = '1; mode=block'
+        ('X-XSS-Protection', '1; mode=block'),
         
         # Referrer policy
-        response.headers['Referrer-Policy'] = 'strict-origin-when-cross-origin'
-        
-        # Content Security Policy
-        csp = {
-            'default-src': "'self'",
-            'script-src': "'self' 'unsafe-inline' 'unsafe-eval'",  # Adjust as needed
-            'style-src': "'self' 'unsafe-inline'",
-            'img-src': "'self' data: https:",
-            'font-src': "'self'",
-            'connect-src': "'self'",
-            'frame-ancestors': "'none'",
-            'form-action': "'self'",
-            'base-uri': "'self'"
-        }
-        
-        csp_string = '; '.join([f"{key} {value}" for key, value in csp.items()])
-        response.headers['Content-Security-Policy'] = csp_string
+        ('Referrer-Policy', 'strict-origin-when-cross-origin'),
         
-        # Strict Transport Security (HSTS)
-        if app.config.get('SESSION_COOKIE_SECURE', False):
-            response.headers['Strict-Transport-Security'] = 'max-age=31536000; includeSubDomains'
+        ('Content-Security-Policy', '; '.join(f"{key} {value}" for key, value in csp.items())),
         
         # Feature Policy
-        response.headers['Feature-Policy'] = "geolocation 'none'; camera 'none'; microphone 'none'"
+        ('Feature-Policy', "geolocation 'none'; camera 'none'; microphone 'none'"),
         
         # Permissions Policy (newer version of Feature Policy)
-        response.headers['Permissions-Policy'] = "geolocation=(), camera=(), microphone=()"
-        
+        ('Permissions-Policy', "geolocation=(), camera=(), microphone=()"),
+    ]
+    
+    # Strict Transport Security (HSTS)
+    if app.config.get('SESSION_COOKIE_SECURE', False):
+        security_headers.append(('Strict-Transport-Security', 'max-age=31536000; includeSubDomains'))
+    
+    security_headers = Headers(security_headers)
+    header_names = frozenset(name.lower() for name in security_headers.keys())
+    
+    @app.after_request
+    def set_security_headers(response):
+        """Set security headers on all responses"""
+        # Appending in one call is enough unless the view already set one of
+        # them, in which case replace so no header is sent twice
+        if header_names.isdisjoint(name.lower() for name, _ in response.headers):
+            response.headers.extend(security_headers)
+        else:
+            response.headers.update(security_headers)
         return response
 
 
@@ -66,6 +149,10 @@ def setup_rate_limiting(app):
         app=app,
         key_func=get_remote_address,
         storage_uri=storage_uri,
+        # Moving window: no 2x bursts across fixed window boundaries. Flask-Limiter
+        # only runs the strategies limits ships, so the Redis token bucket is
+        # used by the rate_limit decorator alone
+        strategy="moving-window",
         default_limits=["200 per day", "50 per hour"]
     )
     
@@ -98,7 +185,7 @@ def setup_rate_limiting(app):
             return {'error': 'Rate limit exceeded. Please try again later.'}, 429
         else:
             flash('Too many requests. Please try again later.', 'error')
-            return redirect(url_for('index'))
+            return redirect(url_for('roster.index'))
     
     return limiter
 
@@ -106,24 +193,42 @@ def setup_rate_limiting(app):
 def setup_session_security(app):
     """Setup session security middleware"""
     
+    # HTTPS is only enforced alongside secure cookies; otherwise no hook is registered
+    if app.config.get('SESSION_COOKIE_SECURE', False):
+        @app.before_request
+        def enforce_https():
+            """Enforce HTTPS in production"""
+            # Runs first, so plain-HTTP requests are redirected before the user is loaded
+            if request.is_secure or request.headers.get('X-Forwarded-Proto') == 'https':
+                return None
+            return redirect(request.url.replace('http://', 'https://', 1))
+    
+    # Session timeout in whole seconds, compared against epoch-second timestamps
+    lifetime = app.config.get('PERMANENT_SESSION_LIFETIME', timedelta(hours=24))
+    timeout_seconds = int(lifetime.total_seconds()) if isinstance(lifetime, timedelta) else int(lifetime)
+    
     @app.before_request
     def check_session_validity():
         """Check session validity before each request"""
         if current_user.is_authenticated:
+            now = int(time.time())
+            
             # Check session timeout
             last_active = session.get('last_active')
+            if isinstance(last_active, str):
+                # Sessions from before last_active was stored as epoch seconds
+                last_active = int(datetime.fromisoformat(last_active).replace(tzinfo=timezone.utc).timestamp())
             if last_active:
-                last_active_time = datetime.fromisoformat(last_active)
-                timeout = app.config.get('PERMANENT_SESSION_LIFETIME', timedelta(hours=24))
-                
-                if datetime.utcnow() - last_active_time > timeout:
+                if now - last_active > timeout_seconds:
                     logout_user()
                     session.clear()
                     flash('Your session has expired. Please log in again.', 'info')
                     return redirect(url_for('auth.login'))
             
-            # Update last active time
-            session['last_active'] = datetime.utcnow().isoformat()
+            # Update last active time; only when it has moved on, since every
+            # session write re-signs and re-sends the session cookie
+            if not last_active or now - last_active >= LAST_ACTIVE_RESOLUTION:
+                session['last_active'] = now
             
             # Check for concurrent sessions
             if hasattr(current_user, 'session_token'):
@@ -146,60 +251,50 @@ def setup_session_security(app):
                 session.clear()
                 flash('Your account has been locked. Please contact support.', 'error')
                 return redirect(url_for('auth.login'))
-    
-    @app.before_request
-    def enforce_https():
-        """Enforce HTTPS in production"""
-        if app.config.get('SESSION_COOKIE_SECURE', False):
-            if not request.is_secure and request.headers.get('X-Forwarded-Proto') != 'https':
-                return redirect(request.url.replace('http://', 'https://'))
 
 
 def setup_request_validation(app):
     """Setup request validation middleware"""
     
+    # Scans URL and form values for all patterns in one pass each
+    find_suspicious = build_pattern_matcher(SUSPICIOUS_PATTERNS)
+    
     @app.before_request
     def validate_request():
         """Validate incoming requests"""
-        # Check for suspicious patterns
-        suspicious_patterns = [
-            '../',  # Directory traversal
-            '..\\',  # Windows directory traversal
-            '<script',  # XSS attempt
-            'javascript:',  # XSS attempt
-            'SELECT * FROM',  # SQL injection
-            'DROP TABLE',  # SQL injection
-            'UNION SELECT',  # SQL injection
-            '; --',  # SQL injection
-        ]
+        kind = request_kind()
+        if kind == 'static' or request.endpoint == 'static':
+            return None
         
         # Check URL
-        for pattern in suspicious_patterns:
-            if pattern.lower() in request.url.lower():
-                log_security_event(
-                    SecurityEvent.EVENT_SUSPICIOUS_LOGIN,
-                    severity='warning',
-                    description=f"Suspicious pattern in URL: {pattern}",
-                    details={'url': request.url, 'ip': request.remote_addr}
-                )
-                return 'Bad Request', 400
+        pattern = find_suspicious(request.url)
+        if pattern:
+            log_security_event(
+                SecurityEvent.EVENT_SUSPICIOUS_LOGIN,
+                severity='warning',
+                description=f"Suspicious pattern in URL: {pattern}",
+                details={'url': request.url, 'ip': request.remote_addr}
+            )
+            return 'Bad Request', 400
         
-        # Check form data
+        # Check form data: one scan over all values joined by NUL, which no
+        # pattern contains, then look for the offending field only on a hit
         if request.form:
-            for key, value in request.form.items():
-                if isinstance(value, str):
-                    for pattern in suspicious_patterns:
-                        if pattern.lower() in value.lower():
-                            log_security_event(
-                                SecurityEvent.EVENT_SUSPICIOUS_LOGIN,
-                                severity='warning',
-                                description=f"Suspicious pattern in form data: {pattern}",
-                                details={'field': key, 'ip': request.remote_addr}
-                            )
-                            return 'Bad Request', 400
+            fields = [(key, value) for key, value in request.form.items() if isinstance(value, str)]
+            if find_suspicious('\x00'.join(value for _, value in fields)):
+                for key, value in fields:
+                    pattern = find_suspicious(value)
+                    if pattern:
+                        log_security_event(
+                            SecurityEvent.EVENT_SUSPICIOUS_LOGIN,
+                            severity='warning',
+                            description=f"Suspicious pattern in form data: {pattern}",
+                            details={'field': key, 'ip': request.remote_addr}
+                        )
+                        return 'Bad Request', 400
         
         # Validate Content-Type for API endpoints
-        if request.path.startswith('/api/') and request.method in ['POST', 'PUT', 'PATCH']:
+        if kind == 'api' and request.method in ['POST', 'PUT', 'PATCH']:
             content_type = request.headers.get('Content-Type', '')
             if 'application/json' not in content_type:
                 return {'error': 'Content-Type must be application/json'}, 400
@@ -208,15 +303,48 @@ def setup_request_validation(app):
 class IPBlocker:
     """IP blocking functionality for security"""
     
-    def __init__(self, redis_client, block_duration=3600):
+    # Bits per block bitmap (128 KB each); a bitmap exists per hour a block covers
+    BITMAP_BITS = 1 << 20
+    BITMAP_PERIOD = 3600  # seconds
+    
+    def __init__(self, redis_client, block_duration=3600, cache_ttl=30):
         self.redis = redis_client
         self.block_duration = block_duration  # seconds
         self.prefix = 'blocked_ip:'
+        # Two bitmaps per period, bloom-filter style: an IP is a candidate only
+        # if its bit is set in both
+        self.bitmap_keys = ('blocked_bf1:', 'blocked_bf2:')
+    
+        # Recent answers per IP, so most requests skip Redis; blocks made by
+        # other workers are seen within cache_ttl seconds
+        self._cache = TTLCache(maxsize=50_000, ttl=cache_ttl)
+        self._cache_lock = threading.Lock()
+    
+    def _bit_offsets(self, ip_address):
+        """Two independent bit positions for an IP"""
+        digest = hashlib.blake2b(ip_address.encode(), digest_size=8).digest()
+        return (
+            int.from_bytes(digest[:4], 'big') % self.BITMAP_BITS,
+            int.from_bytes(digest[4:], 'big') % self.BITMAP_BITS
+        )
     
     def is_blocked(self, ip_address):
         """Check if IP is blocked"""
-        key = f"{self.prefix}{ip_address}"
-        return self.redis.exists(key)
+        with self._cache_lock:
+            blocked = self._cache.get(ip_address)
+        if blocked is None:
+            period = int(time.time()) // self.BITMAP_PERIOD
+            pipe = self.redis.pipeline(transaction=False)
+            for key, offset in zip(self.bitmap_keys, self._bit_offsets(ip_address)):
+                pipe.getbit(f"{key}{period}", offset)
+            blocked = all(pipe.execute())
+            if blocked:
+                # Rule out false positives, unblocked and expired IPs against
+                # the per-IP record; only reached for IPs that were blocked
+                blocked = bool(self.redis.exists(f"{self.prefix}{ip_address}"))
+            with self._cache_lock:
+                self._cache[ip_address] = blocked
+        return blocked
     
     def block_ip(self, ip_address, reason=None, duration=None):
         """Block an IP address"""
@@ -229,7 +357,19 @@ class IPBlocker:
             'duration': duration
         }
         
-        self.redis.setex(key, duration, str(block_data))
+        now = int(time.time())
+        pipe = self.redis.pipeline(transaction=False)
+        pipe.setex(key, duration, str(block_data))
+        # Mark the IP in every period the block overlaps; each period's
+        # bitmaps expire once it has passed
+        for period in range(now // self.BITMAP_PERIOD, (now + duration) // self.BITMAP_PERIOD + 1):
+            expire_at = (period + 1) * self.BITMAP_PERIOD
+            for bitmap_key, offset in zip(self.bitmap_keys, self._bit_offsets(ip_address)):
+                pipe.setbit(f"{bitmap_key}{period}", offset, 1)
+                pipe.expireat(f"{bitmap_key}{period}", expire_at)
+        pipe.execute()
+        with self._cache_lock:
+            self._cache[ip_address] = True
         
         log_security_event(
             'ip_blocked',
@@ -240,24 +380,27 @@ class IPBlocker:
     
     def unblock_ip(self, ip_address):
         """Manually unblock an IP address"""
+        # Bitmap bits are shared, so only the per-IP record is removed
         key = f"{self.prefix}{ip_address}"
         self.redis.delete(key)
+        with self._cache_lock:
+            self._cache.pop(ip_address, None)
 
 
 def init_security_middleware(app):
     """Initialize all security middleware"""
-    setup_security_headers(app)
-    setup_rate_limiting(app)
-    setup_session_security(app)
-    setup_request_validation(app)
-    
-    # Initialize IP blocker if Redis is available
+    # Initialize IP blocker if Redis is available; registered first so blocked
+    # clients are refused before any session or database work
     if app.config.get('REDIS_URL'):
-        redis_client = redis.from_url(app.config['REDIS_URL'])
-        app.ip_blocker = IPBlocker(redis_client)
+        app.ip_blocker = IPBlocker(redis_client(app, app.config['REDIS_URL']))
         
         @app.before_request
         def check_ip_block():
             """Check if IP is blocked"""
             if hasattr(app, 'ip_blocker') and app.ip_blocker.is_blocked(request.remote_addr):
-                return 'Access Denied', 403
\ No newline at end of file
+                return 'Access Denied', 403
+    
+    setup_security_headers(app)
+    setup_rate_limiting(app)
+    setup_session_security(app)
+    setup_request_validation(app)
\ No newline at end of file
@@ -1,6 +1,6 @@
 """Role-Based Access Control implementation"""
 from functools import wraps
-from flask import abort, request, jsonify
+from flask import abort, request, jsonify, g, has_app_context
 from flask_login import current_user, login_required
 from app.models.user import User, Role
 
@@ -16,15 +16,20 @@ def require_permission(permission):
             ...
     """
     def decorator(f):
+        # Catch misspelt permissions when the view is defined, not on each request
+        if permission not in PermissionManager.PERMISSION_NAMES:
+            raise ValueError(f"Unknown permission: {permission}")
+        
         @wraps(f)
         @login_required
         def decorated_function(*args, **kwargs):
             if not current_user.has_permission(permission):
                 # Log unauthorized access attempt
-                from app.security.audit import log_security_event
+                from app.security.audit_queue import queue_security_event
                 from app.models.audit import SecurityEvent
                 
-                log_security_event(
+                # Written in the background so the 403 isn't held up by a commit
+                queue_security_event(
                     SecurityEvent.EVENT_UNAUTHORIZED_ACCESS,
                     severity='warning',
                     description=f'User {current_user.email} attempted to access {request.path} without {permission} permission'
@@ -56,10 +61,10 @@ def require_role(role_name):
         @login_required
         def decorated_function(*args, **kwargs):
             if not current_user.has_role(role_name):
-                from app.security.audit import log_security_event
+                from app.security.audit_queue import queue_security_event
                 from app.models.audit import SecurityEvent
                 
-                log_security_event(
+                queue_security_event(
                     SecurityEvent.EVENT_UNAUTHORIZED_ACCESS,
                     severity='warning',
                     description=f'User {current_user.email} attempted to access {request.path} without {role_name} role'
@@ -90,6 +95,16 @@ def check_resource_access(resource_type, resource_id, permission):
     if not current_user.is_authenticated:
         return False
     
+    # Decorators and template helpers often re-check the same resource in one request
+    cache_key = (current_user.id, resource_type, resource_id, permission)
+    access_cache = g.setdefault('_resource_access', {})
+    if cache_key not in access_cache:
+        access_cache[cache_key] = _check_resource_access(resource_type, resource_id, permission)
+    return access_cache[cache_key]
+
+
+def _check_resource_access(resource_type, resource_id, permission):
+    """Uncached check_resource_access for an authenticated current_user"""
     # Admin has access to everything
     if current_user.has_role(Role.ADMIN):
         return True
@@ -102,31 +117,16 @@ def check_resource_access(resource_type, resource_id, permission):
     # Check resource-specific access
     if resource_type == 'roster':
         from app.models.roster import GeneratedRoster
-        roster = GeneratedRoster.query.get(resource_id)
-        if not roster:
-            return False
         
         # Users can access their own rosters
-        if roster.user_id == current_user.id:
-            return True
-        
-        # Check if roster is shared with user
         # TODO: Implement roster sharing logic
+        return GeneratedRoster.user_can_access(current_user.id, resource_id)
         
     elif resource_type == 'profile':
         from app.models.roster import RosterProfile
-        profile = RosterProfile.query.get(resource_id)
-        if not profile:
-            return False
         
-        # Users can access their own profiles
-        if profile.user_id == current_user.id:
-            return True
-        
-        # Check if profile is shared
-        for share in profile.shared_profiles:
-            if share.shared_with_email == current_user.email and share.is_active:
-                return True
+        # Users can access their own profiles and profiles shared with them
+        return RosterProfile.user_can_access(current_user.id, current_user.email, resource_id)
     
     return False
 
@@ -142,6 +142,9 @@ def require_resource_access(resource_type, permission, resource_id_param='id'):
             ...
     """
     def decorator(f):
+        if f"{resource_type}.{permission}" not in PermissionManager.PERMISSION_NAMES:
+            raise ValueError(f"Unknown permission: {resource_type}.{permission}")
+        
         @wraps(f)
         @login_required
         def decorated_function(*args, **kwargs):
@@ -150,10 +153,10 @@ def require_resource_access(resource_type, permission, resource_id_param='id'):
                 abort(400)  # Bad request if resource ID not provided
             
             if not check_resource_access(resource_type, resource_id, permission):
-                from app.security.audit import log_security_event
+                from app.security.audit_queue import queue_security_event
                 from app.models.audit import SecurityEvent
                 
-                log_security_event(
+                queue_security_event(
                     SecurityEvent.EVENT_UNAUTHORIZED_ACCESS,
                     severity='warning',
                     description=f'User {current_user.email} denied access to {resource_type} {resource_id}'
@@ -215,13 +218,29 @@ class PermissionManager:
         'api.admin': 'Access admin API endpoints',
     }
     
+    # Valid permission names, for membership checks
+    PERMISSION_NAMES = frozenset(PERMISSIONS)
+    
     @classmethod
     def get_user_permissions(cls, user):
-        """Get all permissions for a user"""
-        permissions = set()
-        for role in user.roles:
-            permissions.update(role.permissions)
-        return list(permissions)
+        """Get all permissions for a user as a frozenset, memoized for the current request"""
+        cached = g.get('_user_permissions') if has_app_context() else None
+        if cached is not None and cached[0] == user.id:
+            return cached[1]
+        
+        permissions = frozenset(
+            permission for role in user.roles for permission in role.permissions or ()
+        )
+        if has_app_context():
+            g._user_permissions = (user.id, permissions)
+        return permissions
+    
+    @classmethod
+    def _invalidate_cached_permissions(cls):
+        """Drop the request's memoized permissions and template checks after a role change"""
+        if has_app_context():
+            g.pop('_user_permissions', None)
+            g.pop('_template_checks', None)
     
     @classmethod
     def grant_role(cls, user, role_name, granted_by=None):
@@ -259,6 +278,7 @@ class PermissionManager:
         )
         
         db.session.commit()
+        cls._invalidate_cached_permissions()
         return True
     
     @classmethod
@@ -296,6 +316,7 @@ class PermissionManager:
         )
         
         db.session.commit()
+        cls._invalidate_cached_permissions()
         return True
 
 
@@ -303,15 +324,26 @@ class PermissionManager:
 def init_rbac_helpers(app):
     """Initialize template helpers for RBAC"""
     
+    def _memoized_check(kind, name, check):
+        """Answer a template check once per request; pages repeat them in nav, sidebar and buttons"""
+        if not current_user.is_authenticated:
+            return False
+        
+        checks = g.setdefault('_template_checks', {})
+        result = checks.get((kind, name))
+        if result is None:
+            result = checks[(kind, name)] = check()
+        return result
+    
     @app.template_global()
     def has_permission(permission):
         """Check permission in templates"""
-        return current_user.is_authenticated and current_user.has_permission(permission)
+        return _memoized_check('permission', permission, lambda: current_user.has_permission(permission))
     
     @app.template_global()
     def has_role(role_name):
         """Check role in templates"""
-        return current_user.is_authenticated and current_user.has_role(role_name)
+        return _memoized_check('role', role_name, lambda: current_user.has_role(role_name))
     
     @app.template_global()
     def can_access_resource(resource_type, resource_id, permission):
@@ -8,7 +8,8 @@ from .validators import (
     validate_email, validate_password_strength,
     validate_date_range, validate_phone_number,
     validate_nric, validate_staff_id, validate_file_type,
-    validate_roster_rules, sanitize_input, validate_json_structure
+    validate_roster_rules, sanitize_input, validate_json_structure,
+    compile_schema, parse_date
 )
 
 __all__ = [
@@ -23,5 +24,6 @@ __all__ = [
     'validate_email', 'validate_password_strength',
     'validate_date_range', 'validate_phone_number',
     'validate_nric', 'validate_staff_id', 'validate_file_type',
-    'validate_roster_rules', 'sanitize_input', 'validate_json_structure'
+    'validate_roster_rules', 'sanitize_input', 'validate_json_structure',
+    'compile_schema', 'parse_date'
 ]
\ No newline at end of file
@@ -1,12 +1,39 @@
 """Utility decorators for the application"""
 from functools import wraps
+from cachetools import TTLCache
 from flask import request, jsonify, current_app
 from flask_login import current_user
+import math
 import time
 import logging
+import redis
 
 logger = logging.getLogger(__name__)
 
+# measure_performance warns about calls slower than this
+SLOW_OPERATION_NS = 1_000_000_000
+
+# After a Redis error, rate_limit counts per process for this long before
+# trying Redis again
+RATE_LIMIT_RETRY_SECONDS = 30
+
+# Most identifiers rate_limit tracks per process while Redis is unavailable
+RATE_LIMIT_LOCAL_MAXSIZE = 10_000
+
+# Atomic token bucket in one hash {tokens, ts}: refill at ARGV[2] tokens/s up to
+# ARGV[3], then take ARGV[4] tokens if available. Returns 1 if allowed, 0 if not
+RATE_LIMIT_SCRIPT = """
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local now, rate, capacity, cost = tonumber(ARGV[1]), tonumber(ARGV[2]), tonumber(ARGV[3]), tonumber(ARGV[4])
+local tokens = math.min(capacity, (tonumber(bucket[1]) or capacity) + math.max(0, now - (tonumber(bucket[2]) or now)) * rate)
+if tokens < cost then
+    return 0
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens - cost, 'ts', now)
+redis.call('EXPIRE', KEYS[1], math.ceil(capacity / rate))
+return 1
+"""
+
 
 def json_required(f):
     """Decorator to ensure request has JSON content"""
@@ -45,9 +72,16 @@ def validate_json(*expected_args):
 
 
 def rate_limit(calls=10, period=60):
-    """Simple rate limiting decorator"""
+    """
+    Token-bucket rate limiting decorator, kept in Redis so limits hold across workers
+    Allows bursts of up to `calls`, refilled at calls/period per second
+    """
+    rate = calls / period
+    
     def decorator(f):
-        calls_made = {}
+        # Fallback buckets when Redis is unavailable: identifier -> (tokens, ts).
+        # A bucket idle for a whole period is full again, the same as no entry
+        local_buckets = TTLCache(maxsize=RATE_LIMIT_LOCAL_MAXSIZE, ttl=period)
         
         @wraps(f)
         def decorated_function(*args, **kwargs):
@@ -59,29 +93,79 @@ def rate_limit(calls=10, period=60):
             
             now = time.time()
             
-            # Clean old entries
-            calls_made[identifier] = [
-                timestamp for timestamp in calls_made.get(identifier, [])
-                if now - timestamp < period
-            ]
+            # Take a token for this call
+            allowed = None
+            bucket = _rate_limit_bucket(now)
+            if bucket is not None:
+                try:
+                    allowed = bool(bucket(keys=[f"rl:{identifier}:{f.__name__}"], args=[now, rate, calls, 1]))
+                except redis.RedisError as e:
+                    logger.warning(
+                        f"Rate limit store unavailable, counting per process for "
+                        f"{RATE_LIMIT_RETRY_SECONDS}s: {e}"
+                    )
+                    current_app.extensions['rate_limit_retry_at'] = now + RATE_LIMIT_RETRY_SECONDS
+            
+            if allowed is None:
+                tokens, last = local_buckets.get(identifier, (calls, now))
+                tokens = min(calls, tokens + max(0.0, now - last) * rate)
+                allowed = tokens >= 1
+                if allowed:
+                    local_buckets[identifier] = (tokens - 1, now)
             
             # Check rate limit
-            if len(calls_made.get(identifier, [])) >= calls:
+            if not allowed:
                 return jsonify({
                     'error': 'Rate limit exceeded',
-                    'retry_after': period
+                    'retry_after': math.ceil(1 / rate)
                 }), 429
             
-            # Record this call
-            if identifier not in calls_made:
-                calls_made[identifier] = []
-            calls_made[identifier].append(now)
-            
             return f(*args, **kwargs)
         return decorated_function
     return decorator
 
 
+def _rate_limit_bucket(now):
+    """
+    Registered Redis token-bucket script for rate_limit, created once per app
+    
+    None without Redis, or while backing off after a Redis error
+    """
+    extensions = current_app.extensions
+    if now < extensions.get('rate_limit_retry_at', 0):
+        return None
+    if 'rate_limit_bucket' not in extensions:
+        storage_url = current_app.config.get('RATELIMIT_STORAGE_URL')
+        extensions['rate_limit_bucket'] = (
+            redis_client(current_app, storage_url).register_script(RATE_LIMIT_SCRIPT)
+            if storage_url else None
+        )
+    return extensions['rate_limit_bucket']
+
+
+def redis_client(app, url):
+    """
+    Redis client for url on a bounded pool shared by the whole app
+    
+    Under bursts threads wait briefly for a connection rather than opening
+    new ones, and a hung Redis fails calls with a timeout instead of blocking
+    """
+    clients = app.extensions.setdefault('redis_clients', {})
+    if url not in clients:
+        pool = redis.BlockingConnectionPool.from_url(
+            url,
+            max_connections=app.config.get('REDIS_POOL_SIZE', 32),
+            timeout=1.0,
+            socket_keepalive=True,
+            socket_connect_timeout=0.5,
+            socket_timeout=1.0,
+            retry_on_timeout=True,
+            health_check_interval=30
+        )
+        clients[url] = redis.Redis(connection_pool=pool)
+    return clients[url]
+
+
 def async_task(f):
     """Decorator to run function asynchronously (requires Celery setup)"""
     @wraps(f)
@@ -108,24 +192,25 @@ def measure_performance(f):
     """Measure and log function performance"""
     @wraps(f)
     def decorated_function(*args, **kwargs):
-        start_time = time.time()
+        start_ns = time.perf_counter_ns()
         
         try:
             result = f(*args, **kwargs)
-            execution_time = (time.time() - start_time) * 1000  # ms
+            elapsed_ns = time.perf_counter_ns() - start_ns
             
-            if execution_time > 1000:  # Log slow operations
+            if elapsed_ns > SLOW_OPERATION_NS and logger.isEnabledFor(logging.WARNING):  # Log slow operations
                 logger.warning(
-                    f"Slow operation: {f.__name__} took {execution_time:.2f}ms"
+                    f"Slow operation: {f.__name__} took {elapsed_ns / 1e6:.2f}ms"
                 )
             
             return result
             
         except Exception as e:
-            execution_time = (time.time() - start_time) * 1000
-            logger.error(
-                f"Error in {f.__name__} after {execution_time:.2f}ms: {str(e)}"
-            )
+            elapsed_ns = time.perf_counter_ns() - start_ns
+            if logger.isEnabledFor(logging.ERROR):
+                logger.error(
+                    f"Error in {f.__name__} after {elapsed_ns / 1e6:.2f}ms: {str(e)}"
+                )
             raise
     
     return decorated_function
@@ -154,17 +239,19 @@ def log_activity(action, resource_type=None):
     def decorator(f):
         @wraps(f)
         def decorated_function(*args, **kwargs):
-            # Log before execution
-            logger.info(
-                f"User {current_user.email if current_user.is_authenticated else 'anonymous'} "
-                f"performing {action} on {resource_type or 'system'}"
-            )
-            
-            result = f(*args, **kwargs)
-            
-            # Log after execution
-            logger.info(f"Action {action} completed successfully")
+            # Log before execution; skip the user lookup when INFO is off
+            if logger.isEnabledFor(logging.INFO):
+                logger.info(
+                    "User %s performing %s on %s",
+                    current_user.email if current_user.is_authenticated else 'anonymous',
+                    action, resource_type or 'system'
+                )
             
-            return result
+            # Only failures get a second line
+            try:
+                return f(*args, **kwargs)
+            except Exception:
+                logger.warning("Action %s failed", action)
+                raise
         return decorated_function
     return decorator
\ No newline at end of file
@@ -1,46 +1,79 @@
 """Error handlers for the application"""
-from flask import render_template, jsonify, request
+from flask import Response, render_template, jsonify, request
 from werkzeug.exceptions import HTTPException
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-def register_error_handlers(app):
-    """Register error handlers with the Flask app"""
+def _error_response(code, template, **payload):
+    """Return payload as JSON for API requests, otherwise render the error template"""
+    if request.is_json:
+        return jsonify(payload), code
+    return render_template(template), code
+
+
+def register_error_handlers(app, db=None, log_security_event=None):
+    """
+    Register error handlers with the Flask app
+    
+    db and log_security_event default to the application's own. Handlers
+    use these bound references, so nothing is imported while handling an error
+    """
+    if db is None:
+        from app import db
+    
+    # Auditing of unexpected errors is skipped if the audit module can't load
+    breach_event = None
+    try:
+        from app.models.audit import SecurityEvent
+        breach_event = SecurityEvent.EVENT_DATA_BREACH_SUSPECTED
+        if log_security_event is None:
+            from app.security.audit import log_security_event
+    except ImportError:
+        log_security_event = None
+    
+    # The 500 page as an anonymous visitor sees it, rendered once so crashes
+    # don't depend on Jinja, the session or the database. Other error pages
+    # stay live since their layout shows the signed-in user
+    server_error_page = None
+    try:
+        with app.test_request_context():
+            server_error_page = render_template('errors/500.html').encode('utf-8')
+    except Exception as e:
+        logger.warning(f"Could not pre-render the 500 page, rendering it per error: {e}")
+    
+    def server_error_response():
+        """Serve the pre-rendered 500 page, or render it if that failed"""
+        if server_error_page is not None:
+            return Response(server_error_page, status=500, mimetype='text/html')
+        return render_template('errors/500.html'), 500
     
     @app.errorhandler(400)
     def bad_request(error):
         """Handle bad request errors"""
-        if request.is_json:
-            return jsonify({'error': 'Bad request', 'message': str(error)}), 400
-        return render_template('errors/400.html'), 400
+        return _error_response(400, 'errors/400.html', error='Bad request', message=str(error))
     
     @app.errorhandler(403)
     def forbidden(error):
         """Handle forbidden errors"""
-        if request.is_json:
-            return jsonify({'error': 'Forbidden', 'message': 'Access denied'}), 403
-        return render_template('errors/403.html'), 403
+        return _error_response(403, 'errors/403.html', error='Forbidden', message='Access denied')
     
     @app.errorhandler(404)
     def not_found(error):
         """Handle not found errors"""
-        if request.is_json:
-            return jsonify({'error': 'Not found'}), 404
-        return render_template('errors/404.html'), 404
+        return _error_response(404, 'errors/404.html', error='Not found')
     
     @app.errorhandler(500)
     def internal_error(error):
         """Handle internal server errors"""
         logger.error(f"Internal error: {str(error)}")
         
-        from app import db
         db.session.rollback()
         
         if request.is_json:
             return jsonify({'error': 'Internal server error'}), 500
-        return render_template('errors/500.html'), 500
+        return server_error_response()
     
     @app.errorhandler(HTTPException)
     def handle_http_exception(error):
@@ -66,22 +99,19 @@ def register_error_handlers(app):
         """Handle unexpected errors"""
         logger.error(f"Unexpected error: {str(error)}", exc_info=True)
         
-        from app import db
         db.session.rollback()
         
         # Log security event for unexpected errors
-        try:
-            from app.security.audit import log_security_event
-            from app.models.audit import SecurityEvent
-            
-            log_security_event(
-                SecurityEvent.EVENT_DATA_BREACH_SUSPECTED,
-                severity='critical',
-                description=f"Unexpected error: {type(error).__name__}",
-                details={'error': str(error)}
-            )
-        except:
-            pass  # Don't let logging fail the error handler
+        if log_security_event is not None:
+            try:
+                log_security_event(
+                    breach_event,
+                    severity='critical',
+                    description=f"Unexpected error: {type(error).__name__}",
+                    details={'error': str(error)}
+                )
+            except Exception:
+                pass  # Don't let logging fail the error handler
         
         if request.is_json:
             return jsonify({'error': 'Internal server error'}), 500
@@ -89,4 +119,4 @@ def register_error_handlers(app):
         if app.config.get('DEBUG'):
             raise  # Re-raise in debug mode
         
-        return render_template('errors/500.html'), 500
\ No newline at end of file
+        return server_error_response()
\ No newline at end of file
@@ -1,13 +1,39 @@
 """Validation utilities"""
 import re
+import string
 from datetime import datetime, date
-from typing import Optional, List, Dict
+from typing import Any, Optional, List, Dict, Collection, NamedTuple, Tuple, Union
+
+# Patterns used by the validators, compiled once at import
+_EMAIL_RE = re.compile(r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$')
+_PHONE_CLEAN_RE = re.compile(r'[\s\-\(\)]')
+_PHONE_SG_RE = re.compile(r'^(\+65)?[89]\d{7}$')
+_PHONE_INTL_RE = re.compile(r'^\+?\d{10,15}$')
+_HTML_RE = re.compile(r'<[^>]+>')
+
+# Character classes for validate_password_strength
+_UPPERCASE = frozenset(string.ascii_uppercase)
+_LOWERCASE = frozenset(string.ascii_lowercase)
+_SPECIALS = frozenset('!@#$%^&*(),.?":{}|<>')
+
+# Character classes for validate_nric, either case
+_NRIC_PREFIXES = frozenset('STFGstfg')
+_ASCII_LETTERS = frozenset(string.ascii_letters)
+
+# Fields validate_roster_rules requires, in the order missing ones are reported
+_REQUIRED_RULE_FIELDS = (
+    'min_staff_per_day', 'roster_start', 'roster_end',
+    'staff_column', 'specialty_column', 'date_column'
+)
+_REQUIRED_RULE_FIELD_SET = frozenset(_REQUIRED_RULE_FIELDS)
+
+# Marks an absent rule, so an explicit None is still reported as invalid
+_MISSING = object()
 
 
 def validate_email(email: str) -> bool:
     """Validate email format"""
-    pattern = r'^[a-zA-Z0-9._%+-]+@[a-zA-Z0-9.-]+\.[a-zA-Z]{2,}$'
-    return bool(re.match(pattern, email))
+    return bool(_EMAIL_RE.match(email))
 
 
 def validate_password_strength(password: str) -> Dict[str, bool]:
@@ -22,25 +48,24 @@ def validate_password_strength(password: str) -> Dict[str, bool]:
     - digit: Contains number
     - special: Contains special character
     """
-    results = {
-        'valid': True,
-        'length': len(password) >= 8,
-        'uppercase': bool(re.search(r'[A-Z]', password)),
-        'lowercase': bool(re.search(r'[a-z]', password)),
-        'digit': bool(re.search(r'\d', password)),
-        'special': bool(re.search(r'[!@#$%^&*(),.?":{}|<>]', password))
-    }
-    
-    # Overall validity requires all checks to pass
-    results['valid'] = all([
-        results['length'],
-        results['uppercase'],
-        results['lowercase'],
-        results['digit'],
-        results['special']
-    ])
+    # One pass over the password to collect its distinct characters, then
+    # set operations in C for each class
+    chars = set(password)
+    length = len(password) >= 8
+    uppercase = not _UPPERCASE.isdisjoint(chars)
+    lowercase = not _LOWERCASE.isdisjoint(chars)
+    digit = any(map(str.isdecimal, chars))
+    special = not _SPECIALS.isdisjoint(chars)
     
-    return results
+    return {
+        # Overall validity requires all checks to pass
+        'valid': length and uppercase and lowercase and digit and special,
+        'length': length,
+        'uppercase': uppercase,
+        'lowercase': lowercase,
+        'digit': digit,
+        'special': special
+    }
 
 
 def validate_date_range(start_date: date, end_date: date, 
@@ -60,23 +85,22 @@ def validate_date_range(start_date: date, end_date: date,
 def validate_phone_number(phone: str, country_code: str = 'SG') -> bool:
     """Validate phone number format"""
     # Remove spaces, dashes, and parentheses
-    phone = re.sub(r'[\s\-\(\)]', '', phone)
+    phone = _PHONE_CLEAN_RE.sub('', phone)
     
     if country_code == 'SG':
         # Singapore phone numbers: +65 8XXX XXXX or 9XXX XXXX
-        pattern = r'^(\+65)?[89]\d{7}$'
-        return bool(re.match(pattern, phone))
+        return bool(_PHONE_SG_RE.match(phone))
     
     # Generic international format
-    pattern = r'^\+?\d{10,15}$'
-    return bool(re.match(pattern, phone))
+    return bool(_PHONE_INTL_RE.match(phone))
 
 
 def validate_nric(nric: str) -> bool:
     """Validate Singapore NRIC/FIN format"""
-    # Format: S1234567A
-    pattern = r'^[STFG]\d{7}[A-Z]$'
-    if not re.match(pattern, nric.upper()):
+    # Format: S1234567A, checked by position without building an uppercased copy
+    if len(nric) != 9 or not nric.isascii():
+        return False
+    if nric[0] not in _NRIC_PREFIXES or not nric[1:8].isdigit() or nric[8] not in _ASCII_LETTERS:
         return False
     
     # Could add checksum validation here
@@ -85,12 +109,11 @@ def validate_nric(nric: str) -> bool:
 
 def validate_staff_id(staff_id: str) -> bool:
     """Validate staff ID format"""
-    # Alphanumeric, 4-10 characters
-    pattern = r'^[A-Z0-9]{4,10}$'
-    return bool(re.match(pattern, staff_id.upper()))
+    # Alphanumeric, 4-10 characters; isascii keeps out non-ASCII letters and digits
+    return 4 <= len(staff_id) <= 10 and staff_id.isascii() and staff_id.isalnum()
 
 
-def validate_file_type(filename: str, allowed_extensions: List[str]) -> bool:
+def validate_file_type(filename: str, allowed_extensions: Collection[str]) -> bool:
     """Validate file extension"""
     if '.' not in filename:
         return False
@@ -99,7 +122,16 @@ def validate_file_type(filename: str, allowed_extensions: List[str]) -> bool:
     return ext in allowed_extensions
 
 
-def validate_roster_rules(rules: Dict) -> List[str]:
+def parse_date(value: str) -> date:
+    """Parse a YYYY-MM-DD date, raising ValueError if it isn't one"""
+    # date.fromisoformat is much faster than strptime but also accepts other
+    # ISO forms (20240101, 2024-W01-1), so use it only on the exact layout
+    if len(value) == 10 and value[4] == '-' and value[7] == '-':
+        return date.fromisoformat(value)
+    return datetime.strptime(value, '%Y-%m-%d').date()
+
+
+def validate_roster_rules(rules: Dict[str, Any]) -> List[str]:
     """
     Validate roster generation rules
     Returns list of validation errors (empty if valid)
@@ -107,17 +139,18 @@ def validate_roster_rules(rules: Dict) -> List[str]:
     errors = []
     
     # Required fields
-    required = ['min_staff_per_day', 'roster_start', 'roster_end', 
-                'staff_column', 'specialty_column', 'date_column']
-    
-    for field in required:
-        if field not in rules:
-            errors.append(f"Missing required field: {field}")
+    missing = _REQUIRED_RULE_FIELD_SET - rules.keys()
+    if missing:
+        errors.extend(
+            f"Missing required field: {field}" for field in _REQUIRED_RULE_FIELDS if field in missing
+        )
     
     # Validate minimum staff
-    if 'min_staff_per_day' in rules:
+    min_staff = rules.get('min_staff_per_day', _MISSING)
+    if min_staff is not _MISSING:
         try:
-            min_staff = int(rules['min_staff_per_day'])
+            # JSON payloads usually carry ints already; form data carries strings
+            min_staff = min_staff if isinstance(min_staff, int) else int(min_staff)
             if min_staff < 1:
                 errors.append("Minimum staff must be at least 1")
             if min_staff > 100:
@@ -128,8 +161,8 @@ def validate_roster_rules(rules: Dict) -> List[str]:
     # Validate dates
     try:
         if 'roster_start' in rules and 'roster_end' in rules:
-            start = datetime.strptime(rules['roster_start'], '%Y-%m-%d').date()
-            end = datetime.strptime(rules['roster_end'], '%Y-%m-%d').date()
+            start = parse_date(rules['roster_start'])
+            end = parse_date(rules['roster_end'])
             
             if start > end:
                 errors.append("Start date must be before end date")
@@ -141,10 +174,11 @@ def validate_roster_rules(rules: Dict) -> List[str]:
         errors.append("Invalid date format (use YYYY-MM-DD)")
     
     # Validate max consecutive days
-    if 'max_consecutive_days' in rules:
+    max_days = rules.get('max_consecutive_days', _MISSING)
+    if max_days is not _MISSING:
         try:
-            max_days = int(rules.get('max_consecutive_days', 5))
-            if max_days < 1 or max_days > 14:
+            max_days = max_days if isinstance(max_days, int) else int(max_days)
+            if not 1 <= max_days <= 14:
                 errors.append("Max consecutive days must be between 1 and 14")
         except (ValueError, TypeError):
             errors.append("Max consecutive days must be a number")
@@ -158,16 +192,17 @@ def sanitize_input(text: str, max_length: Optional[int] = None,
     if not text:
         return ''
     
-    # Remove null bytes
-    text = text.replace('\x00', '')
+    # Remove null bytes; the membership test skips the copy for clean input
+    if '\x00' in text:
+        text = text.replace('\x00', '')
     
     # Strip whitespace
     text = text.strip()
     
-    # Remove HTML if not allowed
-    if not allow_html:
+    # Remove HTML if not allowed; text without '<' has no tags to strip
+    if not allow_html and '<' in text:
         # Basic HTML stripping
-        text = re.sub(r'<[^>]+>', '', text)
+        text = _HTML_RE.sub('', text)
     
     # Limit length
     if max_length and len(text) > max_length:
@@ -176,7 +211,30 @@ def sanitize_input(text: str, max_length: Optional[int] = None,
     return text
 
 
-def validate_json_structure(data: Dict, schema: Dict) -> List[str]:
+class SchemaField(NamedTuple):
+    """One field of a compiled validate_json_structure schema"""
+    name: str
+    required: bool
+    type: Optional[type]
+    min: Optional[float]
+    max: Optional[float]
+    min_length: Optional[int]
+    max_length: Optional[int]
+
+
+def compile_schema(schema: Dict) -> Tuple[SchemaField, ...]:
+    """Pre-compile a validate_json_structure schema for repeated use"""
+    return tuple(
+        SchemaField(
+            field, rules.get('required', False), rules.get('type'),
+            rules.get('min'), rules.get('max'),
+            rules.get('min_length'), rules.get('max_length')
+        )
+        for field, rules in schema.items()
+    )
+
+
+def validate_json_structure(data: Dict[str, Any], schema: Union[Dict, Tuple[SchemaField, ...]]) -> List[str]:
     """
     Validate JSON data against a simple schema
     
@@ -185,38 +243,42 @@ def validate_json_structure(data: Dict, schema: Dict) -> List[str]:
         'field_name': {'type': str, 'required': True},
         'other_field': {'type': int, 'required': False, 'min': 0, 'max': 100}
     }
+    
+    A schema dict is compiled on every call; callers validating against the
+    same schema repeatedly should compile_schema() it once at module level
+    and pass the result instead
     """
+    if isinstance(schema, dict):
+        schema = compile_schema(schema)
+    
     errors = []
     
-    for field, rules in schema.items():
+    for field, required, expected_type, min_value, max_value, min_length, max_length in schema:
         # Check required fields
-        if rules.get('required', False) and field not in data:
-            errors.append(f"Missing required field: {field}")
-            continue
-        
         if field not in data:
+            if required:
+                errors.append(f"Missing required field: {field}")
             continue
         
         value = data[field]
         
         # Type validation
-        expected_type = rules.get('type')
         if expected_type and not isinstance(value, expected_type):
             errors.append(f"Field '{field}' must be of type {expected_type.__name__}")
             continue
         
         # Numeric range validation
         if isinstance(value, (int, float)):
-            if 'min' in rules and value < rules['min']:
-                errors.append(f"Field '{field}' must be at least {rules['min']}")
-            if 'max' in rules and value > rules['max']:
-                errors.append(f"Field '{field}' must be at most {rules['max']}")
+            if min_value is not None and value < min_value:
+                errors.append(f"Field '{field}' must be at least {min_value}")
+            if max_value is not None and value > max_value:
+                errors.append(f"Field '{field}' must be at most {max_value}")
         
         # String length validation
         if isinstance(value, str):
-            if 'min_length' in rules and len(value) < rules['min_length']:
-                errors.append(f"Field '{field}' must be at least {rules['min_length']} characters")
-            if 'max_length' in rules and len(value) > rules['max_length']:
-                errors.append(f"Field '{field}' must be at most {rules['max_length']} characters")
+            if min_length is not None and len(value) < min_length:
+                errors.append(f"Field '{field}' must be at least {min_length} characters")
+            if max_length is not None and len(value) > max_length:
+                errors.append(f"Field '{field}' must be at most {max_length} characters")
     
     return errors
\ No newline at end of file
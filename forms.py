@@ -5,12 +5,28 @@ from wtforms.validators import DataRequired, Email, EqualTo, Length, ValidationE
 from models import User
 from config import Config
 
+# Password length rule shared by RegistrationForm and PasswordResetForm
+_MIN_PW = Config.MIN_PASSWORD_LENGTH
+_PW_MSG = f'Password must be at least {_MIN_PW} characters long'
+
+# Validator chains repeated across forms; WTForms validators hold no per-form
+# state, so one set of instances serves every field and form
+_EMAIL_VALIDATORS = (
+    DataRequired(message='Email is required'),
+    Email(message='Invalid email address')
+)
+_NEW_PASSWORD_VALIDATORS = (
+    DataRequired(message='Password is required'),
+    Length(min=_MIN_PW, message=_PW_MSG)
+)
+_CONFIRM_PASSWORD_VALIDATORS = (
+    DataRequired(message='Please confirm your password'),
+    EqualTo('password', message='Passwords must match')
+)
+
 class LoginForm(FlaskForm):
     """User login form"""
-    email = StringField('Email', validators=[
-        DataRequired(message='Email is required'),
-        Email(message='Invalid email address')
-    ])
+    email = StringField('Email', validators=_EMAIL_VALIDATORS)
     password = PasswordField('Password', validators=[
         DataRequired(message='Password is required')
     ])
@@ -18,24 +34,13 @@ class LoginForm(FlaskForm):
 
 class RegistrationForm(FlaskForm):
     """User registration form"""
-    email = StringField('Email', validators=[
-        DataRequired(message='Email is required'),
-        Email(message='Invalid email address')
-    ])
-    password = PasswordField('Password', validators=[
-        DataRequired(message='Password is required'),
-        Length(min=Config.MIN_PASSWORD_LENGTH, 
-               message=f'Password must be at least {Config.MIN_PASSWORD_LENGTH} characters long')
-    ])
-    confirm_password = PasswordField('Confirm Password', validators=[
-        DataRequired(message='Please confirm your password'),
-        EqualTo('password', message='Passwords must match')
-    ])
+    email = StringField('Email', validators=_EMAIL_VALIDATORS)
+    password = PasswordField('Password', validators=_NEW_PASSWORD_VALIDATORS)
+    confirm_password = PasswordField('Confirm Password', validators=_CONFIRM_PASSWORD_VALIDATORS)
     
     def validate_email(self, email):
         """Check if email already exists"""
-        user = User.query.filter_by(email=email.data.lower()).first()
-        if user:
+        if User.email_registered(email.data):
             raise ValidationError('Email already registered. Please login or use a different email.')
 
 class ProfileForm(FlaskForm):
@@ -51,10 +56,7 @@ class ProfileForm(FlaskForm):
 
 class ShareProfileForm(FlaskForm):
     """Share roster profile form"""
-    email = StringField('Recipient Email', validators=[
-        DataRequired(message='Email is required'),
-        Email(message='Invalid email address')
-    ])
+    email = StringField('Recipient Email', validators=_EMAIL_VALIDATORS)
     message = TextAreaField('Message (Optional)', validators=[
         Optional(),
         Length(max=500)
@@ -64,7 +66,7 @@ class FileUploadForm(FlaskForm):
     """File upload form with CSRF protection"""
     file = FileField('File', validators=[
         FileRequired(message='Please select a file'),
-        FileAllowed(Config.ALLOWED_EXTENSIONS, 
+        FileAllowed(tuple(sorted(Config.ALLOWED_EXTENSIONS)), 
                    message='Invalid file type. Allowed: Excel, CSV, PDF, Images')
     ])
 
@@ -108,19 +110,9 @@ class EmergencyLeaveForm(FlaskForm):
 
 class PasswordResetRequestForm(FlaskForm):
     """Request password reset form"""
-    email = StringField('Email', validators=[
-        DataRequired(message='Email is required'),
-        Email(message='Invalid email address')
-    ])
+    email = StringField('Email', validators=_EMAIL_VALIDATORS)
 
 class PasswordResetForm(FlaskForm):
     """Reset password form"""
-    password = PasswordField('New Password', validators=[
-        DataRequired(message='Password is required'),
-        Length(min=Config.MIN_PASSWORD_LENGTH,
-               message=f'Password must be at least {Config.MIN_PASSWORD_LENGTH} characters long')
-    ])
-    confirm_password = PasswordField('Confirm Password', validators=[
-        DataRequired(message='Please confirm your password'),
-        EqualTo('password', message='Passwords must match')
-    ])
\ No newline at end of file
+    password = PasswordField('New Password', validators=_NEW_PASSWORD_VALIDATORS)
+    confirm_password = PasswordField('Confirm Password', validators=_CONFIRM_PASSWORD_VALIDATORS)
\ No newline at end of file
@@ -4,6 +4,8 @@ Run script for Clinical Roster Builder
 """
 import os
 import sys
+import time
+from sqlalchemy import text
 from app import create_app, db
 from app.models.user import Role
 
@@ -13,16 +15,33 @@ config_name = os.environ.get('FLASK_ENV', 'development')
 # Create application
 app = create_app(config_name)
 
+# Seconds a health check result is reused; probes hit /health every few seconds
+HEALTH_CHECK_TTL = 5.0
+
+# Last health check as one immutable (monotonic time, response body, status
+# code) tuple; rebinding the name swaps all three at once for concurrent readers
+_last_health = (float('-inf'), None, None)
+
 # Health check endpoint
 @app.route('/health')
 def health_check():
     """Health check endpoint for monitoring"""
+    global _last_health
+    now = time.monotonic()
+    checked_at, body, status = _last_health
+    if now - checked_at < HEALTH_CHECK_TTL:
+        return body, status
+    
     try:
-        # Check database connection
-        db.session.execute('SELECT 1')
-        return {'status': 'healthy', 'service': 'clinical-roster'}, 200
+        # Check database connection straight from the pool, without a session
+        with db.engine.connect() as connection:
+            connection.execute(text('SELECT 1'))
+        result = {'status': 'healthy', 'service': 'clinical-roster'}, 200
     except Exception as e:
-        return {'status': 'unhealthy', 'error': str(e)}, 503
+        result = {'status': 'unhealthy', 'error': str(e)}, 503
+    
+    _last_health = (now, *result)
+    return result
 
 # CLI commands
 @app.cli.command()
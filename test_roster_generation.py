@@ -10,7 +10,7 @@ from datetime import datetime
 # Add the app directory to the Python path
 sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
-from app import generate_roster_logic
+from app.roster.utils import generate_roster_logic
 
 def test_roster_generation():
     """Test the roster generation with sample data"""
@@ -50,13 +50,14 @@ def test_roster_generation():
         
         # Show a few sample days
         print(f"\n📅 Sample roster days:")
-        sample_dates = list(result['roster'].keys())[:5]
-        for date in sample_dates:
-            day_data = result['roster'][date]
-            staff_names = ', '.join(day_data['staff'])
-            specialties = ', '.join(day_data['specialties'])
-            weekend = "🌅" if day_data['is_weekend'] else ""
-            print(f"   {date} {weekend}: {staff_names} ({specialties})")
+        roster_df = pd.DataFrame.from_dict(result['roster'], orient='index')
+        sample = roster_df.head()[['staff', 'specialties', 'is_weekend']]
+        sample = sample.assign(
+            staff=sample['staff'].str.join(', '),
+            specialties=sample['specialties'].str.join(', '),
+            is_weekend=sample['is_weekend'].map({True: "🌅", False: ""})
+        )
+        print(sample.to_string())
         
         return True
         
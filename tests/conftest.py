@@ -1,85 +1,177 @@
 """Pytest configuration and fixtures"""
-import pytest
-import tempfile
 import os
+import pytest
+from sqlalchemy import event, orm
+from werkzeug.security import generate_password_hash
+
+# Importing app.config defines ProductionConfig, which refuses to load without
+# these; fall back to the TestingConfig values when there's no .env
+os.environ.setdefault('SECRET_KEY', 'test-secret-key')
+os.environ.setdefault('FIELD_ENCRYPTION_KEY', 'test-encryption-key-do-not-use-in-production=')
+
 from app import create_app, db
-from app.models.user import User, Role
+from app.models.user import User, Role, UserRole
+
+
+# Password hashing is deliberately slow; hash each fixture password once,
+# with the same function User.set_password uses
+_TEST_PW_HASH = generate_password_hash('Test123!')
+_ADMIN_PW_HASH = generate_password_hash('Admin123!')
 
 
 @pytest.fixture(scope='session')
 def app():
     """Create application for testing"""
-    # Create a temporary file for the test database
-    db_fd, db_path = tempfile.mkstemp()
-    
-    # Create app with testing config
+    # Create app with testing config; its in-memory database lives as long
+    # as the engine's single pooled connection
     app = create_app('testing')
-    app.config['SQLALCHEMY_DATABASE_URI'] = f'sqlite:///{db_path}'
     
     with app.app_context():
+        # pysqlite manages transactions itself and breaks SAVEPOINTs; let
+        # SQLAlchemy emit BEGIN so db_session can roll tests back
+        @event.listens_for(db.engine, 'connect')
+        def configure_sqlite(dbapi_connection, connection_record):
+            dbapi_connection.isolation_level = None
+            
+            # Durability is meaningless for a throwaway test database
+            cursor = dbapi_connection.cursor()
+            cursor.execute('PRAGMA synchronous=OFF')
+            cursor.execute('PRAGMA temp_store=MEMORY')
+            cursor.close()
+        
+        @event.listens_for(db.engine, 'begin')
+        def emit_begin(connection):
+            connection.exec_driver_sql('BEGIN')
+        
+        # create_app already opened the pool's only connection, before the
+        # hooks above; replace it (and the empty database with it)
+        db.engine.dispose()
         db.create_all()
         Role.create_default_roles()
     
     yield app
     
-    # Cleanup
-    os.close(db_fd)
-    os.unlink(db_path)
+    # Cleanup; close the session and the pooled connection so no sqlite3
+    # connection is left for the garbage collector
+    with app.app_context():
+        db.session.remove()
+        db.engine.dispose()
 
 
-@pytest.fixture(scope='function')
+@pytest.fixture(scope='session')
 def client(app):
-    """Create a test client"""
+    """Create a test client shared by every test; cookies are reset per test"""
     return app.test_client()
 
 
+@pytest.fixture(autouse=True)
+def reset_client_cookies(request):
+    """Start each test that uses the shared client with no cookies"""
+    # Only looked up when requested, so tests without a client never build the app
+    if 'client' in request.fixturenames:
+        # Werkzeug 2.3+ has no public way to clear all cookies
+        request.getfixturevalue('client')._cookies.clear()
+
+
 @pytest.fixture(scope='function')
 def runner(app):
     """Create a test runner for CLI commands"""
     return app.test_cli_runner()
 
 
-@pytest.fixture(scope='function')
-def auth_client(client, test_user):
-    """Create an authenticated test client"""
-    client.post('/auth/login', data={
+@pytest.fixture(scope='session')
+def auth_cookie(app, test_user):
+    """Log test_user in once and return the signed session cookie value"""
+    login_client = app.test_client()
+    login_client.post('/auth/login', data={
         'email': test_user.email,
         'password': 'Test123!'
     })
+    cookie = login_client.get_cookie(app.config['SESSION_COOKIE_NAME'])
+    return cookie.value if cookie is not None else None
+
+
+@pytest.fixture(scope='function')
+def auth_client(app, client, auth_cookie):
+    """Sign the shared test client in as test_user for one test"""
+    if auth_cookie is not None:
+        client.set_cookie(app.config['SESSION_COOKIE_NAME'], auth_cookie)
     return client
 
 
+# Session-scoped fixtures that write to the database; their data has to be
+# committed for real, outside any test's transaction
+SESSION_DATA_FIXTURES = ('test_user', 'admin_user', 'auth_cookie')
+
+
 @pytest.fixture(scope='function')
+def db_session(app, request):
+    """
+    Run a test inside a transaction that is rolled back afterwards
+    
+    Commits made by the code under test become SAVEPOINT releases, so data
+    created by session-scoped fixtures is left untouched
+    """
+    for name in SESSION_DATA_FIXTURES:
+        if name in request.fixturenames:
+            request.getfixturevalue(name)
+    
+    with app.app_context():
+        connection = db.engine.connect()
+        transaction = connection.begin()
+        app_session = db.session
+        db.session = orm.scoped_session(orm.sessionmaker(
+            bind=connection, join_transaction_mode='create_savepoint'
+        ))
+        
+        yield db.session
+        
+        db.session.remove()
+        db.session = app_session
+        transaction.rollback()
+        connection.close()
+
+
+@pytest.fixture(autouse=True)
+def rollback_database(request):
+    """Roll back whatever a test that uses the app writes to the database"""
+    # Only looked up when requested, so tests without an app never build it
+    if 'app' in request.fixturenames:
+        request.getfixturevalue('db_session')
+
+
+@pytest.fixture(scope='session')
 def test_user(app):
-    """Create a test user"""
+    """Create a test user once for the whole run"""
     with app.app_context():
-        user = User(email='test@example.com')
-        user.set_password('Test123!')
+        user = User(email='test@example.com', password_hash=_TEST_PW_HASH)
         db.session.add(user)
         db.session.commit()
         
-        yield user
+        # Loaded and detached so its attributes stay readable in every test
+        db.session.refresh(user)
+        db.session.expunge(user)
         
-        # Cleanup
-        db.session.delete(user)
-        db.session.commit()
+    return user
 
 
-@pytest.fixture(scope='function')
+@pytest.fixture(scope='session')
 def admin_user(app):
-    """Create an admin user"""
+    """Create an admin user once for the whole run"""
     with app.app_context():
-        from app.security.rbac import PermissionManager
-        
-        admin = User(email='admin@example.com')
-        admin.set_password('Admin123!')
+        admin = User(email='admin@example.com', password_hash=_ADMIN_PW_HASH)
         db.session.add(admin)
-        db.session.commit()
+        db.session.flush()
         
-        PermissionManager.grant_role(admin, Role.ADMIN)
+        # The role is assigned in the same transaction as the user is created;
+        # PermissionManager.grant_role would commit twice more and audit-log it
+        admin_role = Role.query.filter_by(name=Role.ADMIN).one()
+        db.session.add(UserRole(user_id=admin.id, role_id=admin_role.id))
+        db.session.commit()
         
-        yield admin
+        # Loaded and detached, roles included, so it stays readable in every test
+        db.session.refresh(admin)
+        admin.roles
+        db.session.expunge(admin)
         
-        # Cleanup
-        db.session.delete(admin)
-        db.session.commit()
\ No newline at end of file
+    return admin
\ No newline at end of file
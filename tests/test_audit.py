@@ -0,0 +1,114 @@
+"""Tests for app.security.audit report generation"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+from flask import g
+
+from app import db
+from app.models.audit import AuditLog
+from app.security.audit import AuditReportGenerator, audit_log, flush_audit_queue
+
+START = datetime(2024, 3, 1)
+END = datetime(2024, 3, 31)
+
+
+@pytest.fixture
+def logs(app, test_user):
+    """Audit rows for test_user and an anonymous visitor, some outside the period"""
+    with app.app_context():
+        rows = [
+            (test_user.id, AuditLog.ACTION_LOGIN, START + timedelta(days=1)),
+            (test_user.id, AuditLog.ACTION_ROSTER_VIEW, START + timedelta(days=2)),
+            (test_user.id, AuditLog.ACTION_ROSTER_VIEW, START + timedelta(days=3)),
+            (test_user.id, AuditLog.ACTION_ROSTER_EXPORT, START + timedelta(days=4)),
+            (None, AuditLog.ACTION_ROSTER_VIEW, START + timedelta(days=5)),
+            (test_user.id, AuditLog.ACTION_ROSTER_VIEW, END + timedelta(days=1)),
+        ]
+        db.session.add_all(
+            AuditLog(user_id=user_id, action=action, timestamp=timestamp, details={'n': n})
+            for n, (user_id, action, timestamp) in enumerate(rows)
+        )
+        db.session.commit()
+        yield
+
+
+def test_user_activity_report_counts(app, test_user, logs):
+    with app.app_context():
+        report = AuditReportGenerator.generate_user_activity_report(test_user.id, START, END)
+    
+    assert report['total_actions'] == 4
+    assert report['actions_by_type'] == {
+        AuditLog.ACTION_LOGIN: 1, AuditLog.ACTION_ROSTER_VIEW: 2, AuditLog.ACTION_ROSTER_EXPORT: 1
+    }
+    # A list by default, newest first, with ISO timestamps
+    assert isinstance(report['logs'], list)
+    assert [log['details']['n'] for log in report['logs']] == [3, 2, 1, 0]
+    assert report['logs'][0]['timestamp'] == (START + timedelta(days=4)).isoformat()
+
+
+def test_phi_access_report_counts_anonymous_access(app, test_user, logs):
+    with app.app_context():
+        report = AuditReportGenerator.generate_phi_access_report(START, END)
+    
+    assert report['total_accesses'] == 4
+    assert report['unique_users'] == 1
+    assert report['accesses_by_user'] == {test_user.id: 3, 'anonymous': 1}
+    assert len(report['logs']) == 4
+
+
+def test_streamed_report_encodes_like_the_list_report(app, test_user, logs):
+    with app.app_context():
+        listed = AuditReportGenerator.generate_phi_access_report(START, END)
+        streamed = AuditReportGenerator.generate_phi_access_report(START, END, stream=True)
+        assert not isinstance(streamed['logs'], list)
+        
+        text = ''.join(AuditReportGenerator.iter_json(streamed))
+    
+    # JSON turns the integer user id keys into strings
+    assert json.loads(text) == json.loads(json.dumps(listed))
+
+@audit_log(AuditLog.ACTION_ROSTER_VIEW, resource_type='roster')
+def view_roster(**kwargs):
+    if kwargs.get('fail'):
+        raise RuntimeError('view failed')
+    return 'ok'
+
+
+@pytest.fixture
+def batched(app, monkeypatch):
+    """Queue entries for after_request, as setup_audit_logging does outside tests"""
+    monkeypatch.setitem(app.extensions, 'audit_logging', True)
+
+
+def test_audit_entries_are_queued_and_written_in_one_batch(app, batched):
+    with app.test_request_context('/roster/5'):
+        view_roster(id=5)
+        with pytest.raises(RuntimeError):
+            view_roster(id=6, fail=True)
+        
+        assert len(g._audit_queue) == 2
+        assert AuditLog.query.count() == 0
+        
+        flush_audit_queue(200)
+        assert '_audit_queue' not in g
+        
+        statuses = dict(db.session.query(AuditLog.resource_id, AuditLog.response_status))
+        assert statuses == {5: 200, 6: 500}
+        assert AuditLog.query.filter_by(request_path='/roster/5').count() == 2
+
+
+def test_audit_entries_are_written_at_once_without_request_hooks(app):
+    with app.test_request_context('/roster/5'):
+        view_roster(id=5)
+        assert AuditLog.query.one().resource_id == 5
+
+def test_audit_details_keep_only_safe_view_kwargs(app):
+    with app.test_request_context('/roster/5'):
+        view_roster(id=5, filename='march.xlsx', staff_name='Dr Tan', password='hunter2', token='abc')
+        details = AuditLog.query.one().details
+    
+    assert details == {
+        'function': 'view_roster',
+        'args': {'filename': 'march.xlsx', 'staff_name': 'Dr Tan'}
+    }
\ No newline at end of file
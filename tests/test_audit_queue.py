@@ -0,0 +1,67 @@
+"""Tests for app.security.audit_queue"""
+from datetime import datetime
+
+import pytest
+
+from app.models.audit import SecurityEvent
+from app.security import audit_queue
+
+
+@pytest.fixture
+def fresh_queue(monkeypatch):
+    """Run against a new queue and no writer thread, restoring the module's own afterwards"""
+    for name in ('_queue', '_worker', '_worker_lock'):
+        monkeypatch.setattr(audit_queue, name, getattr(audit_queue, name))
+    audit_queue._reset_after_fork()
+
+
+def queue_rows(app, count):
+    for i in range(count):
+        audit_queue._queue.put((app, {
+            'event_type': SecurityEvent.EVENT_UNAUTHORIZED_ACCESS,
+            'severity': 'warning',
+            'timestamp': datetime.utcnow(),
+            'description': f'event {i}',
+        }))
+
+
+def stored_events(app):
+    with app.app_context():
+        return SecurityEvent.query.filter(SecurityEvent.description.like('event %')).count()
+
+
+def test_flush_at_exit_without_worker_writes_queued_events(app, fresh_queue):
+    queue_rows(app, 3)
+    
+    audit_queue.flush_at_exit()
+    
+    assert stored_events(app) == 3
+    assert audit_queue._queue.empty()
+
+
+def test_flush_at_exit_drains_through_running_worker(app, fresh_queue):
+    audit_queue._ensure_worker()
+    worker = audit_queue._worker
+    queue_rows(app, audit_queue.BATCH_SIZE + 5)
+    
+    audit_queue.flush_at_exit()
+    
+    assert not worker.is_alive()
+    assert stored_events(app) == audit_queue.BATCH_SIZE + 5
+
+
+def test_reset_after_fork_drops_parent_queue_and_worker(app, fresh_queue):
+    audit_queue._ensure_worker()
+    parent_queue, parent_worker = audit_queue._queue, audit_queue._worker
+    queue_rows(app, 1)
+    
+    audit_queue._reset_after_fork()
+    
+    assert audit_queue._worker is None
+    assert audit_queue._queue is not parent_queue
+    assert audit_queue._queue.empty()
+    
+    # Stop the parent's writer, which is still running in this process
+    parent_queue.put(audit_queue._STOP)
+    parent_worker.join(audit_queue.EXIT_FLUSH_TIMEOUT)
+    assert stored_events(app) == 1
\ No newline at end of file
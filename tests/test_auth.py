@@ -0,0 +1,43 @@
+"""Tests for login and the authenticated client fixtures"""
+from flask import session
+
+
+def test_anonymous_client_sees_login_page(client):
+    assert client.get('/auth/login').status_code == 200
+
+
+def test_login_with_valid_credentials(client, test_user):
+    response = client.post('/auth/login', data={
+        'email': test_user.email,
+        'password': 'Test123!'
+    })
+    assert response.status_code == 302
+    
+    with client:
+        client.get('/auth/login')
+        assert session['_user_id'] == str(test_user.id)
+
+
+def test_login_with_wrong_password(client, test_user):
+    response = client.post('/auth/login', data={
+        'email': test_user.email,
+        'password': 'Wrong123!'
+    })
+    assert response.status_code == 200
+    assert b'Invalid email or password' in response.data
+
+
+def test_auth_client_is_signed_in(app, auth_client, auth_cookie):
+    assert auth_cookie is not None
+    assert auth_client.get_cookie(app.config['SESSION_COOKIE_NAME']).value == auth_cookie
+    
+    # Signed-in users are sent on from the login page
+    response = auth_client.get('/auth/login')
+    assert response.status_code == 302
+    assert response.headers['Location'] == '/'
+
+
+def test_cookies_do_not_leak_between_tests(app, client):
+    # Runs after test_auth_client_is_signed_in on the same shared client
+    assert client.get_cookie(app.config['SESSION_COOKIE_NAME']) is None
+    assert client.get('/auth/login').status_code == 200
\ No newline at end of file
@@ -0,0 +1,206 @@
+"""Tests for app.rostering.constraints against plain-Python reference checks"""
+from datetime import date, timedelta
+from statistics import mean, pvariance
+
+import numpy as np
+import pytest
+
+from app.rostering.csp import RosterCSP
+from app.rostering.constraints import (
+    MinimumStaffConstraint, MaxConsecutiveDaysConstraint, MinRestPeriodConstraint,
+    SpecialtyCoverageConstraint, FairWorkloadConstraint, WeekendPreferenceConstraint,
+    HolidayDistributionConstraint, TeamPreferenceConstraint
+)
+
+STAFF = ['alice', 'bob', 'chen', 'devi', 'eli', 'farah']
+# Starts on a Monday, so 2024-01-06/07 and 2024-01-13/14 are weekends
+DATES = [(date(2024, 1, 1) + timedelta(days=d)).isoformat() for d in range(14)]
+SPECIALTIES = {'alice': 'cardio', 'bob': 'cardio', 'chen': 'neuro', 'devi': 'neuro',
+               'eli': 'ortho', 'farah': 'ortho'}
+
+SEEDS = range(20)
+
+
+@pytest.fixture
+def csp():
+    return RosterCSP(STAFF, DATES, SPECIALTIES)
+
+
+def boards(density=0.5):
+    """Seeded random assignment matrices"""
+    for seed in SEEDS:
+        rng = np.random.default_rng(seed)
+        yield (rng.random((len(STAFF), len(DATES))) < density).astype(np.int8)
+
+
+def work_days(A, s):
+    return [d for d in range(A.shape[1]) if A[s, d]]
+
+
+@pytest.mark.parametrize('min_staff', [1, 2, 3])
+def test_minimum_staff(csp, min_staff):
+    constraint = MinimumStaffConstraint(min_staff, DATES, STAFF)
+    csp.add_constraint(constraint)
+    for A in boards():
+        short = [DATES[d] for d in range(len(DATES)) if sum(A[:, d]) < min_staff]
+        assert constraint.check(A) == (not short)
+        assert constraint.get_violated_assignments(A) == short
+
+
+@pytest.mark.parametrize('max_days', [1, 3, 5])
+def test_max_consecutive_days(csp, max_days):
+    constraint = MaxConsecutiveDaysConstraint(max_days, DATES, STAFF)
+    csp.add_constraint(constraint)
+    for A in boards(0.7):
+        violators = []
+        for s, staff in enumerate(STAFF):
+            run = longest = 0
+            for value in A[s]:
+                run = run + 1 if value else 0
+                longest = max(longest, run)
+            if longest > max_days:
+                violators.append(staff)
+        assert constraint.check(A) == (not violators)
+        assert constraint.get_violated_staff(A) == violators
+
+
+def test_violations_are_named_after_the_csp_rows_and_columns(csp):
+    # Built with a reordered subset of the CSP's staff and dates
+    shortage = MinimumStaffConstraint(1, DATES[:3][::-1], STAFF[:2][::-1])
+    streak = MaxConsecutiveDaysConstraint(2, DATES[:3][::-1], STAFF[:2][::-1])
+    csp.add_constraint(shortage)
+    csp.add_constraint(streak)
+    A = np.zeros((len(STAFF), len(DATES)), dtype=np.int8)
+    A[:, :10] = 1
+    A[STAFF.index('eli'), 10:] = 1
+    
+    assert shortage.get_violated_assignments(A) == []
+    A[STAFF.index('eli'), 12] = 0
+    assert shortage.get_violated_assignments(A) == [DATES[12]]
+    assert streak.get_violated_staff(A) == STAFF
+
+
+@pytest.mark.parametrize('min_rest_days', [0, 1, 2])
+def test_min_rest_period(csp, min_rest_days):
+    constraint = MinRestPeriodConstraint(min_rest_days, DATES, STAFF)
+    csp.add_constraint(constraint)
+    for A in boards(0.3):
+        rested = all(
+            later - earlier - 1 >= min_rest_days
+            for s in range(len(STAFF))
+            for earlier, later in zip(work_days(A, s), work_days(A, s)[1:])
+        )
+        assert constraint.check(A) == rested
+
+
+@pytest.mark.parametrize('min_specialties', [1, 2, 3])
+def test_specialty_coverage(csp, min_specialties):
+    constraint = SpecialtyCoverageConstraint(SPECIALTIES, DATES, min_specialties)
+    csp.add_constraint(constraint)
+    for A in boards(0.3):
+        covered = all(
+            len({SPECIALTIES[STAFF[s]] for s in range(len(STAFF)) if A[s, d]}) >= min_specialties
+            for d in range(len(DATES))
+        )
+        assert constraint.check(A) == covered
+
+
+def test_specialty_coverage_during_search(csp):
+    constraint = SpecialtyCoverageConstraint(SPECIALTIES, DATES)
+    csp.add_constraint(constraint)
+    A = np.zeros((len(STAFF), len(DATES)), dtype=np.int8)
+    assigned = np.zeros(A.shape, dtype=bool)
+    
+    # Nothing decided yet: every specialty can still be covered
+    assert constraint.check(A, assigned)
+    
+    # alice on and bob off: cardio is covered, the others are still open
+    assigned[:2, 0] = True
+    A[0, 0] = 1
+    assert constraint.check(A, assigned)
+    
+    # chen and devi off: neuro can no longer be covered on day 0
+    assigned[2:4, 0] = True
+    assert not constraint.check(A, assigned)
+
+
+def test_minimum_staff_during_search(csp):
+    constraint = MinimumStaffConstraint(2, DATES, STAFF)
+    csp.add_constraint(constraint)
+    A = np.zeros((len(STAFF), len(DATES)), dtype=np.int8)
+    assigned = np.zeros(A.shape, dtype=bool)
+    
+    # Undecided slots may still be filled
+    assert constraint.check(A, assigned)
+    
+    # Four of six decided off on day 0 leaves exactly two slots
+    assigned[:4, 0] = True
+    assert constraint.check(A, assigned)
+    
+    # A fifth decided off leaves day 0 short
+    assigned[4, 0] = True
+    assert not constraint.check(A, assigned)
+    
+    # Unless one of the decided slots is a shift
+    A[0, 0] = 1
+    assert constraint.check(A, assigned)
+
+
+def test_fair_workload_penalty(csp):
+    constraint = FairWorkloadConstraint(STAFF, weight=10.0, max_variance=2.0)
+    csp.add_constraint(constraint)
+    for A in boards():
+        variance = pvariance([int(sum(row)) for row in A])
+        expected = 10.0 * (variance - 2.0) if variance > 2.0 else 0.0
+        assert constraint.penalty(A) == pytest.approx(expected)
+
+
+def test_weekend_preference_penalty(csp):
+    preferences = {'alice': 1.0, 'bob': 0.5, 'chen': 10.0}
+    # Only the first week's dates are covered by the constraint
+    constraint = WeekendPreferenceConstraint(preferences, DATES[:7], weight=5.0)
+    csp.add_constraint(constraint)
+    assert constraint.weekend_dates == {'2024-01-06', '2024-01-07'}
+    for A in boards():
+        expected = sum(
+            5.0 * preferences.get(staff, 5.0) * (A[s, 5] + A[s, 6])
+            for s, staff in enumerate(STAFF)
+        )
+        assert constraint.penalty(A) == pytest.approx(expected)
+
+
+def test_holiday_distribution_penalty(csp):
+    holidays = {'2024-01-01', '2024-01-10', '2025-12-25'}
+    history = {'alice': 3, 'chen': 1, 'gita': 2}
+    # gita is not in the CSP and only contributes history
+    staff = STAFF + ['gita']
+    constraint = HolidayDistributionConstraint(holidays, history, staff, weight=8.0)
+    csp.add_constraint(constraint)
+    for A in boards():
+        totals = [
+            history.get(name, 0) + (int(A[s, 0] + A[s, 9]) if s < len(STAFF) else 0)
+            for s, name in enumerate(staff)
+        ]
+        average = mean(totals)
+        expected = 8.0 * sum((total - average) ** 2 for total in totals)
+        assert constraint.penalty(A) == pytest.approx(expected)
+
+
+def test_team_preference_penalty(csp):
+    # gita is not in the CSP: never working, with preferences ignored
+    preferences = {'alice': ['bob', 'chen'], 'devi': ['gita', 'eli'], 'gita': ['alice']}
+    constraint = TeamPreferenceConstraint(preferences, DATES[3:10], weight=3.0)
+    csp.add_constraint(constraint)
+    for A in boards():
+        missing = 0
+        for staff, teammates in preferences.items():
+            if staff not in STAFF:
+                continue
+            s = STAFF.index(staff)
+            for d in range(3, 10):
+                if A[s, d]:
+                    missing += sum(
+                        1 for mate in teammates
+                        if mate not in STAFF or not A[STAFF.index(mate), d]
+                    )
+        assert constraint.penalty(A) == pytest.approx(3.0 * missing)
\ No newline at end of file
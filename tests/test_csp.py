@@ -0,0 +1,199 @@
+"""Tests for app.rostering.csp"""
+from datetime import date, timedelta
+
+import numpy as np
+
+from app.rostering import csp as csp_module
+from app.rostering.csp import (
+    Constraint, ConstraintType, EVAL_CACHE_SIZE, RosterCSP, Snapshot,
+    DOMAIN_ZERO, DOMAIN_ONE, DOMAIN_FULL
+)
+from app.rostering.constraints import (
+    MinimumStaffConstraint, MaxConsecutiveDaysConstraint, MinRestPeriodConstraint
+)
+
+
+class CountingConstraint(Constraint):
+    """Satisfied while nobody works day 0; counts check() calls"""
+    __slots__ = ('checks',)
+    uses_assigned_mask = True
+    
+    def __init__(self):
+        super().__init__('counting', ConstraintType.HARD)
+        self.checks = 0
+    
+    def check(self, A, assigned=None):
+        self.checks += 1
+        return not A[:, 0].any()
+
+
+def test_evaluate_memoizes_by_board_contents():
+    constraint = CountingConstraint()
+    A = np.zeros((100, 365), dtype=np.int8)
+    assigned = np.zeros(A.shape, dtype=bool)
+    
+    assert constraint.evaluate(A, assigned)
+    assert constraint.evaluate(A.copy(), assigned.copy())
+    assert constraint.checks == 1
+    
+    # A changed cell, or a changed mask, is a different board
+    A[0, 0] = 1
+    assert not constraint.evaluate(A, assigned)
+    assigned[0, 0] = True
+    assert not constraint.evaluate(A, assigned)
+    assert constraint.checks == 3
+    
+    # Non-contiguous views are keyed by their contents too
+    assert not constraint.evaluate(A[:, ::2], assigned[:, ::2])
+    assert constraint.checks == 4
+
+
+def test_evaluate_cache_is_bounded():
+    constraint = CountingConstraint()
+    A = np.zeros((4, 4), dtype=np.int8)
+    
+    for i in range(EVAL_CACHE_SIZE * 2):
+        A.flat[:] = np.frombuffer(i.to_bytes(16, 'little'), dtype=np.int8)
+        constraint.evaluate(A)
+    
+    assert len(constraint._eval_cache) <= EVAL_CACHE_SIZE
+    assert all(len(digest) == 16 for _, digest in constraint._eval_cache)
+
+def make_csp(n_staff=3, n_dates=4):
+    staff = [f's{s}' for s in range(n_staff)]
+    dates = [(date(2024, 1, 1) + timedelta(days=d)).isoformat() for d in range(n_dates)]
+    return RosterCSP(staff, dates, {})
+
+
+def test_assignment_dict_round_trip():
+    csp = make_csp()
+    assignment = {('s0', '2024-01-01'): 1, ('s2', '2024-01-04'): 1, ('s1', '2024-01-02'): 0,
+                  ('nobody', '2024-01-01'): 1, ('s0', '1999-01-01'): 1}
+    
+    A = csp.assignment_dict_to_array(assignment)
+    assert A.dtype == np.int8
+    assert np.argwhere(A).tolist() == [[0, 0], [2, 3]]
+    
+    # Every slot comes back, unknown staff and dates are dropped
+    back = csp.array_to_assignment_dict(A)
+    assert len(back) == 12
+    assert {var for var, value in back.items() if value} == {('s0', '2024-01-01'), ('s2', '2024-01-04')}
+
+def test_assign_and_unassign_track_unassigned_variables():
+    csp = make_csp()
+    assert len(csp.get_unassigned_variables()) == 12
+    
+    for var in [(s, d) for s in range(3) for d in range(4)]:
+        csp.assign(var, 1)
+    assert csp.is_complete()
+    
+    csp.unassign((1, 2))
+    assert csp.get_unassigned_variables() == {(1, 2)}
+    assert csp.A[1, 2] == 0 and not csp.assigned[1, 2]
+    
+    # Bulk edits go through sync_unassigned
+    csp.assigned[:, 0] = False
+    csp.sync_unassigned()
+    assert csp.get_unassigned_variables() == {(0, 0), (1, 0), (2, 0), (1, 2)}
+    
+    csp.clear_assignment()
+    assert len(csp.get_unassigned_variables()) == 12 and not csp.A.any()
+
+def test_weekdays_are_parsed_once_for_all_dates():
+    dates = [(date(2023, 12, 25) + timedelta(days=d)).isoformat() for d in range(400)]
+    csp = RosterCSP(['s0'], dates, {})
+    
+    assert csp.weekday.tolist() == [date.fromisoformat(day).weekday() for day in dates]
+
+def test_parallel_hard_checks_agree_with_serial_checks(monkeypatch):
+    csp = make_csp(n_staff=6, n_dates=14)
+    csp.add_constraint(MinimumStaffConstraint(1, csp.dates, csp.staff))
+    csp.add_constraint(MaxConsecutiveDaysConstraint(4, csp.dates, csp.staff))
+    csp.add_constraint(MinRestPeriodConstraint(0, csp.dates, csp.staff))
+    rng = np.random.default_rng(0)
+    boards = [(rng.random(csp.A.shape) < rng.uniform(0.2, 0.6)).astype(np.int8) for _ in range(50)]
+    
+    monkeypatch.setattr(csp_module, '_check_pool', None)
+    serial = [csp.is_consistent(A) for A in boards]
+    assert csp_module._check_pool is None
+    
+    # Clear memoized results so the parallel run checks every board again
+    for constraint in csp.get_hard_constraints():
+        constraint._eval_cache.clear()
+    monkeypatch.setattr(csp_module, 'PARALLEL_CHECK_MIN_CELLS', 0)
+    monkeypatch.setattr(csp_module.os, 'cpu_count', lambda: 4)
+    
+    assert [csp.is_consistent(A) for A in boards] == serial
+    assert True in serial and False in serial
+    
+    # Every CSP checks on the one shared pool, so solving leaves no threads behind
+    pool = csp_module._check_pool
+    assert pool is not None
+    other = make_csp(n_staff=6, n_dates=14)
+    other.add_constraint(MinimumStaffConstraint(1, other.dates, other.staff))
+    other.add_constraint(MaxConsecutiveDaysConstraint(4, other.dates, other.staff))
+    other.is_consistent(boards[0])
+    assert csp_module._check_pool is pool
+    pool.shutdown()
+
+def test_domain_values_decode_the_bitmask():
+    csp = make_csp()
+    csp.dom[0, 0] = DOMAIN_ZERO
+    csp.dom[0, 1] = DOMAIN_ONE
+    csp.dom[0, 2] = 0
+    
+    assert [csp.domain_values((0, d)) for d in range(4)] == [[0], [1], [], [0, 1]]
+    assert csp.order_domain_values((0, 3)) == [1, 0]
+
+def test_domain_changes_are_undone_from_the_trail():
+    csp = make_csp()
+    before = csp.dom.copy()
+    mark = csp.trail_mark()
+    
+    assert csp.inference((0, 0), 1) is csp.dom
+    csp.reduce_domain((1, 1), DOMAIN_ZERO)
+    # Narrowing to a superset of the domain records nothing
+    csp.reduce_domain((1, 1), DOMAIN_FULL)
+    inner = csp.trail_mark()
+    assert inner == mark + 2
+    
+    # An emptied domain is reported as an inconsistency
+    csp.reduce_domain((2, 2), DOMAIN_ONE)
+    assert csp.inference((2, 2), 0) is None
+    
+    csp.restore_domains(inner)
+    assert csp.dom[2, 2] == DOMAIN_FULL
+    assert csp.dom[0, 0] == DOMAIN_ONE
+    
+    csp.restore_domains(mark)
+    assert (csp.dom == before).all()
+
+def test_statistics_from_row_and_column_sums():
+    csp = make_csp()
+    csp.add_constraint(MinimumStaffConstraint(1, csp.dates, csp.staff))
+    A = np.array([[1, 0, 1, 0], [1, 1, 0, 0], [0, 0, 0, 1]], dtype=np.int8)
+    
+    stats = csp.get_statistics(A)
+    
+    assert stats['total_slots'] == 12
+    assert stats['assigned_slots'] == 5
+    assert stats['coverage_by_date'] == dict(zip(csp.dates, [2, 1, 1, 1]))
+    assert stats['workload_by_staff'] == {'s0': 2, 's1': 2, 's2': 1}
+    assert stats['hard_constraints_satisfied'] is True
+    assert stats['soft_constraint_penalty'] == 0.0
+
+def test_snapshot_reverts_trial_edits():
+    csp = make_csp()
+    csp.assign((0, 0), 1)
+    csp.assign((1, 1), 0)
+    A, assigned, unassigned = csp.A.copy(), csp.assigned.copy(), set(csp.get_unassigned_variables())
+    
+    with Snapshot(csp) as snapshot:
+        snapshot.set((0, 0), 0)
+        snapshot.set((2, 3), 1)
+        # Setting a cell twice still restores its original value
+        snapshot.set((2, 3), 0)
+        assert csp.A[0, 0] == 0 and csp.assigned[2, 3]
+    
+    assert (csp.A == A).all() and (csp.assigned == assigned).all()
+    assert csp.get_unassigned_variables() == unassigned
\ No newline at end of file
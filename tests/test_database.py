@@ -0,0 +1,42 @@
+"""Tests for the per-test database rollback fixtures"""
+from app import db
+from app.models.user import User, Role
+
+ROLLED_BACK_EMAIL = 'rolled-back@example.com'
+
+
+def test_committed_writes_are_visible_within_the_test(app):
+    with app.app_context():
+        db.session.add(User(email=ROLLED_BACK_EMAIL, password_hash='x'))
+        db.session.commit()
+        
+        assert User.query.filter_by(email=ROLLED_BACK_EMAIL).count() == 1
+
+
+def test_committed_writes_are_rolled_back_after_the_test(app):
+    # Runs after the test above committed ROLLED_BACK_EMAIL
+    with app.app_context():
+        assert User.query.filter_by(email=ROLLED_BACK_EMAIL).count() == 0
+
+
+def test_session_fixture_data_survives_rollback(app, test_user, admin_user):
+    with app.app_context():
+        assert db.session.get(User, test_user.id).email == test_user.email
+        admin = db.session.get(User, admin_user.id)
+        assert [role.name for role in admin.roles] == [Role.ADMIN]
+        
+        # Seeded once by the app fixture
+        assert Role.query.count() == 4
+
+
+def test_session_fixture_data_survives_deletes(app, test_user):
+    with app.app_context():
+        db.session.delete(db.session.get(User, test_user.id))
+        db.session.commit()
+        assert db.session.get(User, test_user.id) is None
+
+
+def test_deleted_fixture_user_is_restored(app, test_user):
+    # Runs after the test above deleted test_user
+    with app.app_context():
+        assert db.session.get(User, test_user.id) is not None
\ No newline at end of file
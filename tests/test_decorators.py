@@ -0,0 +1,153 @@
+"""Tests for app.utils.decorators"""
+import types
+
+import pytest
+import redis
+from flask import Flask
+from flask_login import LoginManager
+
+from app.utils import decorators
+from app.utils.decorators import measure_performance, rate_limit, RATE_LIMIT_RETRY_SECONDS
+
+
+class FakeClock:
+    """Stands in for the time module inside decorators"""
+    
+    def __init__(self, now=1000.0):
+        self.now = now
+    
+    def time(self):
+        return self.now
+
+    def perf_counter_ns(self):
+        return int(self.now * 1e9)
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    clock = FakeClock()
+    monkeypatch.setattr(decorators, 'time', types.SimpleNamespace(
+        time=clock.time, perf_counter_ns=clock.perf_counter_ns
+    ))
+    return clock
+
+
+@pytest.fixture
+def limited_app():
+    """Minimal app with one view allowing 3 calls per minute"""
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test'
+    LoginManager(app).user_loader(lambda user_id: None)
+    
+    @app.route('/limited')
+    @rate_limit(calls=3, period=60)
+    def limited():
+        return 'ok'
+    
+    return app
+
+
+def statuses(app, count):
+    client = app.test_client()
+    return [client.get('/limited').status_code for _ in range(count)]
+
+
+def test_rate_limit_without_redis_counts_per_process(limited_app, clock):
+    assert statuses(limited_app, 4) == [200, 200, 200, 429]
+    
+    # One token is back after period / calls seconds
+    clock.now += 20
+    assert statuses(limited_app, 2) == [200, 429]
+
+
+def test_rate_limit_retries_redis_after_backoff(limited_app, clock):
+    calls = []
+    
+    def bucket(keys, args):
+        calls.append(keys)
+        if len(calls) == 1:
+            raise redis.ConnectionError('blip')
+        return 1
+    
+    limited_app.extensions['rate_limit_bucket'] = bucket
+    
+    # The failing call and those during the backoff are counted locally
+    assert statuses(limited_app, 2) == [200, 200]
+    assert len(calls) == 1
+    
+    # Redis is used again once the backoff has passed
+    clock.now += RATE_LIMIT_RETRY_SECONDS
+    assert statuses(limited_app, 5) == [200] * 5
+    assert len(calls) == 6
+
+
+def test_rate_limit_shares_a_bounded_redis_pool(limited_app, clock):
+    limited_app.config['RATELIMIT_STORAGE_URL'] = 'redis://localhost:6379/1'
+    limited_app.config['REDIS_POOL_SIZE'] = 4
+    
+    with limited_app.app_context():
+        bucket = decorators._rate_limit_bucket(clock.now)
+    
+    client = decorators.redis_client(limited_app, 'redis://localhost:6379/1')
+    assert bucket.registered_client is client
+    assert isinstance(client.connection_pool, redis.BlockingConnectionPool)
+    assert client.connection_pool.max_connections == 4
+    assert client.connection_pool.connection_kwargs['socket_timeout'] == 1.0
+
+
+@pytest.mark.parametrize('seconds, logged', [(0.5, False), (1.0, False), (1.5, True)])
+def test_measure_performance_logs_slow_calls(clock, caplog, seconds, logged):
+    @measure_performance
+    def work():
+        clock.now += seconds
+        return 'done'
+    
+    with caplog.at_level('WARNING', logger=decorators.logger.name):
+        assert work() == 'done'
+    
+    expected = [f"Slow operation: work took {seconds * 1000:.2f}ms"] if logged else []
+    assert caplog.messages == expected
+
+
+def test_measure_performance_logs_and_reraises_errors(clock, caplog):
+    @measure_performance
+    def work():
+        clock.now += 0.25
+        raise ValueError('bad roster')
+    
+    with caplog.at_level('ERROR', logger=decorators.logger.name), pytest.raises(ValueError):
+        work()
+    
+    assert caplog.messages == ["Error in work after 250.00ms: bad roster"]
+
+@decorators.log_activity('roster_export', resource_type='roster')
+def export(fail=False):
+    if fail:
+        raise RuntimeError('export failed')
+    return 'exported'
+
+
+def test_log_activity_logs_the_action_once(limited_app, caplog):
+    with limited_app.test_request_context(), caplog.at_level('INFO', logger=decorators.logger.name):
+        assert export() == 'exported'
+    
+    assert caplog.messages == ["User anonymous performing roster_export on roster"]
+
+
+def test_log_activity_reports_failures_after_the_call(limited_app, caplog):
+    with limited_app.test_request_context(), caplog.at_level('INFO', logger=decorators.logger.name):
+        with pytest.raises(RuntimeError):
+            export(fail=True)
+    
+    assert caplog.messages == [
+        "User anonymous performing roster_export on roster",
+        "Action roster_export failed",
+    ]
+
+
+def test_log_activity_skips_the_user_lookup_below_info(caplog):
+    # No request context: reading current_user here would raise
+    with caplog.at_level('WARNING', logger=decorators.logger.name):
+        assert export() == 'exported'
+    
+    assert caplog.messages == []
\ No newline at end of file
@@ -0,0 +1,89 @@
+"""Tests for app.security.encryption"""
+import base64
+
+import pytest
+from cryptography.fernet import Fernet
+from flask import Flask
+
+from app.security.encryption import EncryptedField, FieldEncryption, SecureDataHandler, _get_field_encryption
+
+
+@pytest.fixture
+def key():
+    return Fernet.generate_key()
+
+
+@pytest.fixture
+def encryption(key):
+    return FieldEncryption(key)
+
+
+@pytest.fixture
+def app_context():
+    """decrypt() logs failures through current_app"""
+    with Flask(__name__).app_context():
+        yield
+
+
+@pytest.mark.parametrize('value', ['S1234567A', 'Dr. Tan Wei Ming – café ☕', 'x' * 1000])
+def test_round_trip(encryption, value):
+    assert encryption.decrypt(encryption.encrypt(value)) == value
+
+
+def test_encrypt_uses_a_fresh_nonce(encryption):
+    assert encryption.encrypt('S1234567A') != encryption.encrypt('S1234567A')
+
+
+def test_stored_format_is_base64_nonce_ciphertext_tag(encryption):
+    raw = base64.urlsafe_b64decode(encryption.encrypt('abc'))
+    # 12-byte nonce, 3 bytes of ciphertext, 16-byte GCM tag
+    assert len(raw) == FieldEncryption.NONCE_SIZE + 3 + 16
+
+
+def test_decrypts_legacy_fernet_rows(key, encryption):
+    # Rows written before AES-GCM stored base64(Fernet token)
+    legacy = base64.urlsafe_b64encode(Fernet(key).encrypt('S1234567A'.encode())).decode()
+    assert encryption.decrypt(legacy) == 'S1234567A'
+
+
+def test_empty_values_stay_empty(encryption):
+    assert encryption.encrypt('') is None
+    assert encryption.decrypt('') is None
+    assert encryption.decrypt(None) is None
+
+
+def test_wrong_key_or_tampering_gives_none(encryption, app_context):
+    token = encryption.encrypt('S1234567A')
+    assert FieldEncryption(Fernet.generate_key()).decrypt(token) is None
+    
+    raw = bytearray(base64.urlsafe_b64decode(token))
+    raw[-1] ^= 1
+    assert encryption.decrypt(base64.urlsafe_b64encode(bytes(raw)).decode()) is None
+
+
+@pytest.mark.parametrize('filename, expected', [
+    ('../../etc/passwd', 'passwd'),
+    ('a/b\\c.txt', 'bc.txt'),
+    ('ro\x00ta.csv', 'rota.csv'),
+    ('rota..xlsx', 'rota.xlsx'),
+    ('report.v2.xlsx', 'report.v2.xlsx'),
+    ('..', ''),
+    ('...', ''),
+    ('x' * 150 + '.csv', 'x' * 100 + '.csv'),
+])
+def test_sanitize_filename(filename, expected):
+    assert SecureDataHandler.sanitize_filename(filename) == expected
+
+def test_encrypted_columns_share_one_cipher(monkeypatch):
+    monkeypatch.setenv('FIELD_ENCRYPTION_KEY', Fernet.generate_key().decode())
+    _get_field_encryption.cache_clear()
+    try:
+        nric, name = EncryptedField(255), EncryptedField(100)
+        assert nric.encryption is name.encryption
+        
+        stored = nric.process_bind_param('S1234567A', None)
+        assert stored != 'S1234567A'
+        assert name.process_result_value(stored, None) == 'S1234567A'
+        assert nric.process_bind_param(None, None) is None
+    finally:
+        _get_field_encryption.cache_clear()
\ No newline at end of file
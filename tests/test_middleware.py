@@ -0,0 +1,303 @@
+"""Tests for app.security.middleware"""
+import time
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Blueprint, Flask
+from flask_login import LoginManager, UserMixin, login_user
+
+from app.security import middleware
+from app.security.middleware import SUSPICIOUS_PATTERNS, IPBlocker, build_pattern_matcher, request_kind
+
+
+@pytest.mark.parametrize('path, kind', [
+    ('/api/v1/roster', 'api'),
+    ('/static/css/site.css', 'static'),
+    ('/auth/login', 'auth'),
+    ('/favicon.ico', 'static'),
+    ('/robots.txt', 'static'),
+    ('/robots.txtanything', 'other'),
+    ('/favicon.ico/../admin', 'other'),
+    ('/apiary', 'other'),
+    ('/', 'other'),
+])
+def test_request_kind(path, kind):
+    with Flask(__name__).test_request_context(path):
+        assert request_kind() == kind
+
+@pytest.fixture(params=['ahocorasick', 'regex'])
+def matcher_backend(request, monkeypatch):
+    if request.param == 'ahocorasick':
+        if not middleware.AHOCORASICK_AVAILABLE:
+            pytest.skip("pyahocorasick not installed")
+    else:
+        monkeypatch.setattr(middleware, 'AHOCORASICK_AVAILABLE', False)
+    return request.param
+
+
+@pytest.mark.parametrize('text, pattern', [
+    ('/roster?file=../../etc/passwd', '../'),
+    ('name=<SCRIPT>alert(1)</script>', '<script'),
+    ("id=1 union select password", 'UNION SELECT'),
+    ('x; DROP table users', 'DROP TABLE'),
+    ('/roster?date=2024-01-01', None),
+    ('', None),
+])
+def test_pattern_matcher(matcher_backend, text, pattern):
+    find = build_pattern_matcher(SUSPICIOUS_PATTERNS)
+    assert find(text) == pattern
+
+@pytest.fixture
+def security_events(monkeypatch):
+    """Security events logged by the middleware, instead of writing them to the database"""
+    events = []
+    monkeypatch.setattr(middleware, 'log_security_event',
+                        lambda event_type, **kwargs: events.append((event_type, kwargs)))
+    return events
+
+
+@pytest.fixture
+def validating_client(matcher_backend):
+    """Client of an app with only request validation installed"""
+    app = Flask(__name__)
+    middleware.setup_request_validation(app)
+    
+    @app.route('/form', methods=['POST'])
+    @app.route('/api/form', methods=['POST'])
+    def form():
+        return 'ok'
+    
+    return app.test_client()
+
+
+def test_request_validation_passes_clean_forms(validating_client, security_events):
+    response = validating_client.post('/form', data={'name': 'Dr Tan', 'note': 'night shift'})
+    assert response.status_code == 200
+    assert security_events == []
+
+
+def test_request_validation_reports_the_suspicious_field(validating_client, security_events):
+    response = validating_client.post('/form', data={
+        'name': 'Dr Tan', 'note': 'x UNION SELECT password', 'ward': 'B'
+    })
+    
+    assert response.status_code == 400
+    [(_, event)] = security_events
+    assert event['description'] == "Suspicious pattern in form data: UNION SELECT"
+    assert event['details']['field'] == 'note'
+
+
+def test_request_validation_does_not_match_across_fields(validating_client, security_events):
+    # '; ' ending one value and '--' starting the next must not read as '; --'
+    response = validating_client.post('/form', data={'a': 'x; ', 'b': '-- y'})
+    assert response.status_code == 200
+
+
+def test_request_validation_rejects_suspicious_urls(validating_client, security_events):
+    response = validating_client.post('/form?next=<script>alert(1)</script>')
+    assert response.status_code == 400
+    assert security_events[0][1]['description'] == "Suspicious pattern in URL: <script"
+
+
+def test_request_validation_requires_json_for_api_writes(validating_client, security_events):
+    assert validating_client.post('/api/form', data={'a': 'b'}).status_code == 400
+    assert validating_client.post('/api/form', json={'a': 'b'}).status_code == 200
+
+def headers_app(secure=False):
+    """App with only the security headers installed"""
+    app = Flask(__name__)
+    app.config['SESSION_COOKIE_SECURE'] = secure
+    middleware.setup_security_headers(app)
+    
+    @app.route('/')
+    def index():
+        return 'ok'
+    
+    @app.route('/embeddable')
+    def embeddable():
+        return 'ok', {'X-Frame-Options': 'SAMEORIGIN'}
+    
+    return app
+
+
+def test_security_headers_are_sent_once():
+    response = headers_app().test_client().get('/')
+    
+    assert response.headers['X-Frame-Options'] == 'DENY'
+    assert response.headers['X-Content-Type-Options'] == 'nosniff'
+    assert "frame-ancestors 'none'" in response.headers['Content-Security-Policy']
+    assert all(len(response.headers.getlist(name)) == 1 for name in response.headers.keys())
+    assert 'Strict-Transport-Security' not in response.headers
+
+
+def test_security_headers_replace_ones_set_by_the_view():
+    response = headers_app().test_client().get('/embeddable')
+    assert response.headers.getlist('X-Frame-Options') == ['DENY']
+
+
+def test_hsts_only_with_secure_cookies():
+    response = headers_app(secure=True).test_client().get('/')
+    assert response.headers['Strict-Transport-Security'] == 'max-age=31536000; includeSubDomains'
+
+@pytest.fixture
+def redis_client():
+    fakeredis = pytest.importorskip('fakeredis')
+    return fakeredis.FakeRedis()
+
+
+def test_ip_blocker_blocks_and_unblocks(redis_client, security_events):
+    blocker = IPBlocker(redis_client)
+    assert not blocker.is_blocked('203.0.113.7')
+    
+    blocker.block_ip('203.0.113.7', reason='brute force')
+    assert blocker.is_blocked('203.0.113.7')
+    assert not blocker.is_blocked('203.0.113.8')
+    assert security_events[0][0] == 'ip_blocked'
+    
+    blocker.unblock_ip('203.0.113.7')
+    assert not blocker.is_blocked('203.0.113.7')
+
+
+def test_ip_blocks_are_shared_through_redis(redis_client, security_events):
+    IPBlocker(redis_client).block_ip('203.0.113.7')
+    other_worker = IPBlocker(redis_client)
+    assert other_worker.is_blocked('203.0.113.7')
+    
+    # Within cache_ttl a worker keeps its cached answer
+    IPBlocker(redis_client).unblock_ip('203.0.113.7')
+    assert other_worker.is_blocked('203.0.113.7')
+    assert not IPBlocker(redis_client).is_blocked('203.0.113.7')
+
+
+def test_ip_block_bitmaps_defer_to_the_per_ip_record(redis_client, security_events):
+    blocker = IPBlocker(redis_client, block_duration=7200)
+    blocker.block_ip('203.0.113.7')
+    
+    # Two bitmaps for each of the three hours the block touches, expiring after it
+    bitmaps = redis_client.keys('blocked_bf*')
+    assert len(bitmaps) == 6
+    assert all(0 < redis_client.ttl(key) <= 3 * IPBlocker.BITMAP_PERIOD for key in bitmaps)
+    
+    # Once the per-IP record expires the set bits alone do not block
+    redis_client.delete('blocked_ip:203.0.113.7')
+    assert not IPBlocker(redis_client).is_blocked('203.0.113.7')
+
+class SessionUser(UserMixin):
+    id = '1'
+    email = 'test@example.com'
+    
+    def is_locked(self):
+        return False
+
+
+@pytest.fixture
+def session_client():
+    """Client of an app with only session security installed, logged in"""
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', PERMANENT_SESSION_LIFETIME=timedelta(hours=1))
+    LoginManager(app).user_loader(lambda user_id: SessionUser())
+    middleware.setup_session_security(app)
+    
+    auth = Blueprint('auth', __name__)
+    
+    @auth.route('/login')
+    def login():
+        login_user(SessionUser())
+        return 'logged in'
+    
+    app.register_blueprint(auth, url_prefix='/auth')
+    app.add_url_rule('/', 'index', lambda: 'ok')
+    
+    client = app.test_client()
+    client.get('/auth/login')
+    return client
+
+
+def set_last_active(client, value):
+    with client.session_transaction() as sess:
+        sess['last_active'] = value
+
+
+def get_last_active(client):
+    with client.session_transaction() as sess:
+        return sess.get('last_active')
+
+
+def test_last_active_is_stored_as_epoch_seconds(session_client):
+    assert session_client.get('/').status_code == 200
+    assert abs(get_last_active(session_client) - time.time()) < 5
+
+
+def test_last_active_is_only_rewritten_once_stale(session_client):
+    now = int(time.time())
+    set_last_active(session_client, now - 10)
+    session_client.get('/')
+    assert get_last_active(session_client) == now - 10
+    
+    set_last_active(session_client, now - middleware.LAST_ACTIVE_RESOLUTION - 10)
+    session_client.get('/')
+    assert get_last_active(session_client) >= now
+
+
+@pytest.mark.parametrize('age, expired', [(timedelta(minutes=30), False), (timedelta(hours=2), True)])
+def test_session_timeout_reads_legacy_iso_timestamps(session_client, age, expired):
+    set_last_active(session_client, (datetime.utcnow() - age).isoformat())
+    response = session_client.get('/')
+    
+    assert (response.status_code == 302) == expired
+    if expired:
+        assert response.headers['Location'] == '/auth/login'
+    else:
+        assert isinstance(get_last_active(session_client), int)
+
+def https_app(secure):
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', SESSION_COOKIE_SECURE=secure)
+    LoginManager(app).user_loader(lambda user_id: None)
+    middleware.setup_session_security(app)
+    app.add_url_rule('/', 'index', lambda: 'ok')
+    return app
+
+
+def test_https_is_enforced_with_secure_cookies():
+    client = https_app(secure=True).test_client()
+    
+    response = client.get('/?page=2')
+    assert response.status_code == 302
+    assert response.headers['Location'] == 'https://localhost/?page=2'
+    
+    assert client.get('/', headers={'X-Forwarded-Proto': 'https'}).status_code == 200
+    assert client.get('/', base_url='https://localhost').status_code == 200
+
+
+def test_no_https_hook_without_secure_cookies():
+    app = https_app(secure=False)
+    
+    hooks = [hook.__name__ for hook in app.before_request_funcs[None]]
+    assert 'enforce_https' not in hooks
+    assert app.test_client().get('/').status_code == 200
+
+@pytest.mark.parametrize('path', ['/static/app.js?v=<script>', '/favicon.ico?x=../'])
+def test_request_validation_skips_static_assets(validating_client, security_events, path):
+    # Not found, rather than rejected as suspicious
+    assert validating_client.get(path).status_code == 404
+    assert security_events == []
+
+def test_blocked_clients_are_refused_before_the_user_is_loaded(redis_client, security_events):
+    app = Flask(__name__)
+    app.config.update(SECRET_KEY='test', REDIS_URL='redis://localhost:6379')
+    app.extensions['redis_clients'] = {'redis://localhost:6379': redis_client}
+    loaded = []
+    LoginManager(app).user_loader(lambda user_id: loaded.append(user_id))
+    middleware.init_security_middleware(app)
+    app.add_url_rule('/', 'index', lambda: 'ok')
+    
+    assert app.before_request_funcs[None][0].__name__ == 'check_ip_block'
+    
+    app.ip_blocker.block_ip('127.0.0.1')
+    client = app.test_client()
+    with client.session_transaction() as sess:
+        sess['_user_id'] = '1'
+    
+    assert client.get('/').status_code == 403
+    assert loaded == []
\ No newline at end of file
@@ -0,0 +1,17 @@
+"""Tests for app.models.roster JSON columns"""
+from app.models.roster import GeneratedRoster
+
+
+def test_json_columns_return_independent_copies():
+    roster = GeneratedRoster(roster_data_json='{"2024-03-01": {"staff": ["alice", "bob"]}}')
+    
+    # Changing a read in place does not leak into later reads
+    roster.roster_data['2024-03-01']['staff'].remove('alice')
+    assert roster.roster_data == {'2024-03-01': {'staff': ['alice', 'bob']}}
+    
+    # Setting the column is seen by the next read
+    data = roster.roster_data
+    data['2024-03-01']['staff'].append('chen')
+    roster.roster_data = data
+    assert roster.roster_data['2024-03-01']['staff'] == ['alice', 'bob', 'chen']
+    assert roster.stats == {}
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""Tests for app.security.rbac"""
+from datetime import datetime, timedelta
+
+import pytest
+from flask import Flask, g, render_template_string
+from flask_login import LoginManager, UserMixin, login_user
+
+from app import db
+from app.models.roster import GeneratedRoster, RosterProfile, SharedProfile
+from app.models.user import Role, User
+from app.security.rbac import (
+    PermissionManager, init_rbac_helpers, require_permission, require_resource_access
+)
+
+
+@pytest.fixture
+def user(app, test_user):
+    """test_user, attached to a request's session; starts without roles"""
+    with app.test_request_context():
+        yield db.session.get(User, test_user.id)
+
+
+def test_permissions_are_memoized_for_the_request(user):
+    assert not user.has_permission('roster.view')
+    assert g._user_permissions == (user.id, frozenset())
+    
+    # Answered from the memo: a role added behind the manager's back is not seen
+    user.roles.append(Role.query.filter_by(name=Role.VIEWER).one())
+    assert not user.has_permission('roster.view')
+
+
+def test_role_changes_refresh_memoized_permissions(user, admin_user):
+    assert not user.has_permission('roster.edit')
+    
+    PermissionManager.grant_role(user, Role.SCHEDULER, granted_by=admin_user)
+    assert user.has_permission('roster.edit')
+    assert PermissionManager.get_user_permissions(user) >= {'roster.view', 'profile.share'}
+    
+    PermissionManager.revoke_role(user, Role.SCHEDULER, revoked_by=admin_user)
+    db.session.refresh(user)
+    assert not user.has_permission('roster.edit')
+
+
+@pytest.mark.parametrize('decorate', [
+    lambda: require_permission('roster.veiw'),
+    lambda: require_resource_access('roster', 'veiw'),
+])
+def test_unknown_permissions_fail_when_the_view_is_decorated(decorate):
+    with pytest.raises(ValueError, match='Unknown permission'):
+        decorate()(lambda: None)
+
+
+def test_profile_access_is_owner_or_active_share(user, admin_user):
+    profile = RosterProfile(user_id=admin_user.id, name='Ward B', rules_json='{}')
+    db.session.add(profile)
+    db.session.commit()
+    
+    assert RosterProfile.user_can_access(admin_user.id, admin_user.email, profile.id)
+    assert not RosterProfile.user_can_access(user.id, user.email, profile.id)
+    
+    share = SharedProfile(profile_id=profile.id, shared_with_email=user.email, token='t' * 64,
+                          expires_at=datetime.utcnow() + timedelta(days=1))
+    db.session.add(share)
+    db.session.commit()
+    assert RosterProfile.user_can_access(user.id, user.email, profile.id)
+    # A share for one profile grants nothing on another
+    assert not RosterProfile.user_can_access(user.id, user.email, profile.id + 1)
+    
+    share.is_active = False
+    db.session.commit()
+    assert not RosterProfile.user_can_access(user.id, user.email, profile.id)
+
+
+def test_roster_access_is_owner_only(user, admin_user):
+    roster = GeneratedRoster(user_id=admin_user.id, name='March', roster_data_json='{}',
+                             start_date=datetime(2024, 3, 1).date(), end_date=datetime(2024, 3, 31).date())
+    db.session.add(roster)
+    db.session.commit()
+    
+    assert GeneratedRoster.user_can_access(admin_user.id, roster.id)
+    assert not GeneratedRoster.user_can_access(user.id, roster.id)
+
+
+class CountingUser(UserMixin):
+    """Grants roster.view only; counts permission and role checks"""
+    id = '1'
+    
+    def __init__(self):
+        self.checks = 0
+    
+    def has_permission(self, permission):
+        self.checks += 1
+        return permission == 'roster.view'
+    
+    def has_role(self, role_name):
+        self.checks += 1
+        return False
+
+
+def test_template_checks_are_memoized_per_request():
+    app = Flask(__name__)
+    app.config['SECRET_KEY'] = 'test'
+    user = CountingUser()
+    LoginManager(app).user_loader(lambda user_id: None)
+    init_rbac_helpers(app)
+    template = ("{{ has_permission('roster.view') }} {{ has_permission('roster.view') }} "
+                "{{ has_permission('roster.edit') }} {{ has_role('admin') }} {{ has_role('admin') }}")
+    
+    with app.test_request_context():
+        assert render_template_string(template) == 'False False False False False'
+        
+        login_user(user)
+        assert render_template_string(template) == 'True True False False False'
+        assert user.checks == 3
+        
+        # A role change in the request drops the memo
+        PermissionManager._invalidate_cached_permissions()
+        render_template_string(template)
+        assert user.checks == 6
\ No newline at end of file
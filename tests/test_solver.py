@@ -0,0 +1,195 @@
+"""Tests for app.rostering.solver"""
+from datetime import date, timedelta
+
+import numpy as np
+import pytest
+
+from app.rostering import solver as solver_module
+from app.rostering.csp import RosterCSP
+from app.rostering.constraints import (
+    MinimumStaffConstraint, MaxConsecutiveDaysConstraint, MinRestPeriodConstraint,
+    SpecialtyCoverageConstraint, FairWorkloadConstraint
+)
+from app.rostering.solver import RosterSolver
+
+STAFF = ['alice', 'bob', 'chen', 'devi', 'eli']
+DATES = [(date(2024, 1, 1) + timedelta(days=d)).isoformat() for d in range(10)]
+SPECIALTIES = {'alice': 'cardio', 'bob': 'cardio', 'chen': 'neuro', 'devi': 'neuro', 'eli': 'ortho'}
+LEAVE = {DATES[0]: ['alice', 'chen'], DATES[4]: ['eli']}
+
+
+def make_csp(min_staff=2, max_days=3, min_rest=None, specialties=False, leave=LEAVE, dates=DATES):
+    """Small roster with the given hard constraints"""
+    csp = RosterCSP(STAFF, dates, SPECIALTIES)
+    csp.add_constraint(MinimumStaffConstraint(min_staff, dates, STAFF))
+    csp.add_constraint(MaxConsecutiveDaysConstraint(max_days, dates, STAFF))
+    if min_rest is not None:
+        csp.add_constraint(MinRestPeriodConstraint(min_rest, dates, STAFF))
+    if specialties:
+        csp.add_constraint(SpecialtyCoverageConstraint(SPECIALTIES, dates, 2))
+    csp.initialize_domains(leave)
+    return csp
+
+
+def assert_valid(csp, solution, leave=LEAVE):
+    """solution assigns every slot, keeps staff on leave off and meets every hard constraint"""
+    assert set(solution) == {(staff, day) for staff in STAFF for day in DATES}
+    for day, staff_on_leave in leave.items():
+        assert all(solution[(staff, day)] == 0 for staff in staff_on_leave)
+    
+    A = csp.assignment_dict_to_array(solution)
+    assert all(constraint.check(A) for constraint in csp.get_hard_constraints())
+
+
+@pytest.fixture(params=['compiled', 'python'])
+def search(request, monkeypatch):
+    """Run backtracking through the Numba kernel and through _backtrack"""
+    if request.param == 'compiled':
+        if not solver_module.NUMBA_AVAILABLE:
+            pytest.skip("numba not installed")
+    else:
+        monkeypatch.setattr(solver_module, 'NUMBA_AVAILABLE', False)
+    return request.param
+
+
+@pytest.mark.parametrize('constraints', [
+    {},
+    {'min_rest': 1},
+    {'specialties': True},
+    {'max_days': 2, 'min_rest': 0, 'specialties': True},
+])
+def test_backtracking_finds_a_valid_roster(search, constraints):
+    csp = make_csp(**constraints)
+    solver = RosterSolver(csp)
+    
+    solution = solver.solve_with_backtracking()
+    
+    assert_valid(csp, solution)
+    assert solver.solution == solution
+    assert solver.iterations > 0
+
+
+@pytest.mark.skipif(not solver_module.NUMBA_AVAILABLE, reason="numba not installed")
+def test_compiled_search_mirrors_python_search(monkeypatch):
+    compiled = RosterSolver(make_csp(min_rest=1, specialties=True))
+    solution = compiled.solve_with_backtracking()
+    
+    monkeypatch.setattr(solver_module, 'NUMBA_AVAILABLE', False)
+    python = RosterSolver(make_csp(min_rest=1, specialties=True))
+    
+    assert python.solve_with_backtracking() == solution
+    assert python.iterations == compiled.iterations
+
+
+def test_backjumping_skips_decisions_unrelated_to_a_dead_end(search):
+    # Seven staff working at most every other day cover at most 21 shifts in
+    # six days, and four staff a day need 24. Chronological backtracking
+    # takes about 28,000 nodes to prove it, retrying every unrelated decision
+    staff = [f's{i}' for i in range(7)]
+    dates = DATES[:6]
+    csp = RosterCSP(staff, dates, {})
+    csp.add_constraint(MinimumStaffConstraint(4, dates, staff))
+    csp.add_constraint(MaxConsecutiveDaysConstraint(1, dates, staff))
+    csp.initialize_domains({})
+    solver = RosterSolver(csp)
+    
+    assert solver.solve_with_backtracking() is None
+    assert solver.iterations < 1000
+
+
+def test_backtracking_reports_an_infeasible_roster(search):
+    # Five staff working at most every other day cover at most five
+    # shifts in two days, and three staff a day need six
+    csp = make_csp(min_staff=3, max_days=1, leave={}, dates=DATES[:3])
+    
+    assert RosterSolver(csp).solve_with_backtracking() is None
+
+
+def test_max_days_zero_rules_out_every_shift(search):
+    csp = make_csp(max_days=0)
+    
+    assert RosterSolver(csp).solve_with_backtracking() is None
+    assert (csp.dom == solver_module.DOMAIN_ZERO).all()
+
+
+def test_arc_consistency_removes_shifts_next_to_forced_ones():
+    csp = make_csp(min_rest=2)
+    csp.dom[0, 5] = solver_module.DOMAIN_ONE
+    
+    assert RosterSolver(csp)._enforce_arc_consistency()
+    
+    # alice must work day 5, so days 3, 4, 6 and 7 are ruled out
+    assert np.flatnonzero(csp.dom[0] == solver_module.DOMAIN_ZERO).tolist() == [0, 3, 4, 6, 7]
+
+
+def test_parallel_search_finds_a_valid_roster():
+    csp = make_csp(min_rest=1)
+    
+    solution = RosterSolver(csp).solve_parallel(workers=2)
+    
+    assert_valid(csp, solution)
+
+
+def test_greedy_roster_meets_staffing_and_spreads_work():
+    csp = make_csp(max_days=2)
+    solver = RosterSolver(csp)
+    
+    solution = solver.solve_greedy()
+    
+    assert_valid(csp, solution)
+    workloads = csp.assignment_dict_to_array(solution).sum(axis=1)
+    assert workloads.max() - workloads.min() <= 1
+    assert solver.solution == solution
+
+
+def test_greedy_breaks_workload_ties_alphabetically():
+    # Listed out of order; with nobody on leave the first day goes to the first names
+    csp = RosterCSP(STAFF[::-1], DATES, SPECIALTIES)
+    csp.add_constraint(MinimumStaffConstraint(2, DATES, STAFF))
+    
+    solution = RosterSolver(csp).solve_greedy()
+    
+    assert [staff for staff in STAFF if solution[(staff, DATES[0])]] == ['alice', 'bob']
+
+
+@pytest.mark.parametrize('backend', ['cbc', 'highs'])
+def test_integer_program_finds_a_balanced_roster(backend):
+    csp = make_csp(max_days=2)
+    
+    solution = RosterSolver(csp).solve_with_pulp(backend)
+    
+    assert_valid(csp, solution)
+    workloads = csp.assignment_dict_to_array(solution).sum(axis=1)
+    assert workloads.max() - workloads.min() <= 1
+
+
+def test_validate_solution_lists_hard_violations_and_soft_penalties():
+    csp = make_csp(min_rest=1)
+    csp.add_constraint(FairWorkloadConstraint(STAFF, weight=1.0, max_variance=0.0))
+    solver = RosterSolver(csp)
+    assert solver.validate_solution() == (False, ["No solution found"])
+    assert not solver.is_valid()
+    
+    # alice works every day, everyone else never: short-staffed, no rest
+    # and too many days in a row, with uneven workloads
+    solver.solution = {(staff, day): int(staff == 'alice') for staff in STAFF for day in DATES}
+    valid, violations = solver.validate_solution()
+    
+    assert not valid
+    assert not solver.is_valid()
+    assert violations == [
+        "Hard constraint violated: minimum_staff",
+        "Hard constraint violated: max_consecutive_days",
+        "Hard constraint violated: min_rest_period",
+        "Soft constraint penalty: fair_workload = 16.00",
+    ]
+    assert solver.get_violations() == violations
+
+
+def test_validate_solution_accepts_a_solved_roster():
+    csp = make_csp(min_rest=1)
+    solver = RosterSolver(csp)
+    solver.solve_with_backtracking()
+    
+    assert solver.validate_solution() == (True, [])
+    assert solver.is_valid()
\ No newline at end of file
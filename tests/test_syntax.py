@@ -1,65 +1,109 @@
 """Basic syntax and import tests"""
+import importlib
+import importlib.machinery
+import pkgutil
 import sys
 import os
+from contextlib import contextmanager
+
+import pytest
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..'))
 
 # Add project root to path
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-
-def test_imports():
-    """Test that all modules can be imported"""
-    imports = [
-        "app.models.user",
-        "app.models.audit", 
-        "app.models.roster",
-        "app.security.audit",
-        "app.security.encryption",
-        "app.security.middleware",
-        "app.security.rbac",
-        "app.rostering.csp",
-        "app.rostering.constraints",
-        "app.rostering.solver",
-        "app.api.v1.auth",
-        "app.api.v1.roster",
-        "app.auth.routes",
-        "app.auth.routes_enhanced",
-        "app.roster.routes",
-        "app.utils.decorators",
-        "app.utils.error_handlers",
-        "app.utils.validators",
-        "app.config.base",
-        "app.config.development",
-        "app.config.production",
-        "app.config.testing"
-    ]
-    
-    failed_imports = []
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+
+def discover_modules(path=os.path.join(ROOT, 'app'), prefix='app.'):
+    """List every module and package under app, without importing any"""
+    # pkgutil.walk_packages imports each package to find its children, and
+    # some app packages currently fail to import
+    for info in pkgutil.iter_modules([path], prefix):
+        yield info.name
+        if info.ispkg:
+            yield from discover_modules(
+                os.path.join(path, info.name.rpartition('.')[2]), info.name + '.'
+            )
+
+
+MODULES = sorted(discover_modules())
+
+# Modules that parse but currently fail to import, with the (error, reason)
+# they raise; each gets a strict xfail
+KNOWN_IMPORT_FAILURES = {}
+
+# Blueprint packages; their route modules can't add routes to a blueprint
+# the app fixture has already registered, so test_import loads them afresh
+BLUEPRINT_PACKAGES = {"app.api", "app.auth", "app.roster"}
+
+IMPORT_PARAMS = [
+    pytest.param(module, marks=pytest.mark.xfail(
+        raises=KNOWN_IMPORT_FAILURES[module][0], reason=KNOWN_IMPORT_FAILURES[module][1], strict=True
+    ))
+    if module in KNOWN_IMPORT_FAILURES else module
+    for module in MODULES
+]
+
+
+def find_source(module):
+    """Locate a module's source file without importing it or its packages"""
+    # importlib.util.find_spec would import the parent packages, and their
+    # __init__ modules pull in most of the app
+    path = None
+    for name in module.split('.'):
+        spec = importlib.machinery.PathFinder.find_spec(name, path)
+        if spec is None:
+            return None
+        path = spec.submodule_search_locations
+    return spec.origin
+
+
+@pytest.mark.parametrize('module', MODULES)
+def test_syntax(module):
+    """Test that a module's source compiles, without running it"""
+    origin = find_source(module)
+    assert origin, f"{module} not found"
     
-    for module in imports:
-        try:
-            __import__(module)
-            print(f"✓ {module}")
-        except ImportError as e:
-            # Skip import errors due to missing dependencies
-            if "No module named" in str(e) and any(dep in str(e) for dep in ['flask', 'sqlalchemy', 'cryptography', 'pulp', 'pyotp', 'jwt']):
-                print(f"⚠ {module} - Missing dependency: {e}")
-            else:
-                failed_imports.append((module, str(e)))
-                print(f"✗ {module} - {e}")
-        except SyntaxError as e:
-            failed_imports.append((module, str(e)))
-            print(f"✗ {module} - Syntax error: {e}")
-        except Exception as e:
-            failed_imports.append((module, str(e)))
-            print(f"✗ {module} - Error: {e}")
+    with open(origin, 'rb') as f:
+        compile(f.read(), origin, 'exec')
+
+
+@contextmanager
+def fresh_package(package):
+    """Import package and its modules from scratch, then put the originals back"""
+    def loaded():
+        return {name: mod for name, mod in sys.modules.items()
+                if name == package or name.startswith(package + '.')}
     
-    if failed_imports:
-        print("\nFailed imports:")
-        for module, error in failed_imports:
-            print(f"  - {module}: {error}")
-        return False
-    else:
-        print("\nAll modules have valid syntax!")
-        return True
+    parent, _, attr = package.rpartition('.')
+    saved_modules = loaded()
+    saved_attr = getattr(sys.modules[parent], attr, None)
+    for name in saved_modules:
+        del sys.modules[name]
+    try:
+        yield
+    finally:
+        for name in loaded():
+            del sys.modules[name]
+        sys.modules.update(saved_modules)
+        if saved_attr is None:
+            sys.modules[parent].__dict__.pop(attr, None)
+        else:
+            setattr(sys.modules[parent], attr, saved_attr)
 
-if __name__ == "__main__":
-    test_imports()
\ No newline at end of file
+
+@pytest.mark.parametrize('module', IMPORT_PARAMS)
+def test_import(module):
+    """Test that a module can be imported, skipping it if a dependency is missing"""
+    # A failed import can leave submodules of its package in sys.modules, and
+    # a later import of one of them would then pass. Known failures and
+    # blueprint modules are imported with their package from scratch; other
+    # modules stay cached, since re-running model modules would redefine
+    # their tables
+    package = '.'.join(module.split('.')[:2])
+    if module in KNOWN_IMPORT_FAILURES or package in BLUEPRINT_PACKAGES:
+        with fresh_package(package):
+            pytest.importorskip(module)
+    else:
+        pytest.importorskip(module)
\ No newline at end of file